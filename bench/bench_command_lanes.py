@@ -0,0 +1,25 @@
+# Transport latency while the slow lane is saturated with blocking jobs:
+#   python bench/bench_command_lanes.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from command_lanes import CommandDispatcher  # noqa: E402
+
+
+if __name__ == "__main__":
+    lanes = CommandDispatcher(slow_workers=2)
+    heavy = lanes.slow(lambda: time.sleep(0.5), name="download")
+    pause = lanes.fast(lambda: None, name="pause")
+    for _ in range(20):
+        heavy()
+    for _ in range(2000):
+        pause()
+        time.sleep(0.001)
+    time.sleep(0.2)
+    for lane, stats in lanes.report().items():
+        for name, row in stats.items():
+            print(f"{lane:<5} {name:<10} {row}")
+    lanes.shutdown()
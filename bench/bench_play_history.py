@@ -0,0 +1,43 @@
+# A long session, unbounded list + .index() vs the PlayHistory ring:
+#   python bench/bench_play_history.py [plays] [capacity]   (default 100k 200)
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from play_history import DEFAULT_CAPACITY, PlayHistory  # noqa: E402
+
+
+def run(plays: int = 100_000, capacity: int = DEFAULT_CAPACITY) -> None:
+    """A long session: unbounded list + .index() vs the ring."""
+    # A 50k-track library played through twice.
+    names = [f"Track {i % 50_000}.m4a" for i in range(plays)]
+
+    old = list(names)
+    probe = names[-1000:]
+    t0 = time.perf_counter()
+    for n in probe:
+        old[old.index(n) - 1]  # first occurrence, as the service did
+    scan = (time.perf_counter() - t0) / len(probe)
+
+    hist = PlayHistory(capacity)
+    t0 = time.perf_counter()
+    for n in names:
+        hist.record(n)
+    rec = (time.perf_counter() - t0) / plays
+    t0 = time.perf_counter()
+    for _ in range(capacity - 1):
+        hist.back()
+    back = (time.perf_counter() - t0) / max(1, capacity - 1)
+
+    print(f"{plays} plays:")
+    print(f"  list + .index()  {sys.getsizeof(old) / 1024:8.1f} KiB, previous {scan * 1e6:8.2f} us")
+    print(
+        f"  PlayHistory({capacity}) {sys.getsizeof(hist._buf) / 1024:6.1f} KiB,"
+        f" previous {back * 1e6:8.2f} us, record {rec * 1e6:.2f} us"
+    )
+
+
+if __name__ == "__main__":
+    run(*(int(x) for x in sys.argv[1:3]))
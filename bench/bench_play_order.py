@@ -0,0 +1,46 @@
+# next() over an n-track playlist, PlayOrder vs list.index():
+#   python bench/bench_play_order.py [tracks] [steps]   (default 100k 100k)
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from play_order import PlayOrder  # noqa: E402
+
+
+def run(n: int = 100_000, steps: int = 100_000) -> None:
+    """next() over an n-track playlist: PlayOrder vs list.index()."""
+    items = [f"Track {i}.m4a" for i in range(n)]
+    order = PlayOrder()
+    t0 = time.perf_counter()
+    order.locate(items, items[0])
+    build = time.perf_counter() - t0
+
+    name = items[0]
+    t0 = time.perf_counter()
+    for _ in range(steps):
+        name = order.next(items, name)
+    fast = (time.perf_counter() - t0) / steps
+
+    # Random jumps miss the cursor and go through the map.
+    names = [items[(i * 7919) % n] for i in range(steps)]
+    t0 = time.perf_counter()
+    for nm in names:
+        order.next(items, nm)
+    jump = (time.perf_counter() - t0) / steps
+
+    probe = names[: max(1, steps // 100)]
+    t0 = time.perf_counter()
+    for nm in probe:
+        items[(items.index(nm) + 1) % n]
+    scan = (time.perf_counter() - t0) / len(probe)
+
+    print(f"{n} tracks: map build {build * 1000:.1f} ms")
+    print(f"  next() sequential {fast * 1e6:7.2f} us")
+    print(f"  next() after jump {jump * 1e6:7.2f} us")
+    print(f"  list.index() next {scan * 1e6:7.2f} us  ({scan / fast:.0f}x slower)")
+
+
+if __name__ == "__main__":
+    run(*(int(x) for x in sys.argv[1:3]))
@@ -0,0 +1,110 @@
+# Load time and RSS per shard format (load + open + first 50 rows):
+#   python bench/bench_playlist_load.py [tracks ...]   (default 10k 100k 1M)
+# Each case runs in a fresh interpreter so RSS numbers do not mix. The
+# "eager" row is the json store loaded the way load() worked before it
+# became read-only: every track's path and cover checked on disk, then the
+# whole snapshot rewritten.
+import contextlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playlist_columns import EXTENSION as COLUMNAR_EXT  # noqa: E402
+from playlist_columns import write_columns  # noqa: E402
+from playlist_manager import (  # noqa: E402
+    DEFAULT_REL_SUBDIR,
+    LAYOUT_VERSION,
+    PLAYLIST_FILENAME,
+    SHARD_DIR_SUFFIX,
+    SHARD_FORMATS,
+    _ROW_FIELDS,
+    PlaylistManager,
+    _resolve_paths,
+    _write_json_atomic,
+)
+from utils import get_app_writable_dir  # noqa: E402
+
+EAGER = "eager"
+
+
+def _rss_mb() -> float:
+    with contextlib.suppress(OSError, ValueError, IndexError):
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _bench_case(store: str, fmt: str) -> None:
+    base = _rss_mb()
+    t0 = time.perf_counter()
+    if fmt == EAGER:
+        pm = PlaylistManager(store)
+        pm._load_all()
+        root = get_app_writable_dir(DEFAULT_REL_SUBDIR)
+        for p in pm.list_playlists():
+            for t in p.tracks:
+                t.path, t.thumb = _resolve_paths(t.path, t.thumb, root)
+        pm.mark_dirty()
+        pm.save()
+    else:
+        pm = PlaylistManager(store, shard_format=fmt)
+    ap = pm.active_playlist()
+    first_screen = [t.title for t in ap.tracks[:50]]
+    elapsed = (time.perf_counter() - t0) * 1000
+    print(
+        f"{fmt:<9} {len(ap.tracks):>8} tracks  "
+        f"load+open {elapsed:9.1f} ms  rss +{_rss_mb() - base:7.1f} MB"
+        f"  ({len(first_screen)} rows read)"
+    )
+
+
+def _bench_store(tmpdir: str, count: int, fmt: str) -> str:
+    store = os.path.join(tmpdir, f"{fmt}-{count}", PLAYLIST_FILENAME)
+    shard_dir = os.path.splitext(store)[0] + SHARD_DIR_SUFFIX
+    rows = (
+        (f"Track {i}", f"Track {i}.m4a", 180.0, f"Track {i}.jpg") for i in range(count)
+    )
+    meta = {"id": "bench", "name": "Bench", "journal_seq": 0}
+    if fmt == "columnar":
+        fname = f"bench{COLUMNAR_EXT}"
+        write_columns(os.path.join(shard_dir, fname), meta, rows)
+    else:
+        fname = "bench.json"
+        tracks = [dict(zip(_ROW_FIELDS, r)) for r in rows]
+        _write_json_atomic(os.path.join(shard_dir, fname), dict(meta, tracks=tracks))
+    _write_json_atomic(
+        store,
+        {
+            "layout": LAYOUT_VERSION,
+            "journal_seq": 0,
+            "active_playlist_id": "bench",
+            "playlists": [{"id": "bench", "name": "Bench", "file": fname}],
+        },
+    )
+    return store
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--case"]:
+        _bench_case(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+
+    counts = [int(x) for x in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    tmpdir = tempfile.mkdtemp()
+    try:
+        for count in counts:
+            for fmt in SHARD_FORMATS:
+                store = _bench_store(tmpdir, count, fmt)
+                cases = (fmt, EAGER) if fmt == "json" else (fmt,)
+                for case in cases:
+                    args = [os.path.abspath(__file__), "--case", store, case]
+                    subprocess.run([sys.executable, *args], check=False)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
@@ -0,0 +1,94 @@
+# Per-track memory and save() serialization cost, the old dataclass
+# Track vs the slotted one:
+#   python bench/bench_playlist_memory.py [tracks]   (default 100k)
+import dataclasses
+import os
+import sys
+import time
+import tracemalloc
+from typing import Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playlist_manager import PlaylistManager, _track_from_raw  # noqa: E402
+from utils import get_app_writable_dir  # noqa: E402
+
+
+def run(count: int) -> None:
+    """Per-track memory and save() serialization: old dataclass vs Track."""
+    @dataclasses.dataclass
+    class _DictTrack:  # the previous Track layout
+        title: str
+        path: str
+        duration: float = 0.0
+        thumb: Optional[str] = None
+
+    root = get_app_writable_dir("Downloaded/Played")
+    stored = [
+        {"title": f"Artist {i % 500} - Song {i}", "path": f"Artist {i % 500} - Song {i}.m4a",
+         "duration": 180.0, "thumb": f"Artist {i % 500} - Song {i}.jpg"}
+        for i in range(count)
+    ]
+
+    def build_old():
+        out = []
+        for t in stored:
+            out.append(
+                _DictTrack(
+                    title=t["title"],
+                    path=os.path.normpath(os.path.join(root, t["path"])),
+                    duration=t["duration"],
+                    thumb=os.path.normpath(os.path.join(root, t["thumb"])),
+                )
+            )
+        return out
+
+    def build_new():
+        return [_track_from_raw(t, root) for t in stored]
+
+    results = {}
+    for label, build in (("dataclass", build_old), ("slotted", build_new)):
+        tracemalloc.start()
+        tracks = build()
+        size, _peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[label] = (tracks, size / count)
+
+    old_to_rel = _legacy_to_rel(root)
+    t0 = time.perf_counter()
+    for t in results["dataclass"][0]:
+        td = dataclasses.asdict(t)
+        td["path"] = old_to_rel(td.get("path"))
+        td["thumb"] = old_to_rel(td.get("thumb"))
+    old_save = time.perf_counter() - t0
+    to_rel = PlaylistManager._rel_mapper()
+    t0 = time.perf_counter()
+    for t in results["slotted"][0]:
+        PlaylistManager._track_record(t, to_rel)
+    new_save = time.perf_counter() - t0
+
+    old_b, new_b = results["dataclass"][1], results["slotted"][1]
+    print(f"{count} tracks under {root}")
+    print(f"  per-track memory: dataclass {old_b:6.0f} B  slotted {new_b:6.0f} B"
+          f"  ({old_b / new_b:.1f}x)")
+    print(f"  save() serialize: dataclass {old_save * 1000:6.0f} ms"
+          f"  slotted {new_save * 1000:6.0f} ms  ({old_save / new_save:.1f}x)")
+
+
+def _legacy_to_rel(root: str):
+    """The per-path relpath used by save() before the directory cache."""
+    root_norm = os.path.normcase(os.path.normpath(root))
+
+    def _to_rel(pth):
+        if not pth:
+            return pth
+        np = os.path.normpath(pth)
+        if os.path.normcase(np).startswith(root_norm + os.sep):
+            return os.path.relpath(np, root)
+        return pth
+
+    return _to_rel
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
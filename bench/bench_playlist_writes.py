@@ -0,0 +1,51 @@
+# Per-edit latency on the calling thread (what a GUI frame pays), with
+# synchronous journal appends vs async_writes:
+#   python bench/bench_playlist_writes.py [edits]   (default 1000)
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playlist_manager import PLAYLIST_FILENAME, PlaylistManager  # noqa: E402
+from utils import get_app_writable_dir  # noqa: E402
+
+
+def run(tmpdir: str, edits: int, size: int = 2000) -> None:
+    """Caller-side latency per edit (what a GUI frame pays), sync vs async."""
+    root = get_app_writable_dir("Downloaded/Played")
+    paths = [os.path.join(root, f"Track {i}.m4a") for i in range(size)]
+    for mode in ("sync", "async"):
+        pm = PlaylistManager(
+            os.path.join(tmpdir, mode, PLAYLIST_FILENAME),
+            async_writes=mode == "async",
+        )
+        pid = pm.create_playlist("Bench")
+        pm.add_tracks(pid, paths)
+        pm.flush()
+        lat = []
+        t_all = time.perf_counter()
+        for i in range(edits):
+            t0 = time.perf_counter()
+            pm.move_track(pid, i % size, (i * 7) % size)
+            lat.append(time.perf_counter() - t0)
+        t_flush = time.perf_counter()
+        pm.flush()
+        done = time.perf_counter()
+        lat.sort()
+        print(
+            f"{mode:6s} {edits} edits  per edit p50 {lat[len(lat) // 2] * 1000:6.2f} ms"
+            f"  p99 {lat[int(len(lat) * 0.99)] * 1000:6.2f} ms"
+            f"  max {lat[-1] * 1000:6.2f} ms"
+            f"  | flush {(done - t_flush) * 1000:6.1f} ms  total {(done - t_all):.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    tmpdir = tempfile.mkdtemp()
+    try:
+        run(tmpdir, int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
@@ -0,0 +1,44 @@
+# Per-skip cost, the old rebuild check vs ShuffleBag.draw():
+#   python bench/bench_shuffle_bag.py
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shuffle_bag import ShuffleBag  # noqa: E402
+
+
+def run(sizes=(1_000, 10_000, 100_000), skips: int = 1_000) -> None:
+    """Per-skip cost: the old rebuild check vs ShuffleBag.draw()."""
+    for n in sizes:
+        songs = [f"Track {i}.m4a" for i in range(n)]
+        bag = ShuffleBag()
+        t0 = time.perf_counter()
+        bag.start(songs)
+        build = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for _ in range(skips):
+            bag.draw(songs)
+        draw = (time.perf_counter() - t0) / skips
+        t0 = time.perf_counter()
+        for i in range(skips):
+            bag.apply_delta([songs[i]], [f"New {i}.m4a"])
+        edit = (time.perf_counter() - t0) / skips
+        line = (
+            f"{n:>7} tracks: start {build * 1000:6.1f} ms, draw {draw * 1e6:5.2f} us,"
+            f" add+remove {edit * 1e6:5.2f} us"
+        )
+        if n <= 10_000:
+            # The old per-skip check, with the whole bag still valid.
+            old_bag = list(songs)
+            random.shuffle(old_bag)
+            t0 = time.perf_counter()
+            any(item not in songs for item in old_bag)
+            line += f", old check {(time.perf_counter() - t0) * 1000:8.1f} ms"
+        print(line)
+
+
+if __name__ == "__main__":
+    run()
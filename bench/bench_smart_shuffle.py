@@ -0,0 +1,51 @@
+# Draw and update cost, and how weights shape the picks:
+#   python bench/bench_smart_shuffle.py [tracks] [draws]   (default 100k 10k)
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from smart_shuffle import SmartShuffle  # noqa: E402
+
+
+def run(n: int = 100_000, draws: int = 10_000) -> None:
+    """Draw and update cost, and how weights shape the picks."""
+    rng = random.Random(1)
+    now = time.time()
+    names = [f"Track {i}.m4a" for i in range(n)]
+    # Half the library played 20 times, the rest never.
+    stats = {name: (20, now - 86400 * 30) for name in names[: n // 2]}
+    smart = SmartShuffle(lambda: stats, rng=rng)
+
+    t0 = time.perf_counter()
+    smart.draw(names)
+    build = time.perf_counter() - t0
+
+    picks = []
+    t0 = time.perf_counter()
+    for _ in range(draws):
+        name = smart.draw(names)
+        smart.played(name)
+        picks.append(name)
+    per = (time.perf_counter() - t0) / draws
+
+    tree = smart._tree
+    t0 = time.perf_counter()
+    for i in range(draws):
+        tree.set(i % n, 1.0)
+    upd = (time.perf_counter() - t0) / draws
+
+    rare = sum(1 for p in picks if p in stats) / len(picks)
+    repeats = len(picks) - len(set(picks))
+    print(f"{n} tracks: build {build * 1000:.1f} ms")
+    print(f"  draw + played() {per * 1e6:7.2f} us, weight update {upd * 1e6:5.2f} us")
+    print(
+        f"  picks from the often-played half: {rare:.1%}"
+        f" (weight 1/sqrt(21) vs 1), repeated picks: {repeats}"
+    )
+
+
+if __name__ == "__main__":
+    run(*(int(x) for x in sys.argv[1:3]))
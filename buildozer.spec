@@ -6,15 +6,16 @@ version = 1.6.0
 android.numeric_version = 10600
 source.dir = .
 source.include_exts = py,png,jpg,kv,atlas,json
+source.exclude_dirs = tests, bench
 
-source.include_patterns = ./service/main.py, playlist_manager.py, musicapp.kv, library_tab.kv, utils.py
+source.include_patterns = ./service/main.py, playlist_manager.py, musicapp.kv, library_tab.kv, utils.py, download_queue.py, command_lanes.py, playback_metrics.py, playlist_transfer.py, library_index.py, playlist_columns.py, list_model.py, play_order.py, play_history.py, shuffle_bag.py, smart_shuffle.py
 
 # Your main script
 entrypoint = main.py
 
 # Kivy stack + your Python deps
 # Note: git URLs generally work with p4a/pip. If it errors, we can pin with PEP 508 "name @ git+..." syntax.
-requirements = python3,kivy,kivymd==1.2.0,pyjnius,cython,requests==2.32.5,httpx==0.17.1,httpcore==0.12.3,h11==0.12.0,rfc3986==1.5.0,sniffio==1.3.0,idna==3.4,git+https://github.com/Arctic4161/youtube-search-python.git,yt-dlp,oscpy,androidstorage4kivy,Pillow,mutagen
+requirements = python3,kivy,kivymd==1.2.0,pyjnius,cython,requests==2.32.5,httpx==0.17.1,httpcore==0.12.3,h11==0.12.0,rfc3986==1.5.0,sniffio==1.3.0,idna==3.4,git+https://github.com/Arctic4161/youtube-search-python.git,yt-dlp,oscpy,androidstorage4kivy,Pillow,mutagen,sqlite3
 
 # Android SDK targets (adjust if Gradle/p4a suggests otherwise)
 android.api = 33
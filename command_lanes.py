@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import contextlib
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+FAST = "fast"
+SLOW = "slow"
+ORDERED = "ordered"
+
+
+class _LatencyLog:
+    """Fixed-size window of enqueue->done latencies (seconds) per command."""
+
+    def __init__(self, size: int):
+        self._size = size
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            buf = self._samples.get(name)
+            if buf is None:
+                buf = self._samples[name] = deque(maxlen=self._size)
+            buf.append(seconds)
+
+    def report(self) -> dict:
+        with self._lock:
+            snap = {k: sorted(v) for k, v in self._samples.items() if v}
+        out = {}
+        for name, xs in snap.items():
+            n = len(xs)
+            out[name] = {
+                "count": n,
+                "p50_ms": round(xs[n // 2] * 1000.0, 3),
+                "p99_ms": round(xs[min(n - 1, int(n * 0.99))] * 1000.0, 3),
+                "max_ms": round(xs[-1] * 1000.0, 3),
+            }
+        return out
+
+
+class CommandDispatcher:
+    """
+    Executor lanes for OSC handlers so the server's callback thread only
+    enqueues and returns.
+      - fast lane: one dedicated thread, commands run strictly in arrival
+        order (play/pause/seek/next must never reorder).
+      - slow lane: a small thread pool for heavy work (downloads, library
+        scans); jobs may finish in any order.
+      - ordered lane: one worker for heavy work whose order matters
+        (installing playlists), kept off the fast lane.
+    Usage:
+        lanes = CommandDispatcher()
+        SERVER.bind("/play", lanes.fast(GS.play))
+        SERVER.bind("/downloadyt", lanes.slow(GS.download_yt))
+        SERVER.bind("/playlist", lanes.ordered(GS.play_list))
+    """
+
+    def __init__(self, slow_workers: int = 2, window: int = 512):
+        self._fast_q: queue.SimpleQueue = queue.SimpleQueue()
+        self._slow_pool = ThreadPoolExecutor(
+            max_workers=max(1, int(slow_workers)), thread_name_prefix="SlowLane"
+        )
+        self._ordered_pool = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="OrderedLane"
+        )
+        self.latency = {
+            FAST: _LatencyLog(window),
+            SLOW: _LatencyLog(window),
+            ORDERED: _LatencyLog(window),
+        }
+        self._fast_thread = threading.Thread(
+            target=self._fast_loop, name="FastLane", daemon=True
+        )
+        self._fast_thread.start()
+
+    def fast(self, fn: Callable, name: str | None = None) -> Callable:
+        name = name or getattr(fn, "__name__", "command")
+
+        def handler(*args):
+            self._fast_q.put((fn, args, name, time.perf_counter()))
+
+        return handler
+
+    def slow(self, fn: Callable, name: str | None = None) -> Callable:
+        name = name or getattr(fn, "__name__", "command")
+
+        def handler(*args):
+            self._slow_pool.submit(self._run, SLOW, fn, args, name, time.perf_counter())
+
+        return handler
+
+    def ordered(self, fn: Callable, name: str | None = None) -> Callable:
+        name = name or getattr(fn, "__name__", "command")
+
+        def handler(*args):
+            self._ordered_pool.submit(
+                self._run, ORDERED, fn, args, name, time.perf_counter()
+            )
+
+        return handler
+
+    def report(self) -> dict:
+        return {lane: log.report() for lane, log in self.latency.items()}
+
+    def shutdown(self) -> None:
+        self._fast_q.put(None)
+        for pool in (self._slow_pool, self._ordered_pool):
+            with contextlib.suppress(Exception):
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def _fast_loop(self):
+        while True:
+            item = self._fast_q.get()
+            if item is None:
+                return
+            fn, args, name, t0 = item
+            self._run(FAST, fn, args, name, t0)
+
+    def _run(self, lane, fn, args, name, t0):
+        try:
+            fn(*args)
+        except Exception as e:
+            print(f"[{lane}-lane] {name} failed:", e)
+        finally:
+            self.latency[lane].add(name, time.perf_counter() - t0)
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import contextlib
+import itertools
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+DEFAULT_WORKERS = 3
+MAX_WORKERS = 8
+
+
+@dataclass
+class DownloadJob:
+    id: int
+    payload: str
+    title: str = ""
+    notify: bool = True
+    state: str = QUEUED
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "title": self.title,
+            "state": self.state,
+            "error": self.error,
+        }
+
+
+class DownloadQueue:
+    """
+    FIFO download queue drained by a bounded pool of worker threads.
+    Usage:
+        q = DownloadQueue(runner=fn, workers=3, on_change=cb)
+        job = q.submit(payload_str, title="Song")
+        q.cancel(job.id)
+
+    `runner(job)` does the actual work and returns True on success. It should
+    poll `job.cancelled` (e.g. from a yt-dlp progress hook) to abort early.
+    `on_change(job, queue)` is called after every state transition.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[DownloadJob], bool],
+        workers: int = DEFAULT_WORKERS,
+        on_change: Optional[Callable[[DownloadJob, "DownloadQueue"], None]] = None,
+        history: int = 50,
+    ):
+        self._runner = runner
+        self._on_change = on_change
+        self._cond = threading.Condition()
+        self._pending: deque[DownloadJob] = deque()
+        self._jobs: Dict[int, DownloadJob] = {}
+        self._finished: deque[int] = deque()
+        self._history = max(1, int(history))
+        self._ids = itertools.count(1)
+        self._threads: List[threading.Thread] = []
+        self._target_workers = 0
+        self._retire = 0
+        self._closed = False
+        self.set_workers(workers)
+
+    def submit(self, payload: str, title: str = "", notify: bool = True) -> DownloadJob:
+        """Queue a download. A job for the same title that is still queued or
+        running is reused instead of downloading the file twice."""
+        with self._cond:
+            key = (title or "").strip().lower()
+            if key:
+                for job in self._jobs.values():
+                    if job.title.strip().lower() == key and job.state in (
+                        QUEUED,
+                        RUNNING,
+                    ):
+                        if notify and not job.notify:
+                            job.notify = True
+                        return job
+            job = DownloadJob(
+                id=next(self._ids), payload=payload, title=title, notify=notify
+            )
+            self._jobs[job.id] = job
+            self._pending.append(job)
+            self._cond.notify()
+        self._emit(job)
+        return job
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a queued job outright, or flag a running one to abort."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.state in FINISHED_STATES:
+                return False
+            job.cancel_event.set()
+            if job.state == QUEUED:
+                with contextlib.suppress(ValueError):
+                    self._pending.remove(job)
+                self._finish(job, CANCELLED)
+            else:
+                job = None
+        if job is not None:
+            self._emit(job)
+        return True
+
+    def cancel_all(self) -> int:
+        with self._cond:
+            ids = [
+                j.id for j in self._jobs.values() if j.state not in FINISHED_STATES
+            ]
+        return sum(1 for jid in ids if self.cancel(jid))
+
+    def get(self, job_id: int) -> Optional[DownloadJob]:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def set_workers(self, count: int) -> int:
+        """Resize the pool; surplus workers exit after their current job."""
+        count = max(1, min(MAX_WORKERS, int(count)))
+        with self._cond:
+            alive = [t for t in self._threads if t.is_alive()]
+            self._threads = alive
+            self._target_workers = count
+            running = len(alive) - self._retire
+            if running > count:
+                self._retire += running - count
+                self._cond.notify_all()
+            else:
+                if running < count and self._retire:
+                    revived = min(self._retire, count - running)
+                    self._retire -= revived
+                    running += revived
+                for _ in range(count - running):
+                    t = threading.Thread(
+                        target=self._worker,
+                        name=f"DownloadWorker-{len(self._threads) + 1}",
+                        daemon=True,
+                    )
+                    self._threads.append(t)
+                    t.start()
+        return count
+
+    @property
+    def workers(self) -> int:
+        return self._target_workers
+
+    def status(self) -> dict:
+        with self._cond:
+            jobs = list(self._jobs.values())
+        counts = {s: 0 for s in (QUEUED, RUNNING, DONE, FAILED, CANCELLED)}
+        for j in jobs:
+            counts[j.state] += 1
+        return {
+            "workers": self._target_workers,
+            "counts": counts,
+            "jobs": [j.to_dict() for j in jobs],
+        }
+
+    def shutdown(self, cancel: bool = True) -> None:
+        if cancel:
+            self.cancel_all()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed and not self._retire:
+                    self._cond.wait()
+                if self._closed or self._retire:
+                    if self._retire:
+                        self._retire -= 1
+                    return
+                job = self._pending.popleft()
+                job.state = RUNNING
+                job.started = time.time()
+            self._emit(job)
+
+            state = FAILED
+            try:
+                ok = self._runner(job)
+                if job.cancelled:
+                    state = CANCELLED
+                elif ok:
+                    state = DONE
+            except Exception as e:
+                job.error = str(e)
+                state = CANCELLED if job.cancelled else FAILED
+
+            with self._cond:
+                self._finish(job, state)
+            self._emit(job)
+
+    def _finish(self, job: DownloadJob, state: str) -> None:
+        """Record a terminal state and trim old finished jobs (lock held)."""
+        job.state = state
+        job.finished = time.time()
+        self._finished.append(job.id)
+        while len(self._finished) > self._history:
+            self._jobs.pop(self._finished.popleft(), None)
+
+    def _emit(self, job: DownloadJob) -> None:
+        if self._on_change is None:
+            return
+        try:
+            self._on_change(job, self)
+        except Exception as e:
+            print("[download-queue] on_change failed:", e)
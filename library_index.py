@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DB_NAME = "library.sqlite3"
+AUDIO_EXTS = (".m4a", ".mp3", ".aac", ".flac", ".ogg", ".wav")
+# Directory mtimes are coarse on some filesystems (FAT/exFAT: 2 s), so a
+# change that lands in the same tick as the last scan would be missed.
+MTIME_SLACK_S = 2.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    name        TEXT PRIMARY KEY,
+    path        TEXT NOT NULL,
+    video_id    TEXT,
+    title       TEXT,
+    size        INTEGER NOT NULL DEFAULT 0,
+    mtime       REAL NOT NULL DEFAULT 0,
+    duration    REAL,
+    cover_path  TEXT,
+    play_count  INTEGER NOT NULL DEFAULT 0,
+    last_played REAL
+);
+CREATE INDEX IF NOT EXISTS tracks_mtime ON tracks (mtime);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_COLUMNS = (
+    "name",
+    "path",
+    "video_id",
+    "title",
+    "size",
+    "mtime",
+    "duration",
+    "cover_path",
+    "play_count",
+    "last_played",
+)
+
+
+def _cover_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".jpg"
+
+
+class LibraryIndex:
+    """
+    Persistent index of the downloads folder, shared by the GUI and the
+    service (sqlite in WAL mode handles the two processes).
+    Usage:
+        lib = LibraryIndex(get_app_writable_dir("Downloaded/Played"))
+        lib.names()                       # newest first, rescans only if the
+                                          # folder changed since last time
+        lib.upsert_file(path, video_id="abc", title="Song", duration=201.0)
+        lib.remove(path)
+        lib.record_play("Song.m4a")
+    Rows are keyed by file basename, which is what playlists and the OSC
+    protocol use.
+    """
+
+    def __init__(self, folder: str, db_path: Optional[str] = None):
+        self.folder = folder
+        self.db_path = db_path or os.path.join(os.path.dirname(folder), DB_NAME)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5.0)
+        with contextlib.suppress(sqlite3.DatabaseError):
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    # ---------- scanning ----------
+    def refresh(self, force: bool = False) -> bool:
+        """Reconcile with the folder; returns True if a scan actually ran."""
+        try:
+            dir_mtime = os.stat(self.folder).st_mtime
+        except OSError:
+            return False
+        with self._lock:
+            last = self._meta("dir_mtime")
+            if (
+                not force
+                and last is not None
+                and float(last) == dir_mtime
+                and time.time() - dir_mtime > MTIME_SLACK_S
+            ):
+                return False
+            self._scan()
+            self._set_meta("dir_mtime", repr(dir_mtime))
+            self._db.commit()
+        return True
+
+    def _scan(self) -> None:
+        """One os.scandir pass; only new or changed files are written (lock held)."""
+        known = {
+            name: (size, mtime, cover)
+            for name, size, mtime, cover in self._db.execute(
+                "SELECT name, size, mtime, cover_path FROM tracks"
+            )
+        }
+        covers = set()
+        found = []
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                lower = entry.name.lower()
+                if lower.endswith(".jpg"):
+                    covers.add(os.path.splitext(entry.name)[0])
+                if not lower.endswith(AUDIO_EXTS):
+                    continue
+                with contextlib.suppress(OSError):
+                    st = entry.stat()
+                    found.append((entry.name, entry.path, st.st_size, st.st_mtime))
+        seen = {n for n, _, _, _ in found}
+        # A cover saved or deleted next to an unchanged track counts as a change.
+        changed = []
+        for n, p, size, mtime in found:
+            cover = _cover_path(p) if os.path.splitext(n)[0] in covers else None
+            if known.get(n) != (size, mtime, cover):
+                changed.append((n, p, size, mtime, cover))
+        self._db.executemany(
+            "INSERT INTO tracks (name, path, size, mtime, cover_path) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET "
+            "path = excluded.path, size = excluded.size, mtime = excluded.mtime, "
+            "cover_path = excluded.cover_path",
+            changed,
+        )
+        gone = [(n,) for n in known if n not in seen]
+        if gone:
+            self._db.executemany("DELETE FROM tracks WHERE name = ?", gone)
+
+    # ---------- queries ----------
+    def names(
+        self, exts: Iterable[str] = (".m4a",), order: str = "recent"
+    ) -> List[str]:
+        """Basenames filtered by extension; order is "recent" or "name"."""
+        self.refresh()
+        exts = tuple(e.lower() for e in exts)
+        sql = "SELECT name FROM tracks ORDER BY " + (
+            "mtime DESC" if order == "recent" else "name"
+        )
+        with self._lock:
+            rows = self._db.execute(sql).fetchall()
+        return [n for (n,) in rows if n.lower().endswith(exts)]
+
+    def get(self, name_or_path: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM tracks WHERE name = ?",
+                (os.path.basename(name_or_path),),
+            ).fetchone()
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    def play_stats(self) -> Dict[str, Tuple[int, Optional[float]]]:
+        """{name: (play_count, last_played)} for tracks played at least once."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT name, play_count, last_played FROM tracks WHERE play_count > 0"
+            ).fetchall()
+        return {name: (count, last) for name, count, last in rows}
+
+    # ---------- updates ----------
+    def upsert_file(self, path: str, **meta) -> None:
+        """Record a file that was just written (download finished)."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        meta = {k: v for k, v in meta.items() if k in _COLUMNS and v is not None}
+        if "cover_path" not in meta and os.path.exists(_cover_path(path)):
+            meta["cover_path"] = _cover_path(path)
+        row = dict(
+            meta,
+            name=os.path.basename(path),
+            path=path,
+            size=st.st_size,
+            mtime=st.st_mtime,
+        )
+        cols = list(row)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in cols if c != "name")
+        with self._lock:
+            self._db.execute(
+                f"INSERT INTO tracks ({', '.join(cols)}) "
+                f"VALUES ({', '.join('?' for _ in cols)}) "
+                f"ON CONFLICT(name) DO UPDATE SET {updates}",
+                [row[c] for c in cols],
+            )
+            self._db.commit()
+
+    def remove(self, name_or_path: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM tracks WHERE name = ?",
+                (os.path.basename(name_or_path),),
+            )
+            self._db.commit()
+
+    def record_play(self, name_or_path: str, when: Optional[float] = None) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE tracks SET play_count = play_count + 1, last_played = ? "
+                "WHERE name = ?",
+                (time.time() if when is None else when, os.path.basename(name_or_path)),
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock, contextlib.suppress(sqlite3.Error):
+            self._db.close()
+
+    # ---------- helpers ----------
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._db.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+
+def diff_rows(old: List[dict], new: List[dict]) -> Optional[tuple]:
+    """
+    Smallest single slice edit that turns `old` into `new`:
+        ("update", index, rows)          same length; covers edits and moves
+        ("insert", index, rows)
+        ("remove", index, count)
+        ("replace", index, count, rows)
+    Returns None when nothing changed. Rows compare by value, so only the
+    span between the common prefix and suffix is ever touched.
+    """
+    n, m = len(old), len(new)
+    lim = min(n, m)
+    p = 0
+    while p < lim and old[p] == new[p]:
+        p += 1
+    if p == n == m:
+        return None
+    s = 0
+    while s < lim - p and old[n - 1 - s] == new[m - 1 - s]:
+        s += 1
+    count, rows = n - s - p, new[p : m - s]
+    if not count:
+        return ("insert", p, rows)
+    if not rows:
+        return ("remove", p, count)
+    if count == len(rows):
+        return ("update", p, rows)
+    return ("replace", p, count, rows)
+
+
+def apply_rows(data, op: Optional[tuple]) -> None:
+    """
+    Apply a diff_rows op to `data` in place (a list or a RecycleView's
+    ObservableList). Each op is one mutation, so RecycleView sees a single
+    change event: modified for updates, removed for deletes, appended for
+    inserts at the end, and a refresh for anything else.
+    """
+    if not op:
+        return
+    kind, i = op[0], op[1]
+    if kind == "remove":
+        del data[i : i + op[2]]
+    elif kind == "insert" and i == len(data):
+        data.extend(op[2])
+    elif kind == "insert":
+        data[i:i] = op[2]
+    elif kind == "update":
+        data[i : i + len(op[2])] = op[2]
+    elif kind == "replace":
+        data[i : i + op[2]] = op[3]
+    else:
+        raise ValueError(f"unknown row op: {kind!r}")
+
+
+class ListModel:
+    """
+    Keeps a RecycleView's `data` in step with a list of row dicts by
+    applying only the changed span, in place, and keeps the first visible
+    row where it was when rows above it come or go.
+    Usage:
+        model = ListModel(self.ids.rv)
+        model.set_rows([{"text": name} for name in names])
+    """
+
+    def __init__(self, rv):
+        self.rv = rv
+
+    @property
+    def rows(self) -> List[dict]:
+        return self.rv.data
+
+    def set_rows(self, rows: List[dict]) -> Optional[tuple]:
+        """Bring the view to `rows`; returns the op applied (None if unchanged)."""
+        data = self.rv.data
+        op = diff_rows(data, rows)
+        if op is None:
+            return None
+        before = len(data)
+        anchor = self._scroll_anchor(op[1], before)
+        apply_rows(data, op)
+        if anchor is not None and len(data) != before:
+            self._restore_scroll(anchor, len(data) - before)
+        return op
+
+    def _scroll_anchor(self, index: int, count: int) -> Optional[tuple]:
+        """(pixels scrolled from the top, row height) if the edit is above them."""
+        rv = self.rv
+        try:
+            content = rv.layout_manager.height
+        except AttributeError:
+            return None
+        scrollable = content - rv.height
+        if count <= 0 or scrollable <= 0:
+            return None
+        offset = (1.0 - rv.scroll_y) * scrollable
+        row_h = content / count
+        if index * row_h >= offset:
+            return None
+        return offset, row_h
+
+    def _restore_scroll(self, anchor: tuple, delta_rows: int) -> None:
+        from kivy.clock import Clock
+
+        offset, row_h = anchor
+        offset = max(0.0, offset + delta_rows * row_h)
+
+        def _apply(*_):
+            rv = self.rv
+            scrollable = rv.layout_manager.height - rv.height
+            if scrollable > 0:
+                rv.scroll_y = 1.0 - min(offset, scrollable) / scrollable
+
+        # After RecycleView has laid out the new rows (its refresh runs
+        # before the next frame).
+        Clock.schedule_once(_apply, 0)
+
+
+class PickModel:
+    """
+    Checkable, filterable list of names behind a RecycleView picker. The
+    selection lives here rather than in row widgets, which RecycleView
+    recycles. The lowercase search index is built on the first keystroke,
+    and a query that extends the previous one only rescans its matches.
+    Usage:
+        model = PickModel(names, label=lambda n: n[:-4])
+        model.set_filter("beat")
+        rv.data = model.rows()
+        model.toggle(name); model.selected_names()
+    """
+
+    def __init__(self, names: List[str], label=None):
+        self.names = list(names)
+        self._label = label or str
+        self._lower: Optional[List[str]] = None
+        self.query = ""
+        self.visible = range(len(self.names))
+        self.selected: set = set()
+
+    def set_filter(self, text: str):
+        """Restrict the visible names to those containing `text` (any case)."""
+        q = (text or "").strip().lower()
+        if q == self.query:
+            return self.visible
+        if not q:
+            self.visible = range(len(self.names))
+        else:
+            if self._lower is None:
+                self._lower = [n.lower() for n in self.names]
+            lower = self._lower
+            narrowing = self.query and q.startswith(self.query)
+            pool = self.visible if narrowing else range(len(lower))
+            self.visible = [i for i in pool if q in lower[i]]
+        self.query = q
+        return self.visible
+
+    def row(self, i: int) -> dict:
+        name = self.names[i]
+        return {
+            "text": self._label(name),
+            "fname": name,
+            "selected": name in self.selected,
+        }
+
+    def rows(self) -> List[dict]:
+        return [self.row(i) for i in self.visible]
+
+    def toggle(self, name: str) -> bool:
+        """Flip `name`; returns its new state."""
+        if name in self.selected:
+            self.selected.discard(name)
+            return False
+        self.selected.add(name)
+        return True
+
+    def select_visible(self) -> None:
+        self.selected.update(self.names[i] for i in self.visible)
+
+    def selected_names(self) -> List[str]:
+        """Selection in list order."""
+        return [n for n in self.names if n in self.selected]
+
+
+class ReorderModel:
+    """
+    In-memory permutation behind a reorder editor: position i shows the
+    item that was at order[i] when the editor opened. A move rewrites only
+    the rows between its two ends, and the whole edit is committed once:
+        pm.apply_permutation(pid, model.order)
+    """
+
+    def __init__(self, titles: List[str]):
+        self.titles = list(titles)
+        self.order = list(range(len(self.titles)))
+        # Original index of the highlighted item (jump-to source), or None.
+        self.selected: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    @property
+    def changed(self) -> bool:
+        return any(i != k for i, k in enumerate(self.order))
+
+    def row(self, pos: int) -> dict:
+        k = self.order[pos]
+        return {
+            "text": self.titles[k] or "(untitled)",
+            "selected": k == self.selected,
+        }
+
+    def rows(self) -> List[dict]:
+        return [self.row(i) for i in range(len(self.order))]
+
+    def _span(self, lo: int, hi: int) -> tuple:
+        return ("update", lo, [self.row(i) for i in range(lo, hi + 1)])
+
+    def move(self, src: int, dst: int) -> Optional[tuple]:
+        """Move the item at `src` to `dst`; returns the row op to apply."""
+        n = len(self.order)
+        dst = max(0, min(n - 1, int(dst)))
+        if not 0 <= src < n or src == dst:
+            return None
+        self.order.insert(dst, self.order.pop(src))
+        return self._span(min(src, dst), max(src, dst))
+
+    def select(self, pos: int) -> List[tuple]:
+        """Highlight the item at `pos` (again to clear); returns row ops."""
+        old = self.position(self.selected)
+        k = self.order[pos]
+        self.selected = None if k == self.selected else k
+        return [self._span(p, p) for p in {old, pos} if p is not None]
+
+    def position(self, original: Optional[int]) -> Optional[int]:
+        if original is None:
+            return None
+        return self.order.index(original)
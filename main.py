@@ -53,7 +53,7 @@ from kivy.properties import (
 from kivy.resources import resource_add_path, resource_find
 from kivy.storage.jsonstore import JsonStore
 from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.scrollview import ScrollView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
 from kivy.utils import platform
 from kivymd.app import MDApp
 from kivymd.toast import toast
@@ -68,7 +68,18 @@ from oscpy.client import OSCClient
 from oscpy.server import OSCThreadServer
 from youtubesearchpython import VideosSearch
 
+from library_index import LibraryIndex
+from list_model import ListModel, PickModel, ReorderModel, apply_rows
 from playlist_manager import PlaylistManager
+from playlist_transfer import PlaylistSender, diff_playlist, encode_playlist
+
+SLIDER_TICK = 1 / 15
+# Shuffle button cycle: mode -> (message for the service, icon, red).
+SHUFFLE_MODES = {
+    "off": ("False", "shuffle", 0),
+    "on": ("True", "shuffle", 1),
+    "smart": ("smart", "shuffle-variant", 1),
+}
 
 
 def default_cover_path():
@@ -88,8 +99,69 @@ class RecycleViewRow(BoxLayout):
     text = StringProperty()
 
 
-class PlaylistTrackRow(MDBoxLayout):
+class ImportPickRow(RecycleDataViewBehavior, MDBoxLayout):
+    text = StringProperty("")
+    fname = StringProperty("")
+    selected = BooleanProperty(False)
+    index = NumericProperty(0)
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.index = index
+        return super().refresh_view_attrs(rv, index, data)
+
+
+class ReorderRow(RecycleDataViewBehavior, MDBoxLayout):
     text = StringProperty("")
+    selected = BooleanProperty(False)
+    index = NumericProperty(0)
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.index = index
+        return super().refresh_view_attrs(rv, index, data)
+
+    def on_touch_down(self, touch):
+        handle = self.ids.get("handle")
+        if handle and handle.collide_point(*touch.pos):
+            touch.grab(self)
+            touch.ud["reorder_pos"] = int(self.index)
+            return True
+        if self.collide_point(*touch.pos):
+            touch.ud["reorder_tap"] = int(self.index)
+            return True
+        return super().on_touch_down(touch)
+
+    def on_touch_move(self, touch):
+        if touch.grab_current is self:
+            # Live reorder: each step only rewrites the rows it passes over.
+            root = MDApp.get_running_app().root
+            with contextlib.suppress(Exception):
+                dst = root._reorder_index_at(touch)
+                touch.ud["reorder_pos"] = root._reorder_move(
+                    touch.ud["reorder_pos"], dst
+                )
+            return True
+        return super().on_touch_move(touch)
+
+    def on_touch_up(self, touch):
+        if touch.grab_current is self:
+            touch.ungrab(self)
+            return True
+        if touch.ud.get("reorder_tap") == self.index and self.collide_point(*touch.pos):
+            with contextlib.suppress(Exception):
+                MDApp.get_running_app().root._reorder_select(int(self.index))
+            return True
+        return super().on_touch_up(touch)
+
+
+class PlaylistTrackRow(RecycleDataViewBehavior, MDBoxLayout):
+    text = StringProperty("")
+    index = NumericProperty(0)
+
+    def refresh_view_attrs(self, rv, index, data):
+        # The position comes from the view slot rather than the row dict, so
+        # removing or moving one track leaves the rows after it unchanged.
+        self.index = index
+        return super().refresh_view_attrs(rv, index, data)
 
     def on_touch_down(self, touch):
         if "button" in touch.profile and touch.button != "left":
@@ -177,6 +249,7 @@ class MySlider(MDSlider):
     def set_gui_to_play_from_touchup(self):
         app = MDApp.get_running_app()
         root = app.root
+        root._reanchor()
         root.paused = False
         with contextlib.suppress(Exception):
             GUILayout.playing_song = True
@@ -196,6 +269,10 @@ class GUILayout(MDFloatLayout, MDGridLayout):
     image_path = default_cover_path()
     set_local_download = get_app_writable_dir("Downloaded/Played")
     os.makedirs(set_local_download, exist_ok=True)
+    library = LibraryIndex(set_local_download)
+    # Last playlist the service acknowledged (or was sent) and its version.
+    _synced_playlist = None
+    _synced_version = 0
 
     def _start_music_service_user_initiated(self):
         if utils.get_platform() != "android":
@@ -359,7 +436,7 @@ class GUILayout(MDFloatLayout, MDGridLayout):
         self.paused = False
         GUILayout.playing_song = True
         GUILayout.get_update_slider = Clock.schedule_interval(
-            GUILayout.wait_update_slider, 1
+            GUILayout.wait_update_slider, SLIDER_TICK
         )
         app = MDApp.get_running_app()
         app.root.ids.play_btt.disabled = True
@@ -389,7 +466,7 @@ class GUILayout(MDFloatLayout, MDGridLayout):
         elif message_type == "stop":
             GUILayout.client.send_message("/stop", message)
         elif message_type == "playlist":
-            GUILayout.client.send_message("/playlist", [message])
+            GUILayout.playlist_sender.send(message.encode("utf-8"))
         elif message_type == "update_load_fs":
             GUILayout.client.send_message("/update_load_fs", message)
         elif message_type == "previous":
@@ -406,6 +483,12 @@ class GUILayout(MDFloatLayout, MDGridLayout):
             GUILayout.client.send_message("/downloadyt", [message])
         elif message_type == "iampaused":
             GUILayout.client.send_message("/iampaused", message)
+        elif message_type == "download_cancel":
+            GUILayout.client.send_message("/download_cancel", message)
+        elif message_type == "prefetch":
+            GUILayout.client.send_message("/prefetch", [message])
+        elif message_type == "gapless":
+            GUILayout.client.send_message("/gapless", message)
 
     def _active_playlist_song_names(self):
         names = []
@@ -426,13 +509,55 @@ class GUILayout(MDFloatLayout, MDGridLayout):
 
     def _send_active_playlist_to_service(self):
         songs, _ = self._active_playlist_song_names()
-        payload = json.dumps(songs)
-        GUILayout.send("playlist", payload)
+        GUILayout.sync_playlist(songs)
         if len(songs) >= 2 and getattr(GUILayout, "playing_song", False):
             self.set_playlist(True, False, 1)
         elif getattr(GUILayout, "playing_song", False):
             self.set_playlist(False, True, 0)
 
+    @staticmethod
+    def sync_playlist(names, full=False):
+        """
+        Bring the service's playlist up to `names`. A single insert/remove/
+        move/replace goes out as one /playlist_op tagged with the version it
+        applies to; anything else (or a resync) is a full chunked transfer.
+        """
+        names = [str(n) for n in names]
+        prev = GUILayout._synced_playlist
+        op = None if full or prev is None else diff_playlist(prev, names)
+        sender = GUILayout.playlist_sender
+        if op is None:
+            version = sender.send(encode_playlist(names))
+        else:
+            # An empty op costs a few bytes and lets a restarted service
+            # notice it is out of date.
+            version = sender.next_id() if op else GUILayout._synced_version
+            GUILayout.client.send_message(
+                "/playlist_op",
+                [
+                    GUILayout._synced_version,
+                    version,
+                    json.dumps(op, ensure_ascii=False) if op else "",
+                ],
+            )
+        GUILayout._synced_playlist = names
+        GUILayout._synced_version = version
+
+    @mainthread
+    def on_playlist_resync(self, *val):
+        if GUILayout._synced_playlist is not None:
+            GUILayout.sync_playlist(GUILayout._synced_playlist, full=True)
+
+    def on_playlist_ack(self, *val):
+        with contextlib.suppress(ValueError):
+            GUILayout.playlist_sender.on_ack(int("".join(val)))
+
+    def on_playlist_nack(self, *val):
+        """"<tid>:<seq,seq,...>"; an empty seq list asks for a full resend."""
+        tid, _, missing = "".join(val).partition(":")
+        with contextlib.suppress(ValueError):
+            GUILayout.playlist_sender.on_nack(int(tid), missing)
+
     def _update_active_playlist_badge(self):
         with contextlib.suppress(Exception):
             apm = getattr(self, "_playlist_manager", None)
@@ -456,18 +581,42 @@ class GUILayout(MDFloatLayout, MDGridLayout):
             )
         except Exception:
             storage = os.path.join(os.getcwd(), "playlists.json")
-        self._playlist_manager = PlaylistManager(storage_path=storage)
+        shard_format = "json"
+        with contextlib.suppress(Exception):
+            if self.store and self.store.exists("playlist_format"):
+                shard_format = str(self.store.get("playlist_format")["value"])
+        # view name -> version key it was last rendered at
+        self._view_versions = {}
+        self._rows_model = ListModel(self.ids.rv)
+        self._tracks_model = None
+        self._playlist_views_trigger = Clock.create_trigger(
+            self._refresh_playlist_views
+        )
+        self._playlist_manager = PlaylistManager(
+            storage_path=storage, shard_format=shard_format, async_writes=True
+        )
+        self._playlist_manager.subscribe(self._on_playlist_event)
+        Clock.schedule_once(lambda dt: self._send_playback_prefs(), 2)
         with contextlib.suppress(Exception):
             self.ids.imageView.source = default_cover_path()
         try:
             self.library_tab = Factory.LibraryTab()
             self.ids.bottom_nav.add_widget(self.library_tab)
+            self._tracks_model = ListModel(self.library_tab.ids.rv_tracks)
         except Exception as e:
             print("Failed to attach Library tab:", e)
             self.library_tab = None
             return
         self.refresh_playlist()
 
+    def _send_playback_prefs(self):
+        """Push persisted playback options (app_state.json) to the service."""
+        gapless = False
+        with contextlib.suppress(Exception):
+            if self.store and self.store.exists("gapless"):
+                gapless = bool(self.store.get("gapless")["value"])
+        GUILayout.send("gapless", "True" if gapless else "False")
+
     @mainthread
     def _controls(self, action: str, *args):
         if action != "enable_play":
@@ -482,9 +631,33 @@ class GUILayout(MDFloatLayout, MDGridLayout):
         ids.song_pos_lbl.opacity = 1
         ids.song_max_lbl.opacity = 1
 
+    def _view_is_current(self, view: str, key) -> bool:
+        """True when `view` already shows state `key`; otherwise records `key`."""
+        if self._view_versions.get(view) == key:
+            return True
+        self._view_versions[view] = key
+        return False
+
+    def _on_playlist_event(self, event):
+        """PlaylistManager observer: one coalesced view refresh per frame."""
+        self._playlist_views_trigger()
+
+    def _refresh_playlist_views(self, *args):
+        self.refresh_playlist()
+        if not self.screen2_is_downloads:
+            with contextlib.suppress(Exception):
+                ap = self._playlist_manager.active_playlist()
+                if ap:
+                    self._refresh_playlist_rows(ap)
+
     def _playlist_refresh_sidebar(self):
         if not getattr(self, "library_tab", None):
             return
+        pm = self._playlist_manager
+        if self._view_is_current(
+            "sidebar", (pm.playlists_version, self.screen2_is_downloads)
+        ):
+            return
         data = [
             {"pid": p.id, "name": p.name}
             for p in self._playlist_manager.list_playlists()
@@ -499,7 +672,6 @@ class GUILayout(MDFloatLayout, MDGridLayout):
     def _playlist_on_select(self, pid: str):
         self.screen2_is_downloads = False
         self._playlist_manager.set_active(pid)
-        self.refresh_playlist()
         self._send_active_playlist_to_service()
         self.second_screen2()
 
@@ -554,8 +726,6 @@ class GUILayout(MDFloatLayout, MDGridLayout):
         name = (name or "").strip() or "Untitled"
         pid = self._playlist_manager.create_playlist(name)
         self._playlist_manager.set_active(pid)
-        self._playlist_refresh_sidebar()
-        self._playlist_refresh_tracks()
         with contextlib.suppress(Exception):
             toast(f'Created "{name}"')
         self.set_active_playlist_send_to_service()
@@ -564,7 +734,6 @@ class GUILayout(MDFloatLayout, MDGridLayout):
         self._playlist_manager.rename_playlist(
             pid, (new_name or "").strip() or "Untitled"
         )
-        self._playlist_refresh_sidebar()
         with contextlib.suppress(Exception):
             toast("Renamed")
         self._update_active_playlist_badge()
@@ -578,17 +747,9 @@ class GUILayout(MDFloatLayout, MDGridLayout):
         except Exception:
             was_active = False
         self._playlist_manager.delete_playlist(pid)
-        self._playlist_refresh_sidebar()
         if was_active:
             self.second_screen()
             self.screen2_is_downloads = True
-
-            with contextlib.suppress(Exception):
-                if getattr(self, "library_tab", None):
-                    self.library_tab.ids.active_playlist_name.text = "Tracks"
-                    self.library_tab.ids.rv_tracks.data = []
-        else:
-            self._playlist_refresh_tracks()
         with contextlib.suppress(Exception):
             toast("Deleted")
         self._update_active_playlist_badge()
@@ -604,22 +765,26 @@ class GUILayout(MDFloatLayout, MDGridLayout):
             return
 
         ap = None
+        pm = self._playlist_manager
         with contextlib.suppress(Exception):
-            ap = self._playlist_manager.active_playlist()
+            ap = pm.active_playlist()
+        pid = ap.id if ap else None
+        if self._view_is_current(
+            "tracks", (pid, pm.tracks_version(pid), pm.playlists_version)
+        ):
+            return
         if not ap:
             self.library_tab.ids.active_playlist_name.text = "Tracks"
-            self.library_tab.ids.rv_tracks.data = []
+            self._tracks_model.set_rows([])
             return
         self.library_tab.ids.active_playlist_name.text = ap.name or "Playlist"
-        rows = [
-            {"text": t.title, "index": idx} for idx, t in enumerate(ap.tracks or [])
-        ]
-        self.library_tab.ids.rv_tracks.data = rows
+        self._tracks_model.set_rows([{"text": t.title} for t in ap.tracks or []])
 
     def _playlist_import_selective(self):
         """
-        Open a responsive dialog listing .m4a files in Downloads with checkboxes
-        so the user can choose which ones to add to the active playlist.
+        Open a dialog listing the audio files in Downloads so the user can
+        choose which ones to add to the active playlist. Rows are recycled
+        (only the visible ones exist as widgets); ticks live in a PickModel.
         """
         active = (
             getattr(self, "_playlist_manager", None).active_playlist()
@@ -632,11 +797,7 @@ class GUILayout(MDFloatLayout, MDGridLayout):
             return
 
         try:
-            names = [
-                fn
-                for fn in os.listdir(self.set_local_download)
-                if fn.lower().endswith(".m4a")
-            ]
+            names = self.library.names()
         except Exception:
             names = []
 
@@ -646,84 +807,31 @@ class GUILayout(MDFloatLayout, MDGridLayout):
             return
 
         visible_h = max(dp(180), min(Window.height * 0.60, dp(420)))
-        small_screen = Window.height < dp(640)
-        row_h = dp(36) if small_screen else dp(40)
-
-        container = MDBoxLayout(
-            orientation="vertical",
-            spacing=dp(8),
-            padding=[dp(8), dp(8), dp(8), dp(4)],
-            adaptive_height=True,
-        )
-        filter_box = MDTextField(
-            hint_text="Filter by name…",
-            helper_text="Type to filter the list",
-            helper_text_mode="on_focus",
-            size_hint_x=1,
-        )
-        container.add_widget(filter_box)
-
-        scroll = ScrollView(size_hint=(1, None), height=visible_h)
-        grid = MDGridLayout(
-            cols=1, adaptive_height=True, spacing=dp(6), size_hint_y=None
-        )
-        grid.bind(minimum_height=grid.setter("height"))
-
-        try:
-            full_list = [os.path.join(self.set_local_download, n) for n in names]
-            names_sorted = [
-                os.path.basename(i)
-                for i in sorted(full_list, key=os.path.getmtime, reverse=True)
-            ]
-        except Exception:
-            names_sorted = sorted(names)
-
-        self._import_items = []
-        self._all_rows = []
-
-        for fn in names_sorted:
-            row = MDBoxLayout(
-                orientation="horizontal",
-                size_hint_y=None,
-                height=row_h,
-                spacing=dp(10),
-                padding=[dp(2), 0, dp(2), 0],
-            )
-            cb = Factory.MDCheckbox(size_hint=(None, None), size=(dp(24), dp(24)))
-            lbl = Factory.MDLabel(
-                text=fn[:-4], halign="left", shorten=True, shorten_from="right"
-            )
-            row.add_widget(cb)
-            row.add_widget(lbl)
-            grid.add_widget(row)
-            self._import_items.append((cb, fn))
-            self._all_rows.append((row, cb, fn, lbl))
-        scroll.add_widget(grid)
-        container.add_widget(scroll)
+        picker = Factory.ImportPicker()
+        picker.ids.rv.height = visible_h
+        self._import_model = PickModel(names, label=lambda fn: fn[:-4])
+        self._import_rv = picker.ids.rv
+        picker.ids.rv.data = self._import_model.rows()
+        rows = ListModel(picker.ids.rv)
 
         def _apply_filter(q_text):
-            q = (q_text or "").strip().lower()
-            for row, _cb, fn, lbl in self._all_rows:
-                visible = (q in fn.lower()) or (q in lbl.text.lower())
-                row.opacity = 1 if visible else 0
-                row.height = row_h if visible else 0
-                row.disabled = not visible
+            self._import_model.set_filter(q_text)
+            rows.set_rows(self._import_model.rows())
+
+        def _select_all(*_):
+            self._import_model.select_visible()
+            rows.set_rows(self._import_model.rows())
 
-        filter_box.bind(text=lambda _w, v: _apply_filter(v))
+        picker.ids.filter_box.bind(text=lambda _w, v: _apply_filter(v))
 
         self._import_dialog = MDDialog(
             title="Select tracks to import",
             type="custom",
-            content_cls=container,
+            content_cls=picker,
             size_hint=(None, None),
             width=min(Window.width * 0.90, dp(560)),
             buttons=[
-                MDFlatButton(
-                    text="Select All",
-                    on_release=lambda *_: [
-                        setattr(cb, "active", True) for cb, _ in self._import_items
-                    ],
-                ),
+                MDFlatButton(text="Select All", on_release=_select_all),
                 MDFlatButton(
                     text="Add Selected",
                     on_release=lambda *_: self._confirm_import_selected(),
@@ -735,6 +843,13 @@ class GUILayout(MDFloatLayout, MDGridLayout):
         )
         self._import_dialog.open()
 
+    def _import_toggle(self, index: int):
+        """Checkbox tap in the import picker: flip the model, then that one row."""
+        with contextlib.suppress(Exception):
+            data = self._import_rv.data
+            row = data[index]
+            data[index] = dict(row, selected=self._import_model.toggle(row["fname"]))
+
     def _confirm_import_selected(self):
         """Collect selected files and add them to the active playlist; refresh UI and service."""
         apm = getattr(self, "_playlist_manager", None)
@@ -745,11 +860,7 @@ class GUILayout(MDFloatLayout, MDGridLayout):
             return
 
         try:
-            selected = [
-                fn
-                for cb, fn in getattr(self, "_import_items", [])
-                if getattr(cb, "active", False)
-            ]
+            selected = self._import_model.selected_names()
         except Exception:
             selected = []
 
@@ -766,8 +877,6 @@ class GUILayout(MDFloatLayout, MDGridLayout):
         added = max(0, len(apm.active_playlist().tracks) - before) if apm else 0
         skipped = max(0, len(paths) - added)
 
-        with contextlib.suppress(Exception):
-            self._playlist_refresh_tracks()
         with contextlib.suppress(Exception):
             self._send_active_playlist_to_service()
         with contextlib.suppress(Exception):
@@ -787,7 +896,6 @@ class GUILayout(MDFloatLayout, MDGridLayout):
         if not active:
             return
         self._playlist_manager.remove_track(active.id, index)
-        self._playlist_refresh_tracks()
         with contextlib.suppress(Exception):
             toast("Removed")
         self._send_active_playlist_to_service()
@@ -805,7 +913,6 @@ class GUILayout(MDFloatLayout, MDGridLayout):
                 return
             apm.move_track(ap.id, index, to_idx)
             with contextlib.suppress(Exception):
-                self._playlist_refresh_tracks()
                 self._send_active_playlist_to_service()
             self.second_screen2()
 
@@ -821,7 +928,6 @@ class GUILayout(MDFloatLayout, MDGridLayout):
                 return
             apm.move_track(ap.id, index, to_idx)
             with contextlib.suppress(Exception):
-                self._playlist_refresh_tracks()
                 self._send_active_playlist_to_service()
             self.second_screen2()
 
@@ -873,7 +979,7 @@ class GUILayout(MDFloatLayout, MDGridLayout):
         self.file_loaded = False
         self.playlist_mode = False
         self.repeat_selected = False
-        self.shuffle_selected = False
+        self.shuffle_mode = "off"
         if utils.get_platform() == "android":
             self._start_music_service_user_initiated()
         else:
@@ -900,14 +1006,22 @@ class GUILayout(MDFloatLayout, MDGridLayout):
         server.bind("/are_we", self.check_are_we_playing)
         server.bind("/song_not_found", self.on_song_not_found)
         server.bind("/controls", self._controls)
+        server.bind("/download_status", self.on_download_status)
+        server.bind("/playlist_ack", self.on_playlist_ack)
+        server.bind("/playlist_nack", self.on_playlist_nack)
+        server.bind("/playlist_resync", self.on_playlist_resync)
         GUILayout.client = OSCClient("localhost", 3000, encoding="utf8")
+        GUILayout.playlist_sender = PlaylistSender(
+            lambda address, values: GUILayout.client.send_message(address, values)
+        )
         GUILayout.song_local = [0]
         GUILayout.slider = None
         GUILayout.playing_song = False
         GUILayout.check_are_paused = "None"
+        GUILayout.download_jobs = {}
         self.loadingosctimer = Clock.schedule_interval(self.waitingforoscload, 1)
         GUILayout.get_update_slider = Clock.schedule_interval(
-            self.wait_update_slider, 1
+            self.wait_update_slider, SLIDER_TICK
         )
 
     def _has_active_playlist(self) -> bool:
@@ -927,22 +1041,34 @@ class GUILayout(MDFloatLayout, MDGridLayout):
     def second_screen(self):
         self._playlist_manager.clear_active()
         self.screen2_is_downloads = True
-        songs = self.get_play_list()
-        uniq = list(dict.fromkeys(songs))
-        self.ids.rv.data = [{"text": str(x[:-4])} for x in uniq]
+        self._refresh_downloads_rows()
         with contextlib.suppress(Exception):
             self.ids.play_list.text = "Current Playlist: Downloaded"
         with contextlib.suppress(Exception):
             self._update_active_playlist_badge()
             self._send_active_playlist_to_service()
 
+    def _refresh_downloads_rows(self):
+        songs = self.get_play_list()
+        uniq = list(dict.fromkeys(songs))
+        self._rows_model.set_rows([{"text": str(x[:-4])} for x in uniq])
+        self._view_versions.pop("rows", None)
+
+    def _refresh_playlist_rows(self, ap):
+        """Page 2 rows for playlist `ap`; skipped when already current."""
+        pm = self._playlist_manager
+        if self._view_is_current("rows", (ap.id, pm.tracks_version(ap.id))):
+            return
+        songs = [os.path.basename(t.path) for t in ap.tracks if t.path]
+        uniq = list(dict.fromkeys(songs))
+        self._rows_model.set_rows([{"text": str(x[:-4])} for x in uniq])
+
     def change_screen_item(self, nav_item):
         if not getattr(self, "screen2_is_downloads", False):
             self.second_screen2()
         self.ids.bottom_nav.switch_tab(nav_item)
 
     def second_screen2(self):
-        songs, pname = self._active_playlist_song_names()
         try:
             apm = getattr(self, "_playlist_manager", None)
             ap = apm.active_playlist() if apm else None
@@ -953,8 +1079,7 @@ class GUILayout(MDFloatLayout, MDGridLayout):
             self.second_screen()
             return
 
-        uniq = list(dict.fromkeys(songs))
-        self.ids.rv.data = [{"text": str(x[:-4])} for x in uniq]
+        self._refresh_playlist_rows(ap)
         with contextlib.suppress(Exception):
             self.ids.play_list.text = f"Current Playlist: {ap.name or 'Playlist'}"
         self.screen2_is_downloads = False
@@ -1032,13 +1157,17 @@ class GUILayout(MDFloatLayout, MDGridLayout):
                 if p and os.path.exists(p):
                     with contextlib.suppress(Exception):
                         os.remove(p)
+            with contextlib.suppress(Exception):
+                self.library.remove(track_path)
 
             pm = getattr(self, "_playlist_manager", None)
             ap = pm.active_playlist() if pm else None
             if ap:
                 target = os.path.normpath(os.path.realpath(track_path))
-                remove_index = None
-                for idx, t in enumerate(list(ap.tracks) if ap.tracks else []):
+                remove_index = pm.index_of(ap.id, track_path)
+                for idx, t in enumerate(
+                    list(ap.tracks) if ap.tracks and remove_index is None else []
+                ):
                     p = getattr(t, "path", None) or (
                         t.get("path") if isinstance(t, dict) else None
                     )
@@ -1052,14 +1181,8 @@ class GUILayout(MDFloatLayout, MDGridLayout):
                     with contextlib.suppress(Exception):
                         pm.remove_track(ap.id, remove_index)
 
-            with contextlib.suppress(Exception):
-                self._playlist_refresh_tracks()
-                if getattr(self, "library_tab", None):
-                    self.library_tab.ids.rv_tracks.refresh_from_data()
-
             with contextlib.suppress(Exception):
                 self.second_screen2()
-                self.ids.rv.refresh_from_data()
 
             if dlg := getattr(self, "dialog", None):
                 with contextlib.suppress(Exception):
@@ -1075,7 +1198,7 @@ class GUILayout(MDFloatLayout, MDGridLayout):
         try:
             if getattr(self, "screen2_is_downloads", False):
                 songs = self.get_play_list() or []
-                GUILayout.send("playlist", json.dumps(songs))
+                GUILayout.sync_playlist(songs)
             else:
                 self._send_active_playlist_to_service()
         except Exception:
@@ -1173,7 +1296,7 @@ class GUILayout(MDFloatLayout, MDGridLayout):
                 size_hint_y=0.1,
                 opacity=0,
                 disabled=True,
-                step=1,
+                step=0,
             )
         MDApp.get_running_app().root.ids.screen_1.add_widget(GUILayout.slider)
         MDApp.get_running_app().root.ids.play_btt.opacity = 0
@@ -1187,11 +1310,8 @@ class GUILayout(MDFloatLayout, MDGridLayout):
         MDApp.get_running_app().root.ids.previous_btt.opacity = 1
 
     def get_play_list(self):
-        name_list = os.listdir(self.set_local_download)
-        full_list = [os.path.join(self.set_local_download, i) for i in name_list]
-        time_sorted_list = sorted(full_list, key=os.path.getmtime)
-        time_sorted_list.reverse()
-        return [os.path.basename(i) for i in time_sorted_list if i.endswith("m4a")]
+        """Downloaded .m4a names, newest first (served from the library index)."""
+        return self.library.names()
 
     def new_search(self):
         self._start_music_service_user_initiated()
@@ -1239,7 +1359,7 @@ class GUILayout(MDFloatLayout, MDGridLayout):
                 size_hint_y=0.1,
                 opacity=0,
                 disabled=True,
-                step=1,
+                step=0,
             )
             MDApp.get_running_app().root.ids.screen_1.add_widget(GUILayout.slider)
         if self.results_loaded is False:
@@ -1305,8 +1425,27 @@ class GUILayout(MDFloatLayout, MDGridLayout):
         if maybe == "nope":
             self.error_reset("download")
         elif maybe == "yep":
+            if self.filetoplay and not os.path.isfile(self.filetoplay):
+                return
             self.sync_playlist_set_load()
 
+    @mainthread
+    def on_download_status(self, *val):
+        """Track service download-queue transitions (see /download_status)."""
+        try:
+            info = json.loads("".join(val))
+        except Exception:
+            return
+        if info.get("state") in ("done", "failed", "cancelled"):
+            GUILayout.download_jobs.pop(info.get("id"), None)
+        else:
+            GUILayout.download_jobs[info.get("id")] = info
+        if info.get("state") == "done" and self.screen2_is_downloads:
+            with contextlib.suppress(Exception):
+                self._refresh_downloads_rows()
+        elif info.get("state") == "failed" and info.get("error"):
+            print("[ui] download failed:", info.get("title"), info.get("error"))
+
     @mainthread
     def update_info(self, *val):
         msg = "".join(val)
@@ -1332,6 +1471,25 @@ class GUILayout(MDFloatLayout, MDGridLayout):
             loadingfile.start()
         self.loadingfiletimer = Clock.schedule_interval(self.waitingforload, 1)
         self.loadingfiletimer()
+        self._prefetch_search_results()
+
+    def _prefetch_search_results(self, depth: int = 2):
+        """Ask the service to download the next search results in the background."""
+        if self.playlist_mode or not self.result1:
+            return
+        items = []
+        for k in range(1, depth + 1):
+            with contextlib.suppress(Exception):
+                r = self.result1[(self.count + k) % len(self.result1)]
+                title = utils.safe_filename(r["title"])
+                if os.path.isfile(
+                    os.path.join(self.set_local_download, f"{title}.m4a")
+                ):
+                    continue
+                thumb = r["thumbnails"][0]["url"]
+                items.append([r["link"], title, thumb, self.set_local_download])
+        if items:
+            GUILayout.send("prefetch", json.dumps(items))
 
     def set_title_refresh_playlist(self, apm, ap):
         title = utils.safe_filename((self.settitle or "").strip())
@@ -1339,8 +1497,6 @@ class GUILayout(MDFloatLayout, MDGridLayout):
         full_path = os.path.join(self.set_local_download, fname)
 
         apm.add_tracks(ap.id, [full_path])
-        with contextlib.suppress(Exception):
-            self._playlist_refresh_tracks()
 
     def sync_playlist_set_load(self):
         self.file_loaded = True
@@ -1349,8 +1505,6 @@ class GUILayout(MDFloatLayout, MDGridLayout):
             ap = apm.active_playlist() if apm else None
             if ap:
                 self.set_title_refresh_playlist(apm, ap)
-        with contextlib.suppress(Exception):
-            self.refresh_playlist()
         with contextlib.suppress(Exception):
             self.second_screen2()
         with contextlib.suppress(Exception):
@@ -1377,7 +1531,7 @@ class GUILayout(MDFloatLayout, MDGridLayout):
 
     def playing(self):
         GUILayout.get_update_slider = Clock.schedule_interval(
-            self.wait_update_slider, 1
+            self.wait_update_slider, SLIDER_TICK
         )
         if not getattr(self, "screen2_is_downloads", False):
             self._send_active_playlist_to_service()
@@ -1398,11 +1552,16 @@ class GUILayout(MDFloatLayout, MDGridLayout):
             self.load_file()
             self.loadingosctimer()
         else:
+            self._reanchor()
+            self.paused = False
             GUILayout.send("play", "play")
 
     @staticmethod
     def wait_update_slider(dt):
-        GUILayout.send("get_update_slider", "tick")
+        """Clock tick: advance the slider locally; positions are pushed by the service."""
+        with contextlib.suppress(Exception):
+            root = MDApp.get_running_app().root
+            root._render_position(root._interpolated_pos())
 
     def waitingforoscload(self, dt):
         if self.fileosc_loaded is True:
@@ -1439,15 +1598,39 @@ class GUILayout(MDFloatLayout, MDGridLayout):
         MDApp.get_running_app().root.ids.song_position.text = (
             "00:00:00" if str(res).count(":") == 2 else "00:00"
         )
+        self._pos_anchor = (0.0, time.monotonic())
 
         self.fileosc_loaded = True
 
-    @mainthread
     def update_slider(self, *val):
-        self.song_pos = float("".join(val))
+        """/song_pos pushed by the service: re-anchor the local interpolation."""
+        with contextlib.suppress(ValueError):
+            self._pos_anchor = (float("".join(val)), time.monotonic())
+            self._render_interpolated()
+
+    @mainthread
+    def _render_interpolated(self):
+        self._render_position(self._interpolated_pos())
+
+    def _interpolated_pos(self) -> float:
+        """Last pushed position advanced by the monotonic time since it arrived."""
+        pos, stamp = getattr(self, "_pos_anchor", (0.0, None))
+        if stamp is None or self.paused or not GUILayout.playing_song:
+            return pos
+        pos += time.monotonic() - stamp
+        return min(pos, self.length) if self.length else pos
+
+    def _reanchor(self):
+        """Restart the interpolation from where it is now, on pause and resume."""
+        self._pos_anchor = (self._interpolated_pos(), time.monotonic())
+
+    def _render_position(self, pos: float):
+        if GUILayout.slider is None or self.length is None:
+            return
+        self.song_pos = pos
         if not getattr(GUILayout, "is_scrubbing", False):
             GUILayout.slider.value = self.song_pos
-        settext = self.length - self.song_pos
+        settext = max(0.0, self.length - self.song_pos)
         ty_res = time.gmtime(settext)
         res = time.strftime("%H:%M:%S", ty_res)
         if str(res[:2]) == "00":
@@ -1484,16 +1667,17 @@ class GUILayout(MDFloatLayout, MDGridLayout):
         GUILayout.send("loop", arg2)
 
     def shuffle_song_check(self):
-        if self.shuffle_selected is True:
-            self.shuffle_selected = False
-            GUILayout.send("shuffle", "False")
-            MDApp.get_running_app().root.ids.shuffle_btt.text_color = 0, 0, 0, 1
-        else:
-            MDApp.get_running_app().root.ids.shuffle_btt.text_color = 1, 0, 0, 1
-            self.shuffle_selected = True
-            GUILayout.send("shuffle", "True")
+        """Cycle off -> on -> smart (weighted by play stats) -> off."""
+        modes = list(SHUFFLE_MODES)
+        self.shuffle_mode = modes[(modes.index(self.shuffle_mode) + 1) % len(modes)]
+        message, icon, red = SHUFFLE_MODES[self.shuffle_mode]
+        btn = MDApp.get_running_app().root.ids.shuffle_btt
+        btn.icon = icon
+        btn.text_color = red, 0, 0, 1
+        GUILayout.send("shuffle", message)
 
     def pause(self):
+        self._reanchor()
         self.paused = True
         GUILayout.playing_song = False
         GUILayout.get_update_slider.cancel()
@@ -1516,115 +1700,39 @@ class GUILayout(MDFloatLayout, MDGridLayout):
 
     def _playlist_open_reorder_dialog(self):
         """
-        Open a modal dialog to reorder the ACTIVE playlist using up/down arrows.
-        Applies the order using PlaylistManager.move_track(...) on Save.
+        Open a modal editor to reorder the ACTIVE playlist: drag a row by its
+        handle, or select it and jump to a position. Rows are recycled and
+        edits only touch a ReorderModel; Save commits the whole permutation
+        with a single PlaylistManager.apply_permutation().
         """
-        import functools
-
-        from kivy.uix.scrollview import ScrollView
-        from kivymd.uix.boxlayout import MDBoxLayout
-        from kivymd.uix.button import MDFlatButton, MDIconButton
-        from kivymd.uix.dialog import MDDialog
-        from kivymd.uix.gridlayout import MDGridLayout
-        from kivymd.uix.label import MDLabel
-
         apm = getattr(self, "_playlist_manager", None)
         ap = apm.active_playlist() if apm else None
         if not ap or not ap.tracks:
             with contextlib.suppress(Exception):
                 toast("No active playlist to reorder")
             return
-        model = [(t.title, getattr(t, "path", None)) for t in ap.tracks]
-        visible_h = max(dp(220), min(Window.height * 0.65, dp(520)))
-        row_h = dp(48)
-
-        container = MDBoxLayout(
-            orientation="vertical",
-            spacing=dp(8),
-            padding=[dp(8), dp(6), dp(8), dp(2)],
-            adaptive_height=True,
-        )
+        model = ReorderModel([t.title for t in ap.tracks])
+        version = apm.tracks_version(ap.id)
 
-        scroll = ScrollView(size_hint=(1, None), height=visible_h)
-        grid = MDGridLayout(
-            cols=1, adaptive_height=True, spacing=dp(6), size_hint_y=None
-        )
-        grid.bind(minimum_height=grid.setter("height"))
-        scroll.add_widget(grid)
-        container.add_widget(scroll)
-
-        state = {"model": model, "grid": grid}
-
-        def _refresh_grid():
-            grid = state["grid"]
-            grid.clear_widgets()
-            m = state["model"]
-            for idx, (title, key) in enumerate(m):
-                row = MDBoxLayout(
-                    orientation="horizontal",
-                    size_hint_y=None,
-                    height=row_h,
-                    padding=[dp(6), 0, dp(6), 0],
-                    spacing=dp(8),
-                )
-
-                lbl_idx = MDLabel(
-                    text=f"{idx+1}.",
-                    size_hint_x=None,
-                    width=dp(28),
-                    halign="right",
-                    valign="center",
-                )
-
-                lbl_title = MDLabel(
-                    text=title or "(untitled)",
-                    halign="left",
-                    shorten=True,
-                    shorten_from="right",
-                )
-
-                btn_up = MDIconButton(
-                    icon="chevron-up",
-                    on_release=functools.partial(_move_item, idx, -1),
-                )
-                btn_dn = MDIconButton(
-                    icon="chevron-down",
-                    on_release=functools.partial(_move_item, idx, +1),
-                )
-
-                btn_up.disabled = idx == 0
-                btn_dn.disabled = idx == len(m) - 1
-
-                row.add_widget(lbl_idx)
-                row.add_widget(lbl_title)
-                row.add_widget(btn_up)
-                row.add_widget(btn_dn)
-                grid.add_widget(row)
-
-        def _move_item(idx, delta, *_args):
-            m = state["model"]
-            j = idx + delta
-            if 0 <= idx < len(m) and 0 <= j < len(m):
-                m[idx], m[j] = m[j], m[idx]
-                _refresh_grid()
+        editor = Factory.ReorderEditor()
+        editor.ids.rv.height = max(dp(220), min(Window.height * 0.65, dp(520)))
+        editor.ids.rv.data = model.rows()
+        self._reorder = (model, editor.ids.rv)
 
         def _apply_and_close(_btn):
             try:
-                desired_keys = [k for (_title, k) in state["model"]]
-                cur_keys = [getattr(t, "path", None) for t in ap.tracks]
-
-                for i, want in enumerate(desired_keys):
-                    if want not in cur_keys:
-                        continue
-                    cur_pos = cur_keys.index(want)
-                    if cur_pos != i:
-                        with contextlib.suppress(Exception):
-                            apm.move_track(ap.id, cur_pos, i)
-                        item = cur_keys.pop(cur_pos)
-                        cur_keys.insert(i, item)
+                if not model.changed:
+                    return
+                if apm.tracks_version(ap.id) != version:
+                    with contextlib.suppress(Exception):
+                        toast("Playlist changed meanwhile; order not saved")
+                    return
+                try:
+                    apm.apply_permutation(ap.id, model.order)
+                except ValueError as e:
+                    print("reorder apply failed:", e)
+                    return
 
-                with contextlib.suppress(Exception):
-                    self._playlist_refresh_tracks()
                 with contextlib.suppress(Exception):
                     self._send_active_playlist_to_service()
                 with contextlib.suppress(Exception):
@@ -1633,24 +1741,80 @@ class GUILayout(MDFloatLayout, MDGridLayout):
                 with contextlib.suppress(Exception):
                     toast("Playlist order updated")
             finally:
+                self._reorder = None
                 with contextlib.suppress(Exception):
                     dlg.dismiss()
 
+        def _cancel(*_):
+            self._reorder = None
+            dlg.dismiss()
+
         dlg = MDDialog(
             title="Reorder tracks",
             type="custom",
-            content_cls=container,
+            content_cls=editor,
             size_hint=(None, None),
             width=min(Window.width * 0.92, dp(620)),
             buttons=[
-                MDFlatButton(text="Cancel", on_release=lambda *_: dlg.dismiss()),
+                MDFlatButton(text="Cancel", on_release=_cancel),
                 MDFlatButton(text="Save", on_release=_apply_and_close),
             ],
         )
-
-        _refresh_grid()
         dlg.open()
 
+    def _reorder_move(self, src: int, dst: int) -> int:
+        """Move a row in the open reorder editor; returns where it ended up."""
+        state = getattr(self, "_reorder", None)
+        if not state:
+            return src
+        model, rv = state
+        op = model.move(src, dst)
+        if op is None:
+            return src
+        apply_rows(rv.data, op)
+        return max(0, min(len(model) - 1, int(dst)))
+
+    def _reorder_index_at(self, touch) -> int:
+        """Row position under `touch` in the reorder editor (clamped)."""
+        model, rv = self._reorder
+        lm = rv.layout_manager
+        pitch = lm.default_size[1] + lm.spacing
+        # A grabbed touch reaches the row already in the row parent's (the
+        # layout manager's) coordinates, the same space as lm.top; converting
+        # again would apply the scroll offset twice.
+        y = touch.pos[1]
+        return max(0, min(len(model) - 1, int((lm.top - y) // pitch)))
+
+    def _reorder_select(self, pos: int):
+        state = getattr(self, "_reorder", None)
+        if state:
+            model, rv = state
+            for op in model.select(pos):
+                apply_rows(rv.data, op)
+
+    def _reorder_jump(self, text: str):
+        """Move the selected row to the 1-based position typed by the user."""
+        state = getattr(self, "_reorder", None)
+        if not state:
+            return
+        model, rv = state
+        src = model.position(model.selected)
+        if src is None:
+            with contextlib.suppress(Exception):
+                toast("Tap a track first")
+            return
+        try:
+            dst = int(str(text).strip()) - 1
+        except ValueError:
+            return
+        dst = self._reorder_move(src, dst)
+        lm = rv.layout_manager
+        scrollable = lm.height - rv.height
+        if scrollable > 0:
+            pitch = lm.default_size[1] + lm.spacing
+            top = max(0.0, dst * pitch - rv.height / 2)
+            rv.scroll_y = 1.0 - min(top, scrollable) / scrollable
+
 
 class Musicapp(MDApp):
 
@@ -1683,8 +1847,19 @@ class Musicapp(MDApp):
         """Called by Kivy when the app is closing."""
         self._cleanup_on_exit()
 
+    def _flush_playlists(self, timeout: float = 5.0):
+        """Wait for queued playlist writes (edits are persisted in the background)."""
+        pm = getattr(self.root, "_playlist_manager", None)
+        if pm is not None:
+            try:
+                if not pm.flush(timeout):
+                    print("[playlists] flush timed out")
+            except Exception as e:
+                print("playlist flush error:", e)
+
     def _cleanup_on_exit(self):
         """Centralized shutdown path; safe to call multiple times."""
+        self._flush_playlists()
         gs = getattr(self, "gui_sounds", None)
         if gs and hasattr(gs, "on_app_close"):
             try:
@@ -1734,6 +1909,8 @@ class Musicapp(MDApp):
             GUILayout.service = None
 
     def on_pause(self):
+        # Android may kill a paused app without on_stop.
+        self._flush_playlists()
         GUILayout.get_update_slider.cancel()
         GUILayout.send("iampaused", ":(")
         return True
@@ -1767,7 +1944,9 @@ class Musicapp(MDApp):
                 Clock.unschedule(getattr(root, "get_update_slider", None))
                 Clock.unschedule(getattr(GUILayout, "get_update_slider", None))
         with contextlib.suppress(Exception):
-            root.get_update_slider = Clock.schedule_interval(root.wait_update_slider, 1)
+            root.get_update_slider = Clock.schedule_interval(
+                root.wait_update_slider, SLIDER_TICK
+            )
 
         def _apply_playing_state():
             with contextlib.suppress(Exception):
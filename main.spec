@@ -51,6 +51,17 @@ _hidden = [] + collect_submodules('kivymd')
 _extra_sources = [
     ('playlist_manager.py', '.'),
     ('utils.py', '.'),
+    ('download_queue.py', '.'),
+    ('command_lanes.py', '.'),
+    ('playback_metrics.py', '.'),
+    ('playlist_transfer.py', '.'),
+    ('library_index.py', '.'),
+    ('playlist_columns.py', '.'),
+    ('list_model.py', '.'),
+    ('play_order.py', '.'),
+    ('play_history.py', '.'),
+    ('shuffle_bag.py', '.'),
+    ('smart_shuffle.py', '.'),
     ('./service/main.py', './service'),
 ]
 
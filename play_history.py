@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import threading
+from typing import Callable, List, Optional
+
+DEFAULT_CAPACITY = 200
+
+
+class PlayHistory:
+    """
+    Bounded playback history with a back/forward cursor, like a browser's.
+    Usage:
+        HISTORY = PlayHistory(path=os.path.join(cache_dir, "history.json"))
+        HISTORY.record(name)      # on every play; no-op for the cursor's entry
+        HISTORY.back()            # previous track, or None at the oldest
+        HISTORY.forward()         # track we came back from, or None
+    Entries live in a fixed ring of `capacity` slots: the oldest is dropped
+    when it is full, so memory does not grow with session length. Playing
+    something new after going back drops the entries ahead of the cursor.
+    With `path`, the ring and cursor are saved on each change and restored
+    on startup.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, path: Optional[str] = None):
+        self.capacity = max(1, int(capacity))
+        self.path = path
+        self._lock = threading.Lock()
+        self._buf: List[Optional[str]] = [None] * self.capacity
+        self._head = 0  # slot of the oldest entry
+        self._size = 0
+        self._cursor = -1  # logical index of the current entry
+        if path:
+            self._load()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _at(self, i: int) -> Optional[str]:
+        return self._buf[(self._head + i) % self.capacity]
+
+    def current(self) -> Optional[str]:
+        with self._lock:
+            return self._at(self._cursor) if self._cursor >= 0 else None
+
+    def entries(self) -> List[str]:
+        """Oldest first."""
+        with self._lock:
+            return [self._at(i) for i in range(self._size)]
+
+    def ahead(
+        self, count: int, valid: Optional[Callable[[str], bool]] = None
+    ) -> List[str]:
+        """Up to `count` entries forward() would return, in order."""
+        with self._lock:
+            out = []
+            for i in range(self._cursor + 1, self._size):
+                if len(out) >= count:
+                    break
+                name = self._at(i)
+                if valid is None or valid(name):
+                    out.append(name)
+            return out
+
+    def record(self, name: Optional[str]) -> None:
+        """A track started playing. Replays of the current entry (including
+        ones reached with back/forward) leave the history as it is."""
+        if not name:
+            return
+        with self._lock:
+            if self._cursor >= 0 and self._at(self._cursor) == name:
+                return
+            for i in range(self._cursor + 1, self._size):
+                self._buf[(self._head + i) % self.capacity] = None
+            self._size = self._cursor + 1
+            if self._size == self.capacity:
+                self._buf[self._head] = name
+                self._head = (self._head + 1) % self.capacity
+            else:
+                self._buf[(self._head + self._size) % self.capacity] = name
+                self._size += 1
+            self._cursor = self._size - 1
+            self._save()
+
+    def back(self, valid: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+        """Step to the previous entry (skipping any `valid` rejects)."""
+        return self._step(-1, valid)
+
+    def forward(self, valid: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+        """Step to the next entry after a back(); None at the newest."""
+        return self._step(1, valid)
+
+    def _step(self, delta: int, valid) -> Optional[str]:
+        with self._lock:
+            i = self._cursor + delta
+            while 0 <= i < self._size:
+                name = self._at(i)
+                if valid is None or valid(name):
+                    self._cursor = i
+                    self._save()
+                    return name
+                i += delta
+            return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buf = [None] * self.capacity
+            self._head, self._size, self._cursor = 0, 0, -1
+            self._save()
+
+    # ---------- persistence ----------
+    def _save(self) -> None:
+        """Write the history (lock held). No fsync: losing the last entry to
+        a power cut is harmless, and this runs on every track change."""
+        if not self.path:
+            return
+        state = {
+            "entries": [self._at(i) for i in range(self._size)],
+            "cursor": self._cursor,
+        }
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print("[history] save failed:", e)
+
+    def _load(self) -> None:
+        with contextlib.suppress(OSError, ValueError, TypeError, AttributeError):
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+            entries = [str(e) for e in state.get("entries", []) if e]
+            cursor = int(state.get("cursor", len(entries) - 1))
+            # A smaller capacity keeps the newest entries.
+            drop = max(0, len(entries) - self.capacity)
+            entries, cursor = entries[drop:], cursor - drop
+            self._buf[: len(entries)] = entries
+            self._head, self._size = 0, len(entries)
+            self._cursor = min(max(cursor, 0), len(entries) - 1) if entries else -1
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import threading
+from typing import Dict, List, Optional
+
+
+class PlayOrder:
+    """
+    Sequential navigation over the service playlist.
+    Usage:
+        ORDER = PlayOrder()
+        ORDER.next(playlist, current_name)      # wraps to the first track
+        ORDER.previous(playlist, current_name)  # wraps to the last track
+        ORDER.upcoming(playlist, current_name, 3)
+        ORDER.changed()                         # after editing the list in place
+    A cursor remembers where next()/previous() last landed, so stepping is
+    O(1) and duplicates are walked in order. Lookups (locate, upcoming)
+    never move it. When the cursor does not
+    match, a name -> first position map answers instead. The map is rebuilt
+    only after the playlist changed (a different list object, or changed()).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items: Optional[List[str]] = None
+        self._pos: Dict[str, int] = {}
+        self._stale = True
+        self._cursor = -1
+
+    def changed(self) -> None:
+        with self._lock:
+            self._stale = True
+
+    def _index(self, items: List[str]) -> Dict[str, int]:
+        """The name map for `items` (lock held)."""
+        if items is not self._items or self._stale:
+            # Built back to front so the first occurrence of a name wins.
+            pos = dict(zip(reversed(items), range(len(items) - 1, -1, -1)))
+            self._items, self._pos, self._stale = items, pos, False
+        return self._pos
+
+    def locate(self, items: List[str], name: Optional[str]) -> int:
+        """Position of `name` in `items` (the cursor's if it matches), or -1."""
+        with self._lock:
+            return self._locate(items, name)
+
+    def _locate(self, items: List[str], name: Optional[str]) -> int:
+        if not name:
+            return -1
+        c = self._cursor
+        if items is self._items and 0 <= c < len(items) and items[c] == name:
+            return c
+        i = self._index(items).get(name, -1)
+        if i >= 0 and (i >= len(items) or items[i] != name):
+            # Edited in place without changed(): rebuild once and retry.
+            self._stale = True
+            i = self._index(items).get(name, -1)
+        return i
+
+    def next(self, items: List[str], name: Optional[str]) -> Optional[str]:
+        """Track after `name`; None when `name` is not in the list."""
+        with self._lock:
+            i = self._locate(items, name)
+            if i < 0 or not items:
+                return None
+            self._cursor = (i + 1) % len(items)
+            return items[self._cursor]
+
+    def previous(self, items: List[str], name: Optional[str]) -> Optional[str]:
+        """Track before `name`; the first track when `name` is not in the list."""
+        with self._lock:
+            if not items:
+                return None
+            i = self._locate(items, name)
+            self._cursor = (i - 1) % len(items) if i >= 0 else 0
+            return items[self._cursor]
+
+    def upcoming(self, items: List[str], name: Optional[str], count: int) -> List[str]:
+        """Up to `count` tracks after `name` (without moving the cursor)."""
+        with self._lock:
+            n = len(items)
+            if count <= 0 or not n:
+                return []
+            i = self._locate(items, name)
+            return [items[(i + k) % n] for k in range(1, min(count, n - 1) + 1)]
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+
+class GapMeter:
+    """
+    Measures the silence between consecutive tracks.
+    Usage:
+        GAPS.track_ended()            # end-of-track event observed
+        ...                           # next Sound loaded/started
+        GAPS.track_started("gapless") # right after Sound.play() returns
+        GAPS.report()
+    A transition is only recorded when both halves are seen, so manual
+    skips (no end event) do not pollute the numbers.
+    """
+
+    def __init__(self, window: int = 200):
+        self._lock = threading.Lock()
+        self._t_end: Optional[float] = None
+        self._samples: deque = deque(maxlen=window)
+
+    def track_ended(self, at: Optional[float] = None) -> None:
+        """`at`: perf_counter() time the track actually ended, if earlier."""
+        with self._lock:
+            self._t_end = time.perf_counter() if at is None else at
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._t_end = None
+
+    def track_started(self, mode: str) -> Optional[float]:
+        """Close the pending transition; returns the gap in ms (or None)."""
+        with self._lock:
+            if self._t_end is None:
+                return None
+            gap_ms = (time.perf_counter() - self._t_end) * 1000.0
+            self._t_end = None
+            self._samples.append((mode, gap_ms))
+        return gap_ms
+
+    def report(self) -> dict:
+        with self._lock:
+            samples = list(self._samples)
+        out = {}
+        for mode in sorted({m for m, _ in samples}):
+            xs = sorted(g for m, g in samples if m == mode)
+            n = len(xs)
+            out[mode] = {
+                "count": n,
+                "min_ms": round(xs[0], 2),
+                "mean_ms": round(sum(xs) / n, 2),
+                "p95_ms": round(xs[min(n - 1, int(n * 0.95))], 2),
+                "max_ms": round(xs[-1], 2),
+                "last_ms": round([g for m, g in samples if m == mode][-1], 2),
+            }
+        return out
+
+
+class WakeupCounter:
+    """
+    Counts timer/thread wakeups per source over a sliding window.
+    Usage:
+        WAKEUPS.hit("watchdog")
+        WAKEUPS.per_minute()   # {"watchdog": 12, ...}
+    """
+
+    def __init__(self, window_s: float = 60.0):
+        self._window = float(window_s)
+        self._lock = threading.Lock()
+        self._hits: dict = {}
+        self._totals: dict = {}
+
+    def hit(self, name: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            buf = self._hits.get(name)
+            if buf is None:
+                buf = self._hits[name] = deque()
+            buf.append(now)
+            self._totals[name] = self._totals.get(name, 0) + 1
+            self._prune(buf, now)
+
+    def per_minute(self) -> dict:
+        now = time.monotonic()
+        scale = 60.0 / self._window
+        with self._lock:
+            for buf in self._hits.values():
+                self._prune(buf, now)
+            return {k: round(len(v) * scale, 1) for k, v in self._hits.items()}
+
+    def report(self) -> dict:
+        per_min = self.per_minute()
+        with self._lock:
+            totals = dict(self._totals)
+        return {"per_minute": per_min, "total": totals}
+
+    def _prune(self, buf: deque, now: float) -> None:
+        cutoff = now - self._window
+        while buf and buf[0] < cutoff:
+            buf.popleft()
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+from collections.abc import MutableSequence
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+MAGIC = b"YMPLCOL1"
+EXTENSION = ".ympl"
+# magic, track count, meta length, records offset, string table offset
+_HEADER = struct.Struct("<8sIIQQ")
+# title (off, len), path (off, len), thumb (off, len), duration
+_RECORD = struct.Struct("<IIIIIId")
+_NO_STRING = 0xFFFFFFFF
+
+Row = Tuple[str, str, float, Optional[str]]
+
+
+def write_columns(path: str, meta: dict, rows: Iterable[Row]) -> None:
+    """
+    Write a columnar shard atomically (tmp + fsync + os.replace):
+        [header][meta json][fixed-width records][string table]
+    Strings are deduplicated into the table; records hold offsets into it.
+    """
+    strings: Dict[str, Tuple[int, int]] = {}
+    table = bytearray()
+
+    def ref(s: Optional[str]) -> Tuple[int, int]:
+        if s is None:
+            return 0, _NO_STRING
+        hit = strings.get(s)
+        if hit is None:
+            raw = s.encode("utf-8")
+            hit = strings[s] = (len(table), len(raw))
+            table.extend(raw)
+        return hit
+
+    records = bytearray()
+    count = 0
+    for title, pth, duration, thumb in rows:
+        records.extend(
+            _RECORD.pack(
+                *ref(title or ""),
+                *ref(pth or ""),
+                *ref(thumb),
+                float(duration or 0.0),
+            )
+        )
+        count += 1
+
+    meta_raw = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+    records_off = _HEADER.size + len(meta_raw)
+    table_off = records_off + len(records)
+    tmp = f"{path}.tmp"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, count, len(meta_raw), records_off, table_off))
+        f.write(meta_raw)
+        f.write(records)
+        f.write(table)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class ColumnarShard:
+    """
+    Read-only, memory-mapped view of a shard written by write_columns.
+    Usage:
+        shard = ColumnarShard(path)
+        shard.meta, len(shard), shard.row(i)  # (title, path, duration, thumb)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._mm = (
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+            )
+        if len(self._mm) < _HEADER.size:
+            raise ValueError(f"truncated playlist shard: {path}")
+        magic, self.count, meta_len, self._records, self._table = _HEADER.unpack_from(
+            self._mm, 0
+        )
+        if magic != MAGIC:
+            raise ValueError(f"not a columnar playlist shard: {path}")
+        self.meta = json.loads(
+            bytes(self._mm[_HEADER.size : _HEADER.size + meta_len]).decode("utf-8")
+        )
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _str(self, off: int, length: int) -> Optional[str]:
+        if length == _NO_STRING:
+            return None
+        start = self._table + off
+        return bytes(self._mm[start : start + length]).decode("utf-8")
+
+    def row(self, index: int) -> Row:
+        t_off, t_len, p_off, p_len, h_off, h_len, duration = _RECORD.unpack_from(
+            self._mm, self._records + index * _RECORD.size
+        )
+        return (
+            self._str(t_off, t_len),
+            self._str(p_off, p_len),
+            duration,
+            self._str(h_off, h_len),
+        )
+
+    def rows(self) -> Iterable[Row]:
+        return (self.row(i) for i in range(self.count))
+
+
+class LazyTrackList(MutableSequence):
+    """
+    List of tracks backed by a ColumnarShard. Entries stay as record
+    numbers until read, when `make(row)` builds the Track once and caches
+    it. Until the first structural edit, no per-track Python objects exist.
+    """
+
+    def __init__(self, shard: ColumnarShard, make: Callable[[Row], object]):
+        self._shard = shard
+        self._make = make
+        self._items: Optional[List] = None  # None: identity over the shard
+        self._cache: Dict[int, object] = {}
+
+    def _get(self, i: int):
+        if self._items is None:
+            item = self._cache.get(i)
+            if item is None:
+                item = self._cache[i] = self._make(self._shard.row(i))
+            return item
+        item = self._items[i]
+        if isinstance(item, int):
+            item = self._items[i] = self._make(self._shard.row(item))
+        return item
+
+    def _materialize(self) -> List:
+        if self._items is None:
+            self._items = list(range(len(self._shard)))
+            for i, item in self._cache.items():
+                self._items[i] = item
+            self._cache = {}
+        return self._items
+
+    def __len__(self) -> int:
+        return len(self._shard) if self._items is None else len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(*index.indices(len(self)))]
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("track index out of range")
+        return self._get(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._get(i)
+
+    def __setitem__(self, index, value) -> None:
+        items = self._materialize()
+        items[index] = list(value) if isinstance(index, slice) else value
+
+    def __delitem__(self, index) -> None:
+        del self._materialize()[index]
+
+    def insert(self, index: int, value) -> None:
+        self._materialize().insert(index, value)
+
+    def copy(self) -> "LazyTrackList":
+        """Independent list over the same shard (unread rows stay unread)."""
+        out = LazyTrackList(self._shard, self._make)
+        out._items = None if self._items is None else list(self._items)
+        out._cache = dict(self._cache)
+        return out
+
+    def paths(self) -> Iterable[Optional[str]]:
+        """Track paths without building Tracks (stored form for unread rows)."""
+        if self._items is None:
+            for i in range(len(self._shard)):
+                item = self._cache.get(i)
+                yield self._shard.row(i)[1] if item is None else item.path
+            return
+        for item in self._items:
+            yield self._shard.row(item)[1] if isinstance(item, int) else item.path
+
+    def raw_rows(self, to_row: Callable[[object], Row]) -> Iterable[Row]:
+        """Rows for writing; untouched entries are copied without a Track."""
+        if self._items is None:
+            for i in range(len(self._shard)):
+                item = self._cache.get(i)
+                yield self._shard.row(i) if item is None else to_row(item)
+            return
+        for item in self._items:
+            yield self._shard.row(item) if isinstance(item, int) else to_row(item)
@@ -4,59 +4,424 @@ import contextlib
 import json
 import os
 import shutil
+import sys
+import threading
 import time
 import uuid
-from dataclasses import asdict, dataclass, field
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from os.path import basename, exists, isabs, join, normcase, normpath
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
+from playlist_columns import EXTENSION as COLUMNAR_EXT
+from playlist_columns import ColumnarShard, LazyTrackList, write_columns
 from utils import get_app_writable_dir, safe_filename
 
+AUDIO_EXTS = (".m4a", ".mp3", ".wav", ".flac", ".aac", ".ogg")
 DEFAULT_REL_SUBDIR = "Downloaded/Played"
 PLAYLIST_FILENAME = "playlists.json"
+JOURNAL_SUFFIX = ".journal"
+SHARD_DIR_SUFFIX = ".d"
+LAYOUT_VERSION = 2
+# Journal ops that touch a playlist's track list (and so its shard).
+TRACK_OPS = ("add", "insert", "remove", "remove_many", "move", "permute")
+# Shard encodings: "json", or "columnar" (string table + fixed-width
+# records, memory-mapped, Tracks built on access; see playlist_columns).
+SHARD_FORMATS = ("json", "columnar")
+_ROW_FIELDS = ("title", "path", "duration", "thumb")
+# Journal records written before save() folds them into a fresh snapshot.
+COMPACT_EVERY = 256
+# With async_writes, edits arriving within this window share one write.
+DEBOUNCE_S = 0.25
+
+# PlaylistEvent kinds.
+PLAYLIST_ADDED = "playlist_added"
+PLAYLIST_RENAMED = "playlist_renamed"
+PLAYLIST_REMOVED = "playlist_removed"
+ACTIVE_CHANGED = "active_changed"
+TRACKS_INSERTED = "tracks_inserted"
+TRACKS_REMOVED = "tracks_removed"
+TRACKS_MOVED = "tracks_moved"
+TRACKS_REORDERED = "tracks_reordered"
+# Playlists were replaced wholesale (load, import, direct edits of `data`).
+RELOADED = "reloaded"
+
+
+_SIBLING_JPG = object()
 
 
-@dataclass
 class Track:
-    title: str
-    path: str
-    duration: float = 0.0
-    thumb: Optional[str] = None
+    """
+    One playlist entry; built and read like a plain (title, path, duration,
+    thumb) record. Slotted, and it keeps only what cannot be derived: the
+    directory is an interned string shared by every track in that folder,
+    and title/thumb are stored only when they differ from the file stem and
+    its sibling .jpg.
+    """
 
+    __slots__ = ("_dir", "_name", "_title", "_thumb", "duration")
+
+    def __init__(
+        self,
+        title: str,
+        path: str,
+        duration: float = 0.0,
+        thumb: Optional[str] = None,
+    ):
+        self.path = path
+        self.title = title
+        self.thumb = thumb
+        self.duration = duration
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self._dir, self._name) if self._dir else self._name
+
+    @path.setter
+    def path(self, value: Optional[str]) -> None:
+        head, tail = os.path.split(value or "")
+        self._dir = sys.intern(head)
+        self._name = tail
+
+    @property
+    def title(self) -> str:
+        if self._title is None:
+            return os.path.splitext(self._name)[0]
+        return self._title
+
+    @title.setter
+    def title(self, value: Optional[str]) -> None:
+        value = value or ""
+        self._title = None if value == os.path.splitext(self._name)[0] else value
+
+    @property
+    def thumb(self) -> Optional[str]:
+        if self._thumb is _SIBLING_JPG:
+            return os.path.splitext(self.path)[0] + ".jpg"
+        return self._thumb
+
+    @thumb.setter
+    def thumb(self, value: Optional[str]) -> None:
+        if value and value == os.path.splitext(self.path)[0] + ".jpg":
+            self._thumb = _SIBLING_JPG
+        else:
+            self._thumb = value
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Track):
+            return NotImplemented
+        return (self.title, self.path, self.duration, self.thumb) == (
+            other.title,
+            other.path,
+            other.duration,
+            other.thumb,
+        )
 
-@dataclass
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return (
+            f"Track(title={self.title!r}, path={self.path!r}, "
+            f"duration={self.duration!r}, thumb={self.thumb!r})"
+        )
+
+
+@dataclass(slots=True)
 class Playlist:
     id: str
     name: str
     tracks: List[Track] = field(default_factory=list)
 
 
+@dataclass(frozen=True, slots=True)
+class PlaylistEvent:
+    """
+    One change, delivered to PlaylistManager.subscribe() callbacks:
+        TRACKS_INSERTED  index, count
+        TRACKS_REMOVED   indices (ascending, positions before the removal)
+        TRACKS_MOVED     index -> dst
+        TRACKS_REORDERED order (new position i holds old order[i])
+    `version` is the manager's version right after the change.
+    """
+
+    kind: str
+    pid: Optional[str]
+    version: int
+    index: Optional[int] = None
+    count: int = 0
+    dst: Optional[int] = None
+    indices: Tuple[int, ...] = ()
+    order: Tuple[int, ...] = ()
+
+
+class _PathIndex:
+    """
+    Normalized path -> position of its first occurrence in one playlist,
+    kept in step with the track list (keys[i] is the key of tracks[i]).
+    """
+
+    __slots__ = ("keys", "pos")
+
+    def __init__(self, keys: List[Optional[str]]):
+        self.keys = keys
+        self.pos: Dict[str, int] = {}
+        for i, k in enumerate(keys):
+            if k is not None:
+                self.pos.setdefault(k, i)
+
+    def append(self, key: Optional[str]) -> None:
+        if key is not None:
+            self.pos.setdefault(key, len(self.keys))
+        self.keys.append(key)
+
+    def pop(self, index: int) -> None:
+        self.keys.pop(index)
+        self._renumber(index, len(self.keys), dropped=True)
+
+    def move(self, src: int, dst: int) -> None:
+        self.keys.insert(dst, self.keys.pop(src))
+        self._renumber(min(src, dst), max(src, dst) + 1)
+
+    def _renumber(self, lo: int, hi: int, dropped: bool = False) -> None:
+        """Recompute positions for keys[lo:hi]; everything else is unchanged."""
+        span = self.keys[lo:hi]
+        if dropped:
+            # The removed key may no longer occur anywhere.
+            for k in [k for k, i in self.pos.items() if i >= lo]:
+                del self.pos[k]
+        else:
+            for k in span:
+                if k is not None and self.pos.get(k, -1) >= lo:
+                    del self.pos[k]
+        for i, k in enumerate(span, lo):
+            if k is not None and k not in self.pos:
+                self.pos[k] = i
+
+
+class _PersistWriter:
+    """
+    Writer thread behind PlaylistManager(async_writes=True). Journal lines
+    and save() snapshots are queued in order; each debounce window is
+    written as one journal append (one fsync) plus, when a snapshot is
+    pending, only the newest shards and manifest.
+    Usage:
+        writer.submit("lines", [line, ...]) / writer.submit("snap", snap)
+        writer.flush()   # block until everything queued is on disk
+    """
+
+    def __init__(self, pm: "PlaylistManager", debounce_s: float = DEBOUNCE_S):
+        self._pm = pm
+        self._debounce = max(0.0, float(debounce_s))
+        self._cond = threading.Condition()
+        self._queue: List[tuple] = []
+        self._busy = False
+        self._flushers = 0
+        # Set when a write failed; the owner then queues a full snapshot.
+        self.failed = False
+        self._thread = threading.Thread(
+            target=self._loop, name="PlaylistWriter", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, kind: str, payload) -> None:
+        with self._cond:
+            self._queue.append((kind, payload))
+            self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Skip the debounce and wait for the queue to drain; False on timeout."""
+        with self._cond:
+            self._flushers += 1
+            self._cond.notify_all()
+            try:
+                return self._cond.wait_for(
+                    lambda: not self._queue and not self._busy, timeout
+                )
+            finally:
+                self._flushers -= 1
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue)
+                self._cond.wait_for(lambda: self._flushers > 0, self._debounce)
+                items, self._queue = self._queue, []
+                self._busy = True
+            try:
+                self._write(items)
+            except Exception as e:
+                print("[playlists] background write failed:", e)
+                self.failed = True
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _write(self, items: List[tuple]) -> None:
+        last = max(
+            (i for i, (kind, _) in enumerate(items) if kind == "snap"), default=-1
+        )
+        if last < 0:
+            before, after = [], [ln for kind, p in items for ln in p]
+        else:
+            before = [ln for kind, p in items[:last] if kind == "lines" for ln in p]
+            after = [ln for kind, p in items[last + 1 :] if kind == "lines" for ln in p]
+        if before:
+            self._write_lines(before)
+        if last >= 0:
+            snaps = [p for kind, p in items[: last + 1] if kind == "snap"]
+            shards: Dict[str, tuple] = {}
+            for snap in snaps:
+                shards.update(snap[0])
+            self._pm._write_snapshot((shards,) + snaps[-1][1:])
+        if after:
+            self._write_lines(after)
+
+    def _write_lines(self, lines: List[str]) -> None:
+        try:
+            self._pm._write_journal(lines)
+        except OSError as e:
+            print("[playlists] journal append failed:", e)
+            self.failed = True
+
+
 class PlaylistManager:
     """
     Updated to use app-specific storage by default (Android scoped storage-safe)
     Usage:
         pm = PlaylistManager()
+
+    Storage: `storage_path` is a small manifest (ids, names, active id)
+    and each playlist's tracks live in their own shard under
+    `playlists.d/`. Shards load on first access through _find(), and save()
+    rewrites only the shards that changed. A legacy single-file
+    playlists.json is migrated on first load (kept as `.v1.bak`).
+    `shard_format` picks how changed shards are written; shards in either
+    format are read.
+
+    Mutations append one small JSON record to `<storage_path>.journal`
+    instead of rewriting anything. Every COMPACT_EVERY records save() folds
+    them into the changed shards and the manifest, then truncates the
+    journal. Records carry a sequence number and the manifest and every
+    shard store the last one they include, so a crash part-way through
+    never replays a record twice.
+
+    Every change bumps `version` and is announced to subscribers as a
+    PlaylistEvent; views compare playlists_version / tracks_version(pid)
+    with what they last rendered and skip rebuilding when nothing changed.
+
+    With async_writes=True, edits only touch memory on the calling thread;
+    a background writer appends the journal and writes snapshots, batching
+    everything that arrives within `debounce_s`. Call flush() before exit.
     """
 
     def __init__(
-        self, storage_path: Optional[str] = None, rel_subdir: str = DEFAULT_REL_SUBDIR
+        self,
+        storage_path: Optional[str] = None,
+        rel_subdir: str = DEFAULT_REL_SUBDIR,
+        shard_format: str = "json",
+        async_writes: bool = False,
+        debounce_s: float = DEBOUNCE_S,
     ):
         if not storage_path:
             root = get_app_writable_dir(rel_subdir)
             storage_path = os.path.join(root, PLAYLIST_FILENAME)
 
         self.storage_path = storage_path
+        self.journal_path = f"{storage_path}{JOURNAL_SUFFIX}"
+        self.shard_dir = os.path.splitext(storage_path)[0] + SHARD_DIR_SUFFIX
+        self.shard_format = shard_format if shard_format in SHARD_FORMATS else "json"
         self.data: Dict = {
             "playlists": [],
             "active_playlist_id": None,
         }
+        self._seq = 0
+        self._journal_count = 0
+        self._torn_at: Optional[int] = None
+        self._dirty = False
+        self._root: Optional[str] = None
+        self._by_id: Dict[str, Playlist] = {}
+        self._paths: Dict[str, _PathIndex] = {}
+        self._batch_depth = 0
+        self._batch_lines: List[str] = []
+        # pid -> shard file name; pids whose tracks are not read yet; pids
+        # whose shard must be rewritten on the next save().
+        self._files: Dict[str, str] = {}
+        self._unloaded: Dict[str, str] = {}
+        self._dirty_shards: set = set()
+        self._writer = _PersistWriter(self, debounce_s) if async_writes else None
+        self._observers: List[Callable[[PlaylistEvent], None]] = []
+        self._version = 0
+        self._playlists_version = 0
+        self._tracks_base = 0
+        self._track_versions: Dict[str, int] = {}
         self.load()
 
+    @property
+    def dirty(self) -> bool:
+        """True when in-memory state is newer than the snapshot on disk."""
+        return self._dirty
+
+    # ---------- change notifications ----------
+    @property
+    def version(self) -> int:
+        """Bumped on every change to playlists, names, tracks or the active id."""
+        return self._version
+
+    @property
+    def playlists_version(self) -> int:
+        """Version of the playlist list itself: ids, names, order, active id."""
+        return self._playlists_version
+
+    def tracks_version(self, pid: Optional[str]) -> int:
+        """Version of one playlist's track list."""
+        return self._track_versions.get(pid, self._tracks_base)
+
+    def subscribe(self, callback: Callable[[PlaylistEvent], None]) -> None:
+        """Call `callback(event)` after every change (on the mutating thread)."""
+        if callback not in self._observers:
+            self._observers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[PlaylistEvent], None]) -> None:
+        with contextlib.suppress(ValueError):
+            self._observers.remove(callback)
+
+    def _notify(self, kind: str, pid: Optional[str] = None, **info) -> None:
+        self._version += 1
+        if kind in (TRACKS_INSERTED, TRACKS_REMOVED, TRACKS_MOVED, TRACKS_REORDERED):
+            self._track_versions[pid] = self._version
+        else:
+            self._playlists_version = self._version
+            if kind == RELOADED:
+                self._tracks_base = self._version
+                self._track_versions.clear()
+        if not self._observers:
+            return
+        event = PlaylistEvent(kind, pid, self._version, **info)
+        for cb in list(self._observers):
+            try:
+                cb(event)
+            except Exception as e:
+                print("[playlists] observer failed:", e)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued write is on disk (no-op when synchronous)."""
+        if self._writer is None:
+            return True
+        return self._writer.flush(timeout)
+
+    def mark_dirty(self) -> None:
+        """For callers that edit `data` directly before calling save()."""
+        self._dirty = True
+        self._dirty_shards.update(
+            p.id for p in self.data["playlists"] if p.id not in self._unloaded
+        )
+
     def to_dict(self) -> dict:
+        self._load_all()
         return {
             "playlists": [
-                {"id": p.id, "name": p.name, "tracks": [asdict(t) for t in p.tracks]}
+                {"id": p.id, "name": p.name, "tracks": [_track_dict(t) for t in p.tracks]}
                 for p in self.data["playlists"]
             ],
             "active_playlist_id": self.data["active_playlist_id"],
@@ -79,121 +444,466 @@ class PlaylistManager:
         """
         Load playlists and rebuild absolute media/cover paths from the current
         app sandbox ('Downloaded/Played') if stored paths are relative.
+        Read-only apart from the one-time legacy migration: only the manifest
+        (plus shards the journal touches) is read, and paths are only joined
+        here. The GUI and service go by basename; the disk checks (stale
+        path, sibling cover) run when exporting, see _resolve_paths().
         """
-        root = get_app_writable_dir("Downloaded/Played")
-
-        if os.path.exists(self.storage_path):
-            try:
-                with open(self.storage_path, "r", encoding="utf-8") as f:
-                    raw = json.load(f)
-            except Exception:
-                raw = {}
-        else:
-            raw = {}
+        self.flush()
+        raw = _read_json(self.storage_path)
+        if raw and raw.get("layout") != LAYOUT_VERSION:
+            self._migrate_legacy(raw)
+            return
 
+        base = int(raw.get("journal_seq", 0) or 0)
+        state = {
+            "active_playlist_id": raw.get("active_playlist_id"),
+            "playlists": [
+                {
+                    "id": e.get("id"),
+                    "name": e.get("name", "Untitled"),
+                    "file": e.get("file"),
+                    "tracks": None,
+                }
+                for e in raw.get("playlists", [])
+                if e.get("id")
+            ],
+        }
+        by_id = {p["id"]: p for p in state["playlists"]}
+        self._seq = base
+        replayed = 0
+        for rec in self._journal_records():
+            seq = int(rec.get("s", 0))
+            # Anything not above the last applied record is a duplicate.
+            if seq <= self._seq:
+                continue
+            self._seq = seq
+            op, pid = rec.get("op"), rec.get("id")
+            p = by_id.get(pid)
+            if op in TRACK_OPS and p is not None:
+                if p["tracks"] is None:
+                    p["tracks"], p["seq"] = self._read_shard(p["file"])
+                if seq <= p.get("seq", 0):
+                    continue
+            _apply_record(state, state["playlists"], rec)
+            if op == "create":
+                by_id[pid] = state["playlists"][-1]
+            if op in TRACK_OPS or op == "create":
+                self._dirty_shards.add(pid)
+            replayed += 1
+
+        root = self._sandbox_root()
         playlists: List[Playlist] = []
-        for p in raw.get("playlists", []):
-            tr = []
-            for t in p.get("tracks", []):
-                raw_path = t.get("path", "") or ""
-                if raw_path and not os.path.isabs(raw_path):
-                    raw_path = os.path.normpath(os.path.join(root, raw_path))
-
-                if raw_path and not os.path.exists(raw_path):
-                    alt = os.path.join(root, os.path.basename(raw_path))
-                    if os.path.exists(alt):
-                        raw_path = os.path.normpath(alt)
-
-                name = t.get("title") or os.path.splitext(os.path.basename(raw_path))[0]
-                if (os.sep in name) or name.lower().endswith(
-                    (".m4a", ".mp3", ".wav", ".flac", ".aac", ".ogg")
-                ):
-                    name = os.path.splitext(os.path.basename(name))[0]
-
-                dur = t.get("duration", 0.0)
-
-                thumb = t.get("thumb")
-                if thumb and not os.path.isabs(thumb):
-                    thumb_abs = os.path.normpath(os.path.join(root, thumb))
-                    thumb = thumb_abs if os.path.exists(thumb_abs) else thumb
-
-                if (not thumb) and raw_path:
-                    base, _ = os.path.splitext(raw_path)
-                    cand = f"{base}.jpg"
-                    if os.path.exists(cand):
-                        thumb = cand
-                    else:
-                        cand2 = os.path.join(root, f"{os.path.basename(base)}.jpg")
-                        if os.path.exists(cand2):
-                            thumb = cand2
-
-                tr.append(Track(title=name, path=raw_path, duration=dur, thumb=thumb))
-
-            pl = Playlist(
+        files: Dict[str, str] = {}
+        unloaded: Dict[str, str] = {}
+        for p in state["playlists"]:
+            pid = p["id"]
+            files[pid] = p.get("file") or self._new_shard_name(pid, files)
+            if p["tracks"] is None:
+                unloaded[pid] = files[pid]
+            playlists.append(
+                Playlist(
+                    id=pid,
+                    name=p.get("name", "Untitled"),
+                    tracks=_tracks_from_raw(p["tracks"] or [], root),
+                )
+            )
+
+        self._install(playlists, state)
+        self._files, self._unloaded = files, unloaded
+        self._journal_count = replayed
+        self._dirty = replayed > 0
+        if self._torn_at is not None:
+            self._drop_torn_tail(self._torn_at)
+
+    def _migrate_legacy(self, raw: dict) -> None:
+        """One-time move from the single-file layout to manifest + shards."""
+        raw.setdefault("playlists", [])
+        self._replay_legacy_journal(raw)
+        root = self._sandbox_root()
+        playlists = [
+            Playlist(
                 id=p.get("id", str(uuid.uuid4())),
                 name=p.get("name", "Untitled"),
-                tracks=tr,
+                tracks=_tracks_from_raw(p.get("tracks", []), root),
             )
-            playlists.append(pl)
+            for p in raw["playlists"]
+        ]
+        self._install(playlists, raw)
+        with contextlib.suppress(OSError):
+            shutil.copy2(self.storage_path, f"{self.storage_path}.v1.bak")
+        self.mark_dirty()
+        self.save()
 
-        self.create_and_save_playlist(playlists, raw)
+    def _load_shard(self, p: Playlist) -> None:
+        fname = self._unloaded.pop(p.id, None)
+        if fname is None:
+            return
+        root = self._sandbox_root()
+        if fname.endswith(COLUMNAR_EXT):
+            try:
+                shard = ColumnarShard(os.path.join(self.shard_dir, fname))
+            except (OSError, ValueError) as e:
+                print("[playlists] unreadable shard:", fname, e)
+                p.tracks = []
+            else:
+                p.tracks = LazyTrackList(
+                    shard,
+                    lambda row: _track_from_raw(dict(zip(_ROW_FIELDS, row)), root),
+                )
+        else:
+            tracks, _seq = self._read_shard(fname)
+            p.tracks = _tracks_from_raw(tracks, root)
+        self._paths.pop(p.id, None)
+
+    def _load_all(self) -> None:
+        for p in self.data["playlists"]:
+            self._load_shard(p)
+
+    def _read_shard(self, fname: Optional[str]):
+        if not fname:
+            return [], 0
+        path = os.path.join(self.shard_dir, fname)
+        if fname.endswith(COLUMNAR_EXT):
+            try:
+                shard = ColumnarShard(path)
+            except (OSError, ValueError):
+                return [], 0
+            rows = [dict(zip(_ROW_FIELDS, row)) for row in shard.rows()]
+            return rows, int(shard.meta.get("journal_seq", 0) or 0)
+        raw = _read_json(path)
+        return raw.get("tracks") or [], int(raw.get("journal_seq", 0) or 0)
+
+    @staticmethod
+    def _new_shard_name(pid: str, taken: Dict[str, str], suffix: str = ".json") -> str:
+        stem = safe_filename(str(pid), default_prefix="playlist", max_len=64)
+        used = set(taken.values())
+        name, n = f"{stem}{suffix}", 1
+        while name in used:
+            n += 1
+            name = f"{stem}_{n}{suffix}"
+        return name
+
+    def _shard_name(self, p: Playlist) -> str:
+        """
+        File name for the next write of `p`. Columnar shards get a new name
+        per write (the old one may still be memory-mapped); the manifest
+        switches over and the old file is cleaned up afterwards.
+        """
+        others = {k: v for k, v in self._files.items() if k != p.id}
+        if self.shard_format == "columnar":
+            return self._new_shard_name(f"{p.id}-{self._seq}", others, COLUMNAR_EXT)
+        fname = self._files[p.id]
+        return fname if fname.endswith(".json") else self._new_shard_name(p.id, others)
+
+    def _write_shard(self, fname: str, meta: dict, tracks, to_rel) -> None:
+        """Write one shard in the format its file name says."""
+        path = os.path.join(self.shard_dir, fname)
+        if fname.endswith(COLUMNAR_EXT):
+
+            def to_row(t):
+                return (t.title, to_rel(t.path), t.duration, to_rel(t.thumb))
+
+            rows = (
+                tracks.raw_rows(to_row)
+                if isinstance(tracks, LazyTrackList)
+                else (to_row(t) for t in tracks)
+            )
+            write_columns(path, meta, rows)
+        else:
+            _write_json_atomic(
+                path,
+                dict(meta, tracks=[self._track_record(t, to_rel) for t in tracks]),
+            )
 
     def create_and_save_playlist(self, playlists, raw):
+        self._install(playlists, raw)
+        self._dirty = True
+        self.save()
+
+    def _install(self, playlists, raw):
         self.data["playlists"] = playlists
+        self._unloaded = {}
+        self._reindex()
         pid = raw.get("active_playlist_id")
-        self.data["active_playlist_id"] = (
-            pid if any(p.id == pid for p in playlists) else None
-        )
-        self.save()
+        self.data["active_playlist_id"] = pid if pid in self._by_id else None
+
+    def _reindex(self) -> None:
+        """Rebuild the id map; per-playlist path indexes are rebuilt lazily."""
+        self._by_id = {p.id: p for p in self.data["playlists"]}
+        self._paths.clear()
+        self._notify(RELOADED)
+
+    def _sandbox_root(self) -> str:
+        if self._root is None:
+            self._root = get_app_writable_dir("Downloaded/Played")
+        return self._root
+
+    def _path_key(self, pth: Optional[str]) -> Optional[str]:
+        """Normcased absolute path; rel paths resolve under the sandbox."""
+        if not pth:
+            return None
+        np = os.path.normpath(pth)
+        if not os.path.isabs(np):
+            np = os.path.join(self._sandbox_root(), np)
+        return os.path.normcase(os.path.normpath(np))
+
+    def _path_index(self, p: Playlist) -> _PathIndex:
+        idx = self._paths.get(p.id)
+        if idx is None or len(idx.keys) != len(p.tracks):
+            tracks = p.tracks
+            paths = (
+                tracks.paths()
+                if isinstance(tracks, LazyTrackList)
+                else (getattr(t, "path", "") for t in tracks)
+            )
+            idx = self._paths[p.id] = _PathIndex([self._path_key(x) for x in paths])
+        return idx
+
+    def index_of(self, pid: str, path: str) -> Optional[int]:
+        """Position of `path` in playlist `pid`, or None."""
+        p = self._find(pid)
+        if not p:
+            return None
+        key = self._path_key(path)
+        return self._path_index(p).pos.get(key) if key else None
 
     def save(self) -> None:
         """
         Save playlists with media/cover paths stored as RELATIVE paths
         (when they live under the current sandbox), so they remain valid
         across reinstalls/updates that change the sandbox root.
+        Only changed shards are rewritten, then the manifest; a no-op when
+        nothing changed since the last save.
         """
+        if not self._dirty and os.path.exists(self.storage_path):
+            return
+        snap = self._snapshot()
+        if self._writer is not None:
+            self._writer.submit("snap", snap)
+        else:
+            self._write_snapshot(snap)
+
+    def _snapshot(self) -> tuple:
+        """
+        Capture what save() writes, on the calling thread: file names are
+        assigned and dirty flags cleared here; the track lists are copied
+        when a writer thread will serialize them later.
+        """
+        copy = self._writer is not None
+        shards: Dict[str, tuple] = {}
+        for p in self.data["playlists"]:
+            if p.id not in self._files:
+                self._files[p.id] = self._new_shard_name(p.id, self._files)
+                self._dirty_shards.add(p.id)
+            if p.id in self._unloaded or p.id not in self._dirty_shards:
+                continue
+            fname = self._shard_name(p)
+            self._files[p.id] = fname
+            tracks = p.tracks
+            if copy:
+                tracks = tracks.copy() if isinstance(tracks, LazyTrackList) else list(tracks)
+            meta = {"id": p.id, "name": p.name, "journal_seq": self._seq}
+            shards[p.id] = (fname, meta, tracks)
+
+        live = {p.id for p in self.data["playlists"]}
+        self._files = {pid: f for pid, f in self._files.items() if pid in live}
+        manifest = {
+            "layout": LAYOUT_VERSION,
+            "journal_seq": self._seq,
+            "active_playlist_id": self.data["active_playlist_id"],
+            "playlists": [
+                {"id": p.id, "name": p.name, "file": self._files[p.id]}
+                for p in self.data["playlists"]
+            ],
+        }
+        self._journal_count = 0
+        self._dirty = False
+        self._dirty_shards.clear()
+        return shards, manifest, set(self._files.values())
+
+    def _write_snapshot(self, snap: tuple) -> None:
+        """Shards, then the manifest, then orphan cleanup and journal truncate."""
+        shards, manifest, keep = snap
+        to_rel = self._rel_mapper()
+        os.makedirs(self.shard_dir, exist_ok=True)
+        for fname, meta, tracks in shards.values():
+            self._write_shard(fname, meta, tracks, to_rel)
+        _write_json_atomic(self.storage_path, manifest, indent=2)
+        with contextlib.suppress(OSError):
+            for fn in os.listdir(self.shard_dir):
+                if fn.endswith((".json", COLUMNAR_EXT)) and fn not in keep:
+                    os.remove(os.path.join(self.shard_dir, fn))
+        with contextlib.suppress(OSError):
+            open(self.journal_path, "w").close()
+
+    @staticmethod
+    def _rel_mapper():
         root = get_app_writable_dir("Downloaded/Played")
         root_norm = os.path.normcase(os.path.normpath(root))
+        # Tracks share a handful of directories, so relpath runs once per
+        # directory instead of once per path.
+        rel_dirs: Dict[str, Optional[str]] = {}
 
-        def _to_rel(pth: Optional[str]) -> Optional[str]:
-            if not pth:
-                return pth
+        def _rel_dir(head: str) -> Optional[str]:
+            """Directory relative to the sandbox root, or None if outside."""
             try:
-                np = os.path.normpath(pth)
-                if (
-                    os.path.normcase(np).startswith(root_norm + os.sep)
-                    or os.path.normcase(np) == root_norm
-                ):
+                np = os.path.normpath(head)
+                np_norm = os.path.normcase(np)
+                if np_norm == root_norm:
+                    return ""
+                if np_norm.startswith(root_norm + os.sep):
                     return os.path.relpath(np, root)
-                return pth
             except Exception:
+                pass
+            return None
+
+        def _to_rel(pth: Optional[str]) -> Optional[str]:
+            if not pth:
                 return pth
+            head, tail = os.path.split(pth)
+            rel = rel_dirs.get(head, _to_rel)
+            if rel is _to_rel:
+                rel = rel_dirs[head] = _rel_dir(head)
+            if rel is None or not tail:
+                return pth
+            return os.path.join(rel, tail) if rel else tail
 
-        serial = {
-            "playlists": [],
-            "active_playlist_id": self.data["active_playlist_id"],
+        return _to_rel
+
+    @staticmethod
+    def _track_record(t: Track, to_rel) -> dict:
+        """Serialize directly from the slots (no asdict deep copy)."""
+        return {
+            "title": t.title,
+            "path": to_rel(t.path),
+            "duration": t.duration,
+            "thumb": to_rel(t.thumb),
         }
-        for p in self.data["playlists"]:
-            tracks = []
-            for t in p.tracks:
-                td = asdict(t)
-                td["path"] = _to_rel(td.get("path"))
-                td["thumb"] = _to_rel(td.get("thumb"))
-                tracks.append(td)
-            serial["playlists"].append({"id": p.id, "name": p.name, "tracks": tracks})
-
-        tmp = f"{self.storage_path}.tmp"
-        os.makedirs(os.path.dirname(self.storage_path), exist_ok=True)
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(serial, f, ensure_ascii=False, indent=2)
+
+    # ---------- journal ----------
+    def _journal(self, op: str, **fields) -> None:
+        """Append one mutation record; compacts into a snapshot when due."""
+        self._seq += 1
+        self._dirty = True
+        if op in TRACK_OPS or op == "create":
+            self._dirty_shards.add(fields.get("id"))
+        rec = dict(fields, op=op, s=self._seq)
+        line = json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n"
+        if self._batch_depth:
+            self._batch_lines.append(line)
+        else:
+            self._append_lines([line])
+
+    def _append_lines(self, lines: List[str]) -> None:
+        if self._writer is not None:
+            if self._writer.failed:
+                # An earlier background append was lost; a snapshot covers it.
+                self._writer.failed = False
+                self.mark_dirty()
+                self.save()
+            self._writer.submit("lines", lines)
+        else:
+            try:
+                self._write_journal(lines)
+            except OSError as e:
+                print("[playlists] journal append failed, writing snapshot:", e)
+                self.save()
+                return
+        self._journal_count += len(lines)
+        if self._journal_count >= COMPACT_EVERY:
+            self.save()
+
+    def _write_journal(self, lines: List[str]) -> None:
+        os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write("".join(lines))
             f.flush()
             os.fsync(f.fileno())
-        os.replace(tmp, self.storage_path)
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Group edits into a single journal append (one write, one fsync):
+            with pm.batch():
+                pm.remove_indices(pid, [3, 7])
+                pm.insert_tracks(pid, paths, position=0)
+        Edits are applied in memory immediately; what was applied is
+        persisted even if the block raises. Batches may nest.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and self._batch_lines:
+                lines, self._batch_lines = self._batch_lines, []
+                self._append_lines(lines)
+
+    def _journal_records(self):
+        """
+        Journal records in order. A torn or unreadable line (including a
+        last line without its newline) ends the replay, and its byte offset
+        is left in _torn_at.
+        """
+        self._torn_at = None
+        if not os.path.exists(self.journal_path):
+            return
+        try:
+            with open(self.journal_path, "rb") as f:
+                good = 0
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("torn line")
+                        rec = json.loads(line)
+                    except ValueError:
+                        self._torn_at = good
+                        return
+                    good += len(line)
+                    yield rec
+        except OSError as e:
+            print("[playlists] journal replay failed:", e)
+
+    def _drop_torn_tail(self, size: int) -> None:
+        """
+        Cut the journal back to its last whole record. Appends would
+        otherwise land after the torn line, and every later replay would
+        stop before them. If the cut fails, compact instead.
+        """
+        print("[playlists] dropping a torn journal tail at byte", size)
+        try:
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(size)
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            print("[playlists] journal truncate failed, writing snapshot:", e)
+            self.mark_dirty()
+            self.save()
+
+    def _replay_legacy_journal(self, raw: dict) -> None:
+        """Apply records newer than a single-file snapshot to its raw dict."""
+        base = int(raw.get("journal_seq", 0) or 0)
+        self._seq = base
+        for rec in self._journal_records():
+            seq = int(rec.get("s", 0))
+            if seq > self._seq:
+                _apply_record(raw, raw["playlists"], rec)
+                self._seq = seq
 
     def _find(self, pid: str) -> Optional[Playlist]:
-        return next((p for p in self.data["playlists"] if p.id == pid), None)
+        p = self._by_id.get(pid)
+        if p is None and len(self._by_id) != len(self.data["playlists"]):
+            # data["playlists"] was replaced or appended to directly.
+            self._reindex()
+            p = self._by_id.get(pid)
+        if p is not None and pid in self._unloaded:
+            self._load_shard(p)
+        return p
 
     def list_playlists(self) -> List[Playlist]:
+        """Playlists for listing; tracks of unopened ones may not be loaded."""
         return list(self.data["playlists"])
 
     def active_playlist(self) -> Optional[Playlist]:
@@ -201,47 +911,68 @@ class PlaylistManager:
         return self._find(pid) if pid else None
 
     def set_active(self, pid: str) -> None:
+        if self.data.get("active_playlist_id") == pid:
+            return
         if self._find(pid):
             self.data["active_playlist_id"] = pid
-            self.save()
+            self._journal("active", id=pid)
+            self._notify(ACTIVE_CHANGED, pid)
 
     def clear_active(self) -> None:
+        if self.data.get("active_playlist_id") is None:
+            return
         self.data["active_playlist_id"] = None
-        self.save()
+        self._journal("active", id=None)
+        self._notify(ACTIVE_CHANGED)
 
     def create_playlist(self, name: str) -> str:
         pid = str(uuid.uuid4())
         self.data["playlists"].append(Playlist(id=pid, name=name, tracks=[]))
-        self.save()
+        self._by_id[pid] = self.data["playlists"][-1]
+        self._journal("create", id=pid, name=name)
+        self._notify(PLAYLIST_ADDED, pid)
         return pid
 
     def rename_playlist(self, pid: str, new_name: str) -> None:
         if p := self._find(pid):
-            p.name = (new_name or "").strip() or p.name
-            self.save()
+            name = (new_name or "").strip() or p.name
+            if name == p.name:
+                return
+            p.name = name
+            self._journal("rename", id=pid, name=p.name)
+            self._notify(PLAYLIST_RENAMED, pid)
 
     def delete_playlist(self, pid: str) -> None:
+        if pid not in self._by_id:
+            return
         self.data["playlists"] = [p for p in self.data["playlists"] if p.id != pid]
-        if self.data.get("active_playlist_id") == pid:
-            self.data["active_playlist_id"] = None
+        self._by_id.pop(pid, None)
+        self._paths.pop(pid, None)
+        self._unloaded.pop(pid, None)
+        self._track_versions.pop(pid, None)
+        self._journal("delete", id=pid)
+        self._notify(PLAYLIST_REMOVED, pid)
         self.clear_active()
-        self.save()
 
     def add_tracks(self, pid: str, paths: List[str]) -> None:
+        self.insert_tracks(pid, paths)
+
+    def insert_tracks(
+        self, pid: str, paths: List[str], position: Optional[int] = None
+    ) -> int:
+        """
+        Add `paths` (skipping ones already present) at `position`, or at the
+        end when None. Returns the number of tracks inserted.
+        """
         p = self._find(pid)
         if not p:
-            return
+            return 0
+        at_end = position is None or position >= len(p.tracks)
+        position = len(p.tracks) if at_end else max(0, int(position))
 
-        root = get_app_writable_dir("Downloaded/Played")
+        root = self._sandbox_root()
         root_norm = os.path.normcase(os.path.normpath(root))
 
-        def _abs_norm(pth: str) -> str:
-            """Return a normcased absolute path; resolve rel paths under sandbox."""
-            np = os.path.normpath(pth or "")
-            if np and not os.path.isabs(np):
-                np = os.path.join(root, np)
-            return os.path.normcase(os.path.normpath(np))
-
         def _to_rel_if_in_sandbox(pth: str) -> str:
             try:
                 np = os.path.normpath(pth)
@@ -252,13 +983,9 @@ class PlaylistManager:
             except Exception:
                 return pth
 
-        existing = {
-            _abs_norm(getattr(t, "path", ""))
-            for t in p.tracks
-            if getattr(t, "path", "")
-        }
-        seen_batch = set()
-        added_any = False
+        index = self._path_index(p)
+        batch_keys = set()
+        added = []
 
         for path in paths or []:
             if not path:
@@ -269,8 +996,8 @@ class PlaylistManager:
             safe_name = safe_filename(name_wo_ext)
             title = safe_name
 
-            key = _abs_norm(path)
-            if not key or key in existing or key in seen_batch:
+            key = self._path_key(path)
+            if not key or key in index.pos or key in batch_keys:
                 continue
 
             rel_or_abs = _to_rel_if_in_sandbox(path)
@@ -282,19 +1009,70 @@ class PlaylistManager:
                 if os.path.exists(cand):
                     thumb = _to_rel_if_in_sandbox(cand)
 
-            p.tracks.append(Track(title=title, path=rel_or_abs, thumb=thumb))
-            existing.add(key)
-            seen_batch.add(key)
-            added_any = True
-
-        if added_any:
-            self.save()
+            track = Track(title=title, path=rel_or_abs, thumb=thumb)
+            if at_end:
+                p.tracks.append(track)
+                index.append(key)
+            batch_keys.add(key)
+            added.append(track)
+
+        if not added:
+            return 0
+        if not at_end:
+            p.tracks[position:position] = added
+            self._paths.pop(pid, None)
+        to_rel = self._rel_mapper()
+        records = [self._track_record(t, to_rel) for t in added]
+        if at_end:
+            self._journal("add", id=pid, tracks=records)
+        else:
+            self._journal("insert", id=pid, index=position, tracks=records)
+        self._notify(TRACKS_INSERTED, pid, index=position, count=len(added))
+        return len(added)
 
     def remove_track(self, pid: str, index: int) -> None:
         p = self._find(pid)
         if p and 0 <= index < len(p.tracks):
+            path_index = self._path_index(p)
             p.tracks.pop(index)
-            self.save()
+            path_index.pop(index)
+            self._journal("remove", id=pid, index=index)
+            self._notify(TRACKS_REMOVED, pid, indices=(index,))
+
+    def remove_indices(self, pid: str, indices: Iterable[int]) -> int:
+        """Remove several tracks at once; out-of-range indices are ignored."""
+        p = self._find(pid)
+        if not p:
+            return 0
+        n = len(p.tracks)
+        drop = sorted({int(i) for i in indices if 0 <= int(i) < n})
+        if not drop:
+            return 0
+        gone = set(drop)
+        p.tracks[:] = [t for i, t in enumerate(p.tracks) if i not in gone]
+        self._paths.pop(pid, None)
+        self._journal("remove_many", id=pid, indices=drop)
+        self._notify(TRACKS_REMOVED, pid, indices=tuple(drop))
+        return len(drop)
+
+    def apply_permutation(self, pid: str, order: List[int]) -> bool:
+        """
+        Reorder so that new position i holds the track previously at
+        order[i]. `order` must be a permutation of range(len(tracks)).
+        """
+        p = self._find(pid)
+        if not p:
+            return False
+        order = [int(i) for i in order]
+        if len(order) != len(p.tracks) or set(order) != set(range(len(order))):
+            raise ValueError("order is not a permutation of the playlist")
+        if order == list(range(len(order))):
+            return False
+        p.tracks[:] = [p.tracks[i] for i in order]
+        self._paths.pop(pid, None)
+        self._journal("permute", id=pid, order=order)
+        self._notify(TRACKS_REORDERED, pid, order=tuple(order))
+        return True
 
     def move_track(self, pid: str, from_idx: int, to_idx: int) -> None:
         p = self._find(pid)
@@ -302,9 +1080,12 @@ class PlaylistManager:
             return
         tracks = p.tracks
         if 0 <= from_idx < len(tracks) and 0 <= to_idx < len(tracks):
+            path_index = self._path_index(p)
             item = tracks.pop(from_idx)
             tracks.insert(to_idx, item)
-            self.save()
+            path_index.move(from_idx, to_idx)
+            self._journal("move", id=pid, src=from_idx, dst=to_idx)
+            self._notify(TRACKS_MOVED, pid, index=from_idx, dst=to_idx)
 
     def _looks_like_playlist_json(self, name: str) -> bool:
         n = (name or "").lower()
@@ -425,8 +1206,135 @@ class PlaylistManager:
         return out
 
 
+def _read_json(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    except Exception:
+        return {}
+    return raw if isinstance(raw, dict) else {}
+
+
+def _write_json_atomic(path: str, data: dict, indent: Optional[int] = None) -> None:
+    tmp = f"{path}.tmp"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _tracks_from_raw(raw_tracks: list, root: str) -> List[Track]:
+    """Build Track objects from stored dicts; paths are joined, not checked."""
+    return [_track_from_raw(t, root) for t in raw_tracks]
+
+
+def _track_from_raw(t: dict, root: str) -> Track:
+    raw_path = t.get("path", "") or ""
+    if raw_path and not os.path.isabs(raw_path):
+        raw_path = os.path.normpath(os.path.join(root, raw_path))
+
+    name = t.get("title") or os.path.splitext(os.path.basename(raw_path))[0]
+    if (os.sep in name) or name.lower().endswith(AUDIO_EXTS):
+        name = os.path.splitext(os.path.basename(name))[0]
+
+    thumb = t.get("thumb")
+    if thumb and not os.path.isabs(thumb):
+        thumb = os.path.normpath(os.path.join(root, thumb))
+
+    return Track(
+        title=name,
+        path=raw_path,
+        duration=t.get("duration", 0.0),
+        thumb=thumb,
+    )
+
+
+def _resolve_paths(path: Optional[str], thumb: Optional[str], root: str):
+    """
+    Check a stored path and cover against the disk: fall back to the same
+    basename under the sandbox when the path is gone, and find a sibling
+    .jpg when no cover is recorded.
+    """
+    if path and not os.path.exists(path):
+        alt = os.path.join(root, os.path.basename(path))
+        if os.path.exists(alt):
+            path = os.path.normpath(alt)
+    if thumb and not os.path.exists(thumb):
+        thumb = None
+    if not thumb and path:
+        base, _ = os.path.splitext(path)
+        cand = f"{base}.jpg"
+        if os.path.exists(cand):
+            thumb = cand
+        else:
+            cand2 = os.path.join(root, f"{os.path.basename(base)}.jpg")
+            if os.path.exists(cand2):
+                thumb = cand2
+    return path, thumb
+
+
+def _track_dict(t: Track) -> dict:
+    return {
+        "title": t.title,
+        "path": t.path,
+        "duration": t.duration,
+        "thumb": t.thumb,
+    }
+
+
+def _apply_record(raw: dict, playlists: list, rec: dict) -> None:
+    """Replay one journal record onto a raw (snapshot-shaped) dict."""
+    op = rec.get("op")
+    pid = rec.get("id")
+    if op == "active":
+        raw["active_playlist_id"] = pid
+        return
+    if op == "create":
+        playlists.append({"id": pid, "name": rec.get("name", "Untitled"), "tracks": []})
+        return
+    p = next((x for x in playlists if x.get("id") == pid), None)
+    if op == "delete":
+        if p is not None:
+            playlists.remove(p)
+        return
+    if p is None:
+        return
+    tracks = p.setdefault("tracks", [])
+    if op == "rename":
+        p["name"] = rec.get("name") or p.get("name")
+    elif op == "add":
+        tracks.extend(rec.get("tracks") or [])
+    elif op == "insert":
+        idx = max(0, min(len(tracks), int(rec.get("index", len(tracks)))))
+        tracks[idx:idx] = rec.get("tracks") or []
+    elif op == "remove_many":
+        gone = {int(i) for i in rec.get("indices") or []}
+        tracks[:] = [t for i, t in enumerate(tracks) if i not in gone]
+    elif op == "permute":
+        order = [int(i) for i in rec.get("order") or []]
+        if sorted(order) == list(range(len(tracks))):
+            tracks[:] = [tracks[i] for i in order]
+    elif op == "remove":
+        idx = int(rec.get("index", -1))
+        if 0 <= idx < len(tracks):
+            tracks.pop(idx)
+    elif op == "move":
+        src, dst = int(rec.get("src", -1)), int(rec.get("dst", -1))
+        if 0 <= src < len(tracks) and 0 <= dst < len(tracks):
+            tracks.insert(dst, tracks.pop(src))
+
+
 def _pm_export_dict(self) -> dict:
     data = self.to_dict()
+    # Exports carry the disk-checked paths that load() used to produce.
+    root = get_app_writable_dir(DEFAULT_REL_SUBDIR)
+    for p in data["playlists"]:
+        for t in p["tracks"]:
+            t["path"], t["thumb"] = _resolve_paths(t["path"], t["thumb"], root)
     with contextlib.suppress(Exception):
         data.setdefault("meta", {})
         data["meta"]["schema"] = "youtube-music-player.playlists.v1"
@@ -451,6 +1359,7 @@ def _pm_import_from_dict(self, raw: dict, merge: bool = False) -> None:
 
     if not merge:
         return self.load_from_dict(raw)
+    self._load_all()
 
     incoming: List[Playlist] = []
     for p in raw.get("playlists", []):
@@ -508,6 +1417,8 @@ def _pm_import_from_dict(self, raw: dict, merge: bool = False) -> None:
         pid = raw.get("active_playlist_id")
         if pid and any(p.id == pid for p in self.data["playlists"]):
             self.data["active_playlist_id"] = pid
+    self._reindex()
+    self.mark_dirty()
     self.save()
 
 
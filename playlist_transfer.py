@@ -0,0 +1,338 @@
+from __future__ import annotations
+
+import contextlib
+import itertools
+import json
+import random
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+# Payload bytes per /playlist_chunk datagram; far below the ~64 KiB UDP limit
+# so OSC framing and small receive buffers are never an issue.
+CHUNK_BYTES = 8192
+# Chunks sent back-to-back before the sender yields, so a burst cannot
+# overrun the receiver's socket buffer on localhost.
+CHUNK_BURST = 16
+CHUNK_PAUSE_S = 0.002
+ACK_TIMEOUT_S = 2.0
+MAX_ATTEMPTS = 3
+STALE_TRANSFER_S = 30.0
+
+
+def encode_playlist(names: List[str]) -> bytes:
+    return json.dumps(list(names), ensure_ascii=False, separators=(",", ":")).encode(
+        "utf-8"
+    )
+
+
+def decode_playlist(payload) -> List[str]:
+    """
+    Single-pass decoder for whatever arrives on /playlist: an OSC arg tuple,
+    bytes/blob, a JSON array string, or a bare single name.
+    """
+    while isinstance(payload, (list, tuple)):
+        if len(payload) != 1:
+            return [str(x) for x in payload]
+        payload = payload[0]
+    if isinstance(payload, (bytes, bytearray)):
+        payload = bytes(payload).decode("utf-8", "ignore")
+    s = str(payload).strip()
+    if not s:
+        return []
+    if s[0] != "[":
+        return [s]
+    try:
+        val = json.loads(s)
+    except ValueError:
+        return []
+    return [str(x) for x in val] if isinstance(val, list) else []
+
+
+def decode_transfer(data: bytes) -> List[str]:
+    """
+    Strict decoder for a completed chunked transfer (always an
+    encode_playlist JSON array). Raises ValueError for anything else,
+    so a bad payload is never mistaken for an empty playlist.
+    """
+    val = json.loads(bytes(data).decode("utf-8"))
+    if not isinstance(val, list):
+        raise ValueError("playlist transfer is not a JSON array")
+    return [str(x) for x in val]
+
+
+def checksum(data: bytes) -> str:
+    return f"{zlib.crc32(data) & 0xFFFFFFFF:08x}"
+
+
+def diff_playlist(old: List[str], new: List[str]) -> Optional[list]:
+    """
+    Describe old -> new as at most one delta op:
+        ["insert", index, [names]]
+        ["remove", index, count]
+        ["move", from_index, to_index]
+        ["replace", index, count, [names]]
+    Returns [] when unchanged and None when a full transfer is cheaper.
+    """
+    if old == new:
+        return []
+    n, m = len(old), len(new)
+    lim = min(n, m)
+    p = 0
+    while p < lim and old[p] == new[p]:
+        p += 1
+    s = 0
+    while s < lim - p and old[n - 1 - s] == new[m - 1 - s]:
+        s += 1
+    o_mid, n_mid = old[p : n - s], new[p : m - s]
+    if not o_mid:
+        op = ["insert", p, n_mid]
+    elif not n_mid:
+        return ["remove", p, len(o_mid)]
+    elif len(o_mid) > 1 and len(o_mid) == len(n_mid):
+        last = p + len(o_mid) - 1
+        if o_mid[0] == n_mid[-1] and o_mid[1:] == n_mid[:-1]:
+            return ["move", p, last]
+        if o_mid[-1] == n_mid[0] and o_mid[:-1] == n_mid[1:]:
+            return ["move", last, p]
+        op = ["replace", p, len(o_mid), n_mid]
+    else:
+        op = ["replace", p, len(o_mid), n_mid]
+    if sum(len(x) for x in n_mid) > CHUNK_BYTES // 2:
+        return None
+    return op
+
+
+def apply_playlist_op(items: List[str], op, normalize=None) -> None:
+    """
+    Apply a diff_playlist op to `items` in place. Every op is a single slice
+    assignment, so readers on other threads never see a half-applied change.
+    Raises ValueError for malformed or out-of-range ops (before mutating).
+    """
+    if not op:
+        return
+    kind, n = op[0], len(items)
+    if kind == "move":
+        a, b = int(op[1]), int(op[2])
+        if not (0 <= a < n and 0 <= b < n):
+            raise ValueError(f"move out of range: {op!r}")
+        if a < b:
+            items[a : b + 1] = items[a + 1 : b + 1] + [items[a]]
+        elif a > b:
+            items[b : a + 1] = [items[a]] + items[b:a]
+        return
+    if kind == "insert":
+        i, count, names = int(op[1]), 0, op[2]
+    elif kind == "remove":
+        i, count, names = int(op[1]), int(op[2]), []
+    elif kind == "replace":
+        i, count, names = int(op[1]), int(op[2]), op[3]
+    else:
+        raise ValueError(f"unknown playlist op: {kind!r}")
+    if not (0 <= i <= n and 0 <= count <= n - i) or not isinstance(names, list):
+        raise ValueError(f"playlist op out of range: {op!r}")
+    if normalize is not None:
+        names = [normalize(str(x)) for x in names]
+    items[i : i + count] = names
+
+
+def playlist_op_delta(items: List[str], op, normalize=None) -> tuple:
+    """
+    (removed names, added names) for an op about to be applied to `items`;
+    moves change neither. Call it before apply_playlist_op, and use the
+    result only if that succeeds (it does the range checks).
+    """
+    if not op or op[0] == "move":
+        return [], []
+    i = int(op[1])
+    if op[0] == "insert":
+        count, names = 0, op[2]
+    elif op[0] == "remove":
+        count, names = int(op[2]), []
+    else:
+        count, names = int(op[2]), op[3]
+    if normalize is not None:
+        names = [normalize(str(x)) for x in names]
+    return items[i : i + count], list(names)
+
+
+def split_chunks(data: bytes, chunk_bytes: int = CHUNK_BYTES) -> List[bytes]:
+    if not data:
+        return [b""]
+    return [data[i : i + chunk_bytes] for i in range(0, len(data), chunk_bytes)]
+
+
+class _Transfer:
+    __slots__ = ("total", "crc", "parts", "received", "updated")
+
+    def __init__(self, total: int, crc: str):
+        self.total = total
+        self.crc = crc
+        self.parts: List[Optional[bytes]] = [None] * total
+        self.received = 0
+        self.updated = time.monotonic()
+
+
+class PlaylistReassembler:
+    """
+    Service side of the chunked transfer.
+    Usage:
+        status, result = r.add(tid, seq, total, crc, chunk)
+    status is one of:
+        "partial"  - still waiting for chunks (result None)
+        "missing"  - last chunk seen but gaps remain (result = missing seqs)
+        "done"     - complete and checksum ok (result = payload bytes;
+                     decode with decode_playlist off the receive thread)
+        "corrupt"  - complete but checksum mismatch (result None)
+        "duplicate" - late/resent chunk of an already completed transfer
+    """
+
+    def __init__(self, max_pending: int = 4):
+        self._lock = threading.Lock()
+        self._pending: Dict[int, _Transfer] = {}
+        self._completed: deque = deque(maxlen=16)
+        self._max_pending = max(1, max_pending)
+
+    def add(self, tid: int, seq: int, total: int, crc: str, chunk: bytes):
+        tid, seq, total = int(tid), int(seq), int(total)
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        with self._lock:
+            if tid in self._completed:
+                return "duplicate", None
+            self._expire()
+            tr = self._pending.get(tid)
+            if tr is None or tr.total != total or tr.crc != crc:
+                tr = self._pending[tid] = _Transfer(total, crc)
+                while len(self._pending) > self._max_pending:
+                    self._pending.pop(min(self._pending))
+            if not 0 <= seq < tr.total:
+                return "partial", None
+            if tr.parts[seq] is None:
+                tr.parts[seq] = bytes(chunk)
+                tr.received += 1
+            tr.updated = time.monotonic()
+            if tr.received < tr.total:
+                if seq == tr.total - 1:
+                    return "missing", [i for i, p in enumerate(tr.parts) if p is None]
+                return "partial", None
+            del self._pending[tid]
+            data = b"".join(tr.parts)
+            if checksum(data) != tr.crc:
+                # Not completed: a full resend under the same id must be
+                # reassembled again, not acked as a duplicate.
+                return "corrupt", None
+            self._completed.append(tid)
+        return "done", data
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - STALE_TRANSFER_S
+        for tid in [t for t, tr in self._pending.items() if tr.updated < cutoff]:
+            del self._pending[tid]
+
+
+class PlaylistSender:
+    """
+    GUI side: sends a payload as sequence-numbered chunks from a background
+    thread and retransmits on /playlist_nack or when no ack arrives.
+    Usage:
+        sender = PlaylistSender(lambda addr, args: client.send_message(addr, args))
+        sender.send(encode_playlist(names))
+        # OSC handlers:
+        sender.on_ack(tid) / sender.on_nack(tid, "3,7,8")
+    Only the newest transfer is tracked; starting a new one supersedes it.
+    """
+
+    def __init__(self, send_fn: Callable[[str, list], None]):
+        self._send_fn = send_fn
+        # Random start: a restarted GUI must not reuse ids the service still
+        # holds as completed. 30 bits leave room to count up within an OSC
+        # int32, and 0 stays free to mean "no version".
+        self._ids = itertools.count(random.getrandbits(30) + 1)
+        self._lock = threading.Lock()
+        self._current = None
+        self._timer: Optional[threading.Timer] = None
+
+    def send(self, data: bytes) -> int:
+        chunks = split_chunks(data)
+        tid = next(self._ids)
+        with self._lock:
+            self._current = (tid, chunks, checksum(data), 1)
+            self._arm_timer(tid)
+        self._spawn(tid, range(len(chunks)))
+        return tid
+
+    def next_id(self) -> int:
+        """A fresh id from the transfer sequence, used as a playlist version."""
+        return next(self._ids)
+
+    def on_ack(self, tid) -> None:
+        with self._lock:
+            if self._current and self._current[0] == int(tid):
+                self._current = None
+                self._cancel_timer()
+
+    def on_nack(self, tid, missing="") -> None:
+        """Resend the listed seqs, or the whole transfer when none are listed."""
+        with self._lock:
+            cur = self._current
+            if not cur or cur[0] != int(tid):
+                return
+            _tid, chunks, crc, attempt = cur
+            if attempt >= MAX_ATTEMPTS:
+                self._current = None
+                self._cancel_timer()
+                print(f"[playlist-transfer] giving up on transfer {tid}")
+                return
+            self._current = (_tid, chunks, crc, attempt + 1)
+            self._arm_timer(_tid)
+        seqs = []
+        with contextlib.suppress(ValueError):
+            seqs = [int(x) for x in str(missing).split(",") if x.strip()]
+        seqs = [s for s in seqs if 0 <= s < len(chunks)] or range(len(chunks))
+        self._spawn(int(tid), seqs)
+
+    def _spawn(self, tid: int, seqs) -> None:
+        threading.Thread(
+            target=self._send_seqs, args=(tid, list(seqs)), daemon=True
+        ).start()
+
+    def _send_seqs(self, tid: int, seqs: List[int]) -> None:
+        with self._lock:
+            cur = self._current
+        if not cur or cur[0] != tid:
+            return
+        _tid, chunks, crc, _attempt = cur
+        total = len(chunks)
+        # The last chunk goes out last so the receiver can report gaps.
+        ordered = sorted(seqs)
+        for n, seq in enumerate(ordered, 1):
+            with self._lock:
+                if not self._current or self._current[0] != tid:
+                    return
+            try:
+                self._send_fn("/playlist_chunk", [tid, seq, total, crc, chunks[seq]])
+            except Exception as e:
+                print("[playlist-transfer] send failed:", e)
+                return
+            if n % CHUNK_BURST == 0:
+                time.sleep(CHUNK_PAUSE_S)
+        if total - 1 not in ordered:
+            with contextlib.suppress(Exception):
+                self._send_fn(
+                    "/playlist_chunk", [tid, total - 1, total, crc, chunks[-1]]
+                )
+
+    def _arm_timer(self, tid: int) -> None:
+        """Retry the whole transfer if nothing is acknowledged (lock held)."""
+        self._cancel_timer()
+        self._timer = threading.Timer(ACK_TIMEOUT_S, self.on_nack, args=(tid,))
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
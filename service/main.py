@@ -1,9 +1,7 @@
-import ast
 import contextlib
 import json
 import os
 import os.path
-import random
 import threading
 import time as _time
 from urllib.parse import urlparse
@@ -11,8 +9,24 @@ from urllib.parse import urlparse
 import requests
 import yt_dlp
 from yt_dlp import DownloadError
+from yt_dlp.utils import DownloadCancelled
 
 import utils
+from command_lanes import CommandDispatcher
+from download_queue import DEFAULT_WORKERS, DownloadQueue
+from library_index import LibraryIndex
+from play_history import PlayHistory
+from play_order import PlayOrder
+from shuffle_bag import ShuffleBag
+from smart_shuffle import SmartShuffle
+from playback_metrics import GapMeter, WakeupCounter
+from playlist_transfer import (
+    PlaylistReassembler,
+    apply_playlist_op,
+    decode_playlist,
+    decode_transfer,
+    playlist_op_delta,
+)
 from utils import get_app_writable_dir
 
 if utils.get_platform() == "android":
@@ -33,6 +47,24 @@ _AUDIO_FOCUS_REQ = None
 
 CLIENT = OSCClient("localhost", 3002, encoding="utf-8")
 
+AUDIO_EXTS = (".m4a", ".mp3", ".aac", ".flac", ".ogg", ".wav")
+PREFETCH_DEPTH = 2
+PREFETCH_WARM_BYTES = 512 * 1024
+WATCHDOG_INTERVAL = 5.0
+MIN_WATCHDOG_WAKE = 0.2
+END_EPS = 0.05
+# The watchdog wakes this long before a track's expected end, then at it.
+END_LEAD = 0.15
+STALL_END_WINDOW = 2.0
+POSITION_FAST_S = 0.25
+POSITION_SLOW_S = 2.0
+POSITION_BURST_S = 2.0
+HISTORY_FILE = "history.json"
+HISTORY_SIZE = 200
+SHUFFLE_FILE = "shuffle.json"
+GAPS = GapMeter()
+WAKEUPS = WakeupCounter()
+
 
 def request_audio_focus_plain(ctx):
     """Request permanent media focus while playing (no listener)."""
@@ -180,6 +212,30 @@ def embed_cover_art_m4a_jpeg(
         return False
 
 
+def _warm_file(path: str) -> None:
+    """Pull the head and tail of a media file (where MP4 keeps its moov atom)
+    into the OS page cache so the next SoundLoader.load starts warm."""
+    try:
+        with open(path, "rb") as fh:
+            if hasattr(os, "posix_fadvise"):
+                with contextlib.suppress(OSError):
+                    os.posix_fadvise(fh.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+            fh.read(PREFETCH_WARM_BYTES)
+            size = os.fstat(fh.fileno()).st_size
+            if size > 2 * PREFETCH_WARM_BYTES:
+                fh.seek(size - PREFETCH_WARM_BYTES)
+                fh.read(PREFETCH_WARM_BYTES)
+    except OSError as e:
+        print(f"[service] warm failed for {path}: {e}")
+
+
+def _unload_quietly(snd) -> None:
+    with contextlib.suppress(Exception):
+        snd.stop()
+    with contextlib.suppress(Exception):
+        snd.unload()
+
+
 def _resolve_cover_for_audio(audio_path: str) -> str | None:
     """
     Given /path/to/Foo.m4a try to return a working cover path:
@@ -196,17 +252,23 @@ def _resolve_cover_for_audio(audio_path: str) -> str | None:
 
 
 class CustomLogger:
+    def __init__(self, quiet: bool = False):
+        self.quiet = quiet
+
     def debug(self, msg):
         if not msg.startswith("[debug] "):
             self.info(msg)
 
     def info(self, msg):
+        if self.quiet:
+            return
         if "[download]" in msg and "Destination:" not in msg:
             Gui_sounds.send("data_info", msg)
 
     def error(self, msg):
-        with contextlib.suppress(Exception):
-            Gui_sounds.send("data_info", msg)
+        if not self.quiet:
+            with contextlib.suppress(Exception):
+                Gui_sounds.send("data_info", msg)
         print(msg)
 
     def warning(self, msg):
@@ -216,12 +278,12 @@ class CustomLogger:
 class Gui_sounds:
     sounds = None
     length = None
-    previous_songs = []
     set_local = None
     load_from_service = False
     set_local_download = get_app_writable_dir("Downloaded/Played")
     cache_dire = get_app_writable_dir("Downloaded")
     os.makedirs(cache_dire, exist_ok=True)
+    history = PlayHistory(HISTORY_SIZE, os.path.join(cache_dire, HISTORY_FILE))
     shuffle_selected = False
     playlist = []
     song_change = False
@@ -233,14 +295,36 @@ class Gui_sounds:
     main_paused = False
     previous = False
     loop_enabled = False
-    shuffle_bag = []
-    _bag_source_len = 0
+    shuffle_bag = ShuffleBag(os.path.join(cache_dire, SHUFFLE_FILE))
+    # "smart" mode: weighted by play count and recency from the library.
+    shuffle_smart = False
+    smart_shuffle = SmartShuffle(lambda: LIBRARY.play_stats())
+    # Position index over `playlist` for next/previous (no list.index scans).
+    order = PlayOrder()
+    prefetched = {}
+    prefetch_depth = PREFETCH_DEPTH
+    gapless = False
+    preloaded = None
+    position_rate = (POSITION_FAST_S, POSITION_SLOW_S)
+    # Version of `playlist` as last agreed with the GUI; 0 means "unknown",
+    # which makes the next delta op trigger a full resync.
+    playlist_version = 0
+    _playlist_lock = threading.Lock()
+    _playlist_decoding = None
+    _queued_ops = []
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._next_thread = None
         self._end_fired = False
         self._next_thread_stop = threading.Event()
+        self._prefetch_thread = None
+        self._prefetch_wake = threading.Event()
+        self._preload_lock = threading.Lock()
+        self._halting = False
+        self._position_thread = None
+        self._position_wake = threading.Event()
+        self._position_burst_until = 0.0
         if utils.get_platform() == "android":
             self.PlaybackState = autoclass("android.media.session.PlaybackState")
             self.B = autoclass("android.media.session.PlaybackState$Builder")
@@ -250,7 +334,7 @@ class Gui_sounds:
         self.stop_next_monitor()
         self._next_thread_stop.clear()
         self._next_thread = threading.Thread(
-            target=self._check_for_next_loop, name="NextMonitor", daemon=True
+            target=self._check_for_next_loop, name="EndWatchdog", daemon=True
         )
         self._next_thread.start()
 
@@ -265,58 +349,74 @@ class Gui_sounds:
 
     def _check_for_next_loop(self):
         """
-        End-of-track monitor (service-side, GUI-independent).
+        Fallback end-of-track watchdog (service-side, GUI-independent).
+        Track ends normally arrive as the Sound's on_stop event
+        (_on_sound_stop), but nothing pumps Kivy's Clock in the service, so
+        that event can be late or missing. This thread sleeps until END_LEAD
+        before the expected end of the track (WATCHDOG_INTERVAL at most),
+        then until the end itself, and advances when the end was reached:
+        position at the end, the backend stopped on its own, or playback
+        stalled within STALL_END_WINDOW of the end. A stall in the middle
+        of a track is left alone. The end is stamped into GAPS at the time
+        it was expected, so a late wakeup shows up in /gap_report.
         """
-        import os
-
-        TICK = 0.25
-        REM_EPS = 0.89
-        STUCK_TICKS = int(1.0 / TICK)
-
         self._end_fired = False
         last_pos = -1.0
-        stuck = 0
+        expected_end = None
+        wait = WATCHDOG_INTERVAL
 
         while not self._next_thread_stop.is_set():
+            delay, floor = WATCHDOG_INTERVAL, MIN_WATCHDOG_WAKE
             try:
-                snd = getattr(Gui_sounds, "sound", None)
-                has = bool(snd)
-                length = float(getattr(Gui_sounds, "length", 0.0) or 0.0)
-                pos = float(snd.get_pos() or 0.0) if has else 0.0
+                snd = Gui_sounds.sound
+                length = float(Gui_sounds.length or 0.0)
+                pos = float(snd.get_pos() or 0.0) if snd else 0.0
                 remaining = max(0.0, length - pos)
-
-                paused = bool(getattr(Gui_sounds, "paused", False))
-                state = getattr(snd, "state", "") if snd else ""
-                playing = has and (not paused or state == "play")
-
-                if playing:
-                    if pos <= last_pos + 0.01:
-                        stuck += 1
-                    else:
-                        stuck = 0
-                    last_pos = pos
-
-                at_true_end = playing and length > 0 and remaining <= REM_EPS
-                appears_eof = playing and (stuck >= STUCK_TICKS) and pos > 0.0
-                bg = bool(getattr(Gui_sounds, "main_paused", False))
-                endish = at_true_end or appears_eof or (bg and remaining <= REM_EPS)
-                if endish and not self._end_fired:
-                    self._end_fired = True
-
-                    if (
-                        getattr(Gui_sounds, "previous", False) is True
-                        or getattr(snd, "loop", False) is True
-                    ):
-                        self._next_thread_stop.wait(TICK)
-                        self._end_fired = False
-                        continue
-                    else:
-                        Gui_sounds.next()
+                active = bool(snd) and not Gui_sounds.paused and not self._halting
+
+                if active and not self._end_fired:
+                    state = getattr(snd, "state", "")
+                    # A final-approach wait can be shorter than get_pos() steps.
+                    stalled = wait >= MIN_WATCHDOG_WAKE and 0.0 < pos <= last_pos + 0.01
+                    ended = (
+                        (length > 0 and remaining <= END_EPS)
+                        or (state != "play" and last_pos > 0.0)
+                        or (stalled and remaining <= STALL_END_WINDOW)
+                    )
+                    skip = Gui_sounds.previous is True or getattr(snd, "loop", False)
+                    if ended and not skip:
+                        self._end_fired = True
+                        now = _time.perf_counter()
+                        GAPS.track_ended(min(expected_end or now, now))
+                        if self._advance_after_end():
+                            last_pos, expected_end = -1.0, None
+                            wait = MIN_WATCHDOG_WAKE
+                            self._next_thread_stop.wait(wait)
+                            WAKEUPS.hit("watchdog")
+                            continue
                         break
-                self._next_thread_stop.wait(TICK)
+                    last_pos = pos
+                    if length > 0:
+                        expected_end = _time.perf_counter() + remaining
+                        if remaining > 2 * END_LEAD:
+                            delay = min(WATCHDOG_INTERVAL, remaining - END_LEAD)
+                        else:
+                            delay, floor = remaining, END_EPS
+                else:
+                    expected_end = None
             except Exception as e:
                 print("Next-monitor loop error:", e)
-                self._next_thread_stop.wait(TICK)
+            wait = max(floor, delay)
+            self._next_thread_stop.wait(wait)
+            WAKEUPS.hit("watchdog")
+
+    @staticmethod
+    def wakeup_stats(*val):
+        """Reply with background wakeups per minute (watchdog, prefetch, ...)."""
+        report = WAKEUPS.report()
+        print("[service] wakeups:", report)
+        with contextlib.suppress(Exception):
+            Gui_sounds.send("wakeup_stats", json.dumps(report))
 
     @staticmethod
     def load(*val):
@@ -331,23 +431,9 @@ class Gui_sounds:
         GS.stop()
         Gui_sounds.file_to_load = "".join(val)
         Gui_sounds.file_to_load = os.path.normpath(Gui_sounds.file_to_load)
-        base_dir = Gui_sounds.set_local_download
-        candidate = os.path.join(base_dir, os.path.basename(Gui_sounds.file_to_load))
+        path_to_try = Gui_sounds._resolve_track_path(Gui_sounds.file_to_load)
 
-        path_to_try = (
-            candidate if os.path.isfile(candidate) else Gui_sounds.file_to_load
-        )
-
-        if not os.path.isfile(path_to_try):
-            name, ext = os.path.splitext(os.path.basename(path_to_try))
-            if not ext:
-                for e in (".m4a", ".mp3", ".aac", ".flac", ".ogg", ".wav"):
-                    p2 = os.path.join(base_dir, name + e)
-                    if os.path.isfile(p2):
-                        path_to_try = p2
-                        break
-
-        if not os.path.isfile(path_to_try):
+        if not path_to_try:
             with contextlib.suppress(Exception):
                 Gui_sounds.send(
                     "song_not_found", os.path.basename(Gui_sounds.file_to_load)
@@ -356,10 +442,13 @@ class Gui_sounds:
             return
         Gui_sounds.file_to_load = path_to_try
         GS._end_fired = False
-        Gui_sounds.sound = SoundLoader.load(Gui_sounds.file_to_load)
+        Gui_sounds.sound = GS._take_preloaded(
+            os.path.basename(path_to_try)
+        ) or SoundLoader.load(Gui_sounds.file_to_load)
         if not Gui_sounds.sound:
             Gui_sounds.send("reset_gui", "reset_gui")
             return
+        GS._bind_end_event(Gui_sounds.sound)
         GS.set_loop(GS.loop_enabled)
         Gui_sounds.length = Gui_sounds.sound.length or 0
         Gui_sounds.send("set_slider", str(Gui_sounds.length))
@@ -369,20 +458,300 @@ class Gui_sounds:
                     Gui_sounds.send("update_image", cover)
         GS.play()
 
+    def _bind_end_event(self, snd):
+        with contextlib.suppress(Exception):
+            snd.unbind(on_stop=self._on_sound_stop)
+            snd.bind(on_stop=self._on_sound_stop)
+
+    def _on_sound_stop(self, snd, *args):
+        """
+        Sound.on_stop fires for our own stop()/pause() as well as for a
+        natural end of stream; only the latter counts as a track end.
+        The hand-over runs on the fast lane so it stays ordered with
+        user transport commands.
+        """
+        if self._halting or snd is not Gui_sounds.sound or Gui_sounds.paused:
+            return
+        if Gui_sounds.loop_enabled or Gui_sounds.previous or self._end_fired:
+            return
+        self._end_fired = True
+        GAPS.track_ended()
+        LANES.fast(self._advance_after_end, name="track_end")()
+
+    def _advance_after_end(self):
+        """Start the next track; True when the preloaded Sound was handed over."""
+        if Gui_sounds.gapless and self._start_preloaded():
+            return True
+        Gui_sounds.next()
+        return False
+
+    def _take_preloaded(self, name):
+        """Claim the preloaded Sound if it is for `name`; drop it otherwise."""
+        with self._preload_lock:
+            pre, Gui_sounds.preloaded = Gui_sounds.preloaded, None
+        if not pre:
+            return None
+        if pre[0] == name:
+            return pre[2]
+        _unload_quietly(pre[2])
+        return None
+
+    def _start_preloaded(self):
+        """
+        Gapless hand-over: start the already-loaded next Sound first and do
+        the bookkeeping (unloading the old one, GUI updates) afterwards.
+        """
+        name, retrace = Gui_sounds._next_up()
+        nsnd = self._take_preloaded(name) if name else None
+        if nsnd is None:
+            return False
+        path = getattr(nsnd, "source", None) or os.path.join(
+            Gui_sounds.set_local_download, name
+        )
+        if retrace:
+            # As in retrieving_song(): step the history cursor, so that
+            # _track_started() does not record a new entry (which would drop
+            # the rest of the forward history), and draw nothing.
+            Gui_sounds.history.forward(Gui_sounds._in_playlist)
+        elif Gui_sounds.shuffle_selected:
+            Gui_sounds._shuffler().consume(Gui_sounds.playlist, name)
+
+        old = Gui_sounds.sound
+        Gui_sounds.sound = nsnd
+        Gui_sounds.file_to_load = path
+        Gui_sounds.set_local = name
+        Gui_sounds.load_from_service = True
+        Gui_sounds.paused = False
+        Gui_sounds.previous = False
+        Gui_sounds.song_local = None
+        self._end_fired = False
+        self.set_loop(self.loop_enabled)
+        self._bind_end_event(nsnd)
+        nsnd.play()
+        gap_ms = GAPS.track_started("gapless")
+
+        if old is not None and old is not nsnd:
+            with contextlib.suppress(Exception):
+                old.unbind(on_stop=self._on_sound_stop)
+            _unload_quietly(old)
+        Gui_sounds._track_started(name)
+        Gui_sounds.length = nsnd.length or 0
+        Gui_sounds.send("set_slider", str(Gui_sounds.length))
+        with contextlib.suppress(Exception):
+            if cover := _resolve_cover_for_audio(path):
+                Gui_sounds.send("update_image", cover)
+        self.kick_position()
+        if gap_ms is not None:
+            print(f"[service] gapless transition: {gap_ms:.1f} ms")
+        monitor = self._next_thread
+        if threading.current_thread() is not monitor and not (
+            monitor and monitor.is_alive()
+        ):
+            self.start_next_monitor()
+        self.kick_prefetch()
+        return True
+
+    def _preload_next(self):
+        """Keep the upcoming track loaded in a second Sound (gapless mode)."""
+        want, _ = Gui_sounds._next_up()
+        pre = Gui_sounds.preloaded
+        if pre and pre[0] == want:
+            return
+        if pre:
+            self._take_preloaded(None)
+        if not want or Gui_sounds.loop_enabled:
+            return
+        path = Gui_sounds._resolve_track_path(want)
+        if not path or path == Gui_sounds.file_to_load:
+            return
+        snd = SoundLoader.load(path)
+        if not snd:
+            return
+        with self._preload_lock:
+            stale, Gui_sounds.preloaded = Gui_sounds.preloaded, (want, path, snd)
+        if stale:
+            _unload_quietly(stale[2])
+
+    def on_gapless_msg(self, *val):
+        want = "".join(val).strip().lower() in {"1", "true", "yes", "on"}
+        Gui_sounds.gapless = want
+        if want:
+            self.kick_prefetch()
+        else:
+            self._take_preloaded(None)
+
+    @staticmethod
+    def gap_report(*val):
+        """Reply with gap statistics (ms) per transition mode."""
+        report = GAPS.report()
+        print("[service] track gaps:", report)
+        with contextlib.suppress(Exception):
+            Gui_sounds.send("gap_report", json.dumps(report))
+
+    @staticmethod
+    def _resolve_track_path(file_to_load):
+        """
+        Map a stored/received track name to an existing file, preferring the
+        current sandbox copy. Prefetched tracks resolve with a single stat.
+        Returns None when nothing on disk matches.
+        """
+        base_dir = Gui_sounds.set_local_download
+        name = os.path.basename(file_to_load)
+        hit = Gui_sounds.prefetched.get(name)
+        if hit and os.path.isfile(hit):
+            return hit
+
+        candidate = os.path.join(base_dir, name)
+        path_to_try = candidate if os.path.isfile(candidate) else file_to_load
+
+        if not os.path.isfile(path_to_try):
+            stem, ext = os.path.splitext(os.path.basename(path_to_try))
+            if not ext:
+                for e in AUDIO_EXTS:
+                    p2 = os.path.join(base_dir, stem + e)
+                    if os.path.isfile(p2):
+                        path_to_try = p2
+                        break
+
+        return path_to_try if os.path.isfile(path_to_try) else None
+
+    @staticmethod
+    def upcoming(count):
+        """
+        The next `count` song names: history entries ahead of the cursor
+        (after going back), then the active order (sequential or shuffle bag).
+        """
+        songs = Gui_sounds.playlist if isinstance(Gui_sounds.playlist, list) else []
+        if count <= 0 or not songs:
+            return []
+        out = Gui_sounds.history.ahead(count, Gui_sounds._in_playlist)
+        rest = count - len(out)
+        if rest <= 0:
+            return out
+        if Gui_sounds.shuffle_selected:
+            return out + Gui_sounds._shuffler().peek(songs, rest)
+        current = out[-1] if out else os.path.basename(Gui_sounds.file_to_load or "")
+        return out + Gui_sounds.order.upcoming(songs, current, rest)
+
+    @staticmethod
+    def _next_up():
+        """
+        (name, retrace) for the track the next hand-over starts; retrace is
+        True when it is the history entry ahead of the cursor (after going
+        back) rather than the next one in the active order.
+        """
+        ahead = Gui_sounds.history.ahead(1, Gui_sounds._in_playlist)
+        if ahead:
+            return ahead[0], True
+        upcoming = Gui_sounds.upcoming(1)
+        return (upcoming[0] if upcoming else None), False
+
+    @staticmethod
+    def _shuffler():
+        if Gui_sounds.shuffle_smart:
+            return Gui_sounds.smart_shuffle
+        return Gui_sounds.shuffle_bag
+
+    @staticmethod
+    def _track_started(name):
+        """Record a track that started: history, play count, shuffle weight."""
+        Gui_sounds.history.record(name)
+        Gui_sounds.smart_shuffle.played(name)
+        with contextlib.suppress(Exception):
+            LIBRARY.record_play(name)
+
+    @staticmethod
+    def _in_playlist(name):
+        songs = Gui_sounds.playlist if isinstance(Gui_sounds.playlist, list) else []
+        return Gui_sounds.order.locate(songs, name) >= 0
+
+    def kick_prefetch(self):
+        """Wake the prefetch thread (starting it on first use)."""
+        if self._prefetch_thread is None or not self._prefetch_thread.is_alive():
+            self._prefetch_thread = threading.Thread(
+                target=self._prefetch_loop, name="Prefetch", daemon=True
+            )
+            self._prefetch_thread.start()
+        self._prefetch_wake.set()
+
+    def _prefetch_loop(self):
+        """
+        Resolve and warm the upcoming tracks so the next load() skips the
+        path search and reads from the page cache instead of cold storage.
+        """
+        while True:
+            self._prefetch_wake.wait()
+            self._prefetch_wake.clear()
+            WAKEUPS.hit("prefetch")
+            try:
+                ready = {}
+                for name in Gui_sounds.upcoming(Gui_sounds.prefetch_depth):
+                    if self._prefetch_wake.is_set():
+                        break
+                    path = Gui_sounds._resolve_track_path(name)
+                    if not path:
+                        continue
+                    if name not in Gui_sounds.prefetched:
+                        _warm_file(path)
+                    ready[name] = path
+                Gui_sounds.prefetched = ready
+                if Gui_sounds.gapless:
+                    self._preload_next()
+            except Exception as e:
+                print("[service] prefetch failed:", e)
+
+    @staticmethod
+    def set_prefetch_depth(*val):
+        with contextlib.suppress(ValueError, TypeError):
+            Gui_sounds.prefetch_depth = max(0, int("".join(str(v) for v in val)))
+            GS.kick_prefetch()
+
+    @staticmethod
+    def prefetch_downloads(payload_str):
+        """
+        Search mode: the GUI sends the download payloads of the next results.
+        They are queued as quiet background jobs; a later /downloadyt for the
+        same title attaches to the running job instead of starting over.
+        """
+        try:
+            items = json.loads(payload_str)
+        except Exception:
+            return
+        for item in items[: max(0, Gui_sounds.prefetch_depth)]:
+            with contextlib.suppress(Exception):
+                _link, settitle, _thumb, dest = item
+                safe_title = utils.safe_filename(settitle)
+                if os.path.isfile(os.path.join(dest, f"{safe_title}.m4a")):
+                    continue
+                DOWNLOADS.submit(json.dumps(item), title=safe_title, notify=False)
+
     def download_yt(self, payload_str):
-        setytlink, settitle, set_local, set_local_download = json.loads(payload_str)
+        """Queue a download; the worker pool runs `_run_download`."""
+        try:
+            _link, settitle, _thumb, _dest = json.loads(payload_str)
+        except Exception as e:
+            Gui_sounds.send("data_info", f"Download error: {e}")
+            Gui_sounds.send("controls", "enable_play")
+            return
+        DOWNLOADS.submit(payload_str, title=utils.safe_filename(settitle))
+
+    @staticmethod
+    def _run_download(job):
+        setytlink, settitle, set_local, set_local_download = json.loads(job.payload)
         os.makedirs(set_local_download, exist_ok=True)
         safe_title = utils.safe_filename(settitle)
 
         audio_path = os.path.join(set_local_download, f"{safe_title}.m4a")
         cover_path = os.path.join(set_local_download, f"{safe_title}.jpg")
 
-        from urllib.parse import urlparse
-
         def origin_of(u: str) -> str:
             p = urlparse(u)
             return f"{p.scheme}://{p.netloc}"
 
+        def cancel_hook(_d):
+            if job.cancelled:
+                raise DownloadCancelled(f"cancelled: {safe_title}")
+
         page_url = setytlink
 
         common_headers = {
@@ -406,17 +775,26 @@ class Gui_sounds:
             "restrictfilenames": True,
             "forceipv4": True,
             "nocheckcertificate": True,
-            "logger": CustomLogger(),
+            "logger": CustomLogger(quiet=not job.notify),
+            "progress_hooks": [cancel_hook],
             "user_agent": common_headers["User-Agent"],
             "referer": common_headers["Referer"],
             "http_headers": common_headers,
         }
 
+        info = None
         try:
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([setytlink])
+                info = ydl.extract_info(setytlink, download=True)
+        except DownloadCancelled:
+            with contextlib.suppress(OSError):
+                os.remove(f"{audio_path}.part")
+            return False
         except DownloadError as e:
             msg = str(e)
+            job.error = msg
+            if not job.notify:
+                return False
             if "Requested format is not available" in msg:
                 Gui_sounds.send(
                     "data_info", "M4A not available right now. Tap Play to retry."
@@ -424,15 +802,21 @@ class Gui_sounds:
             else:
                 Gui_sounds.send("data_info", f"Download failed: {msg}")
             Gui_sounds.send("controls", "enable_play")
-            return
+            return False
 
         except Exception as e:
-            Gui_sounds.send("data_info", f"Download error: {e}")
-            Gui_sounds.send("controls", "enable_play")
-            return
+            job.error = str(e)
+            if job.notify:
+                Gui_sounds.send("data_info", f"Download error: {e}")
+                Gui_sounds.send("controls", "enable_play")
+            return False
+        if job.cancelled:
+            return False
         if not os.path.exists(audio_path):
-            Gui_sounds.send("error_reset", "downloaded file not found (.m4a)")
-            return
+            job.error = "downloaded file not found (.m4a)"
+            if job.notify:
+                Gui_sounds.send("error_reset", job.error)
+            return False
         img_data = None
         try:
             resp = requests.get(set_local, timeout=30)
@@ -451,13 +835,59 @@ class Gui_sounds:
             try:
                 if embed_cover_art_m4a_jpeg(audio_path, img_data, title=settitle):
                     print("[service] embedded cover art into m4a")
-                    if utils.get_platform() == "android":
+                    if job.notify and utils.get_platform() == "android":
                         with contextlib.suppress(Exception):
                             Gui_sounds.send("data_info", "Embedded album art")
             except Exception as e:
                 print(f"[service] embed cover failed: {e}")
 
-        Gui_sounds.send("file_is_downloaded", "yep")
+        info = info if isinstance(info, dict) else {}
+        with contextlib.suppress(Exception):
+            LIBRARY.upsert_file(
+                audio_path,
+                video_id=info.get("id"),
+                title=settitle,
+                duration=info.get("duration"),
+            )
+        if job.notify:
+            Gui_sounds.send("file_is_downloaded", "yep")
+        return True
+
+    @staticmethod
+    def on_download_change(job, queue):
+        """Report every job transition to the GUI as JSON on /download_status."""
+        counts = queue.status()["counts"]
+        payload = dict(job.to_dict(), queued=counts["queued"], running=counts["running"])
+        with contextlib.suppress(Exception):
+            Gui_sounds.send("download_status", json.dumps(payload))
+
+    @staticmethod
+    def download_cancel(*val):
+        """Cancel one job by id, or every pending job with "all"."""
+        raw = "".join(str(v) for v in val).strip().lower()
+        if raw in {"", "all"}:
+            DOWNLOADS.cancel_all()
+            return
+        with contextlib.suppress(ValueError):
+            DOWNLOADS.cancel(int(raw))
+
+    @staticmethod
+    def download_workers(*val):
+        with contextlib.suppress(ValueError, TypeError):
+            DOWNLOADS.set_workers(int("".join(str(v) for v in val).strip()))
+
+    @staticmethod
+    def download_queue_status(*val):
+        with contextlib.suppress(Exception):
+            Gui_sounds.send("download_queue", json.dumps(DOWNLOADS.status()))
+
+    @staticmethod
+    def lane_stats(*val):
+        """Reply with per-command latency percentiles for both lanes."""
+        report = LANES.report()
+        print("[service] lane latency:", report)
+        with contextlib.suppress(Exception):
+            Gui_sounds.send("lane_stats", json.dumps(report))
 
     def update_load_fs(self, *val):
         Gui_sounds.load_from_service = False
@@ -479,18 +909,69 @@ class Gui_sounds:
         else:
             Gui_sounds.paused = False
             Gui_sounds.song_local = None
-            Gui_sounds.previous_songs.append(os.path.basename(Gui_sounds.file_to_load))
+            Gui_sounds._track_started(os.path.basename(Gui_sounds.file_to_load))
             with contextlib.suppress(Exception):
                 Gui_sounds.sound.play()
+            GAPS.track_started("reload")
             Gui_sounds.previous = False
             if Gui_sounds.checking_it is None:
                 self.start_next_monitor()
+            self.kick_prefetch()
+        self.kick_position()
 
     def update_slider(self, *val):
         with contextlib.suppress(AttributeError):
             pos = int(Gui_sounds.sound.get_pos())
             Gui_sounds.send("song_pos", str(pos))
 
+    def kick_position(self):
+        """(Re)start pushing /song_pos, at the fast rate for POSITION_BURST_S."""
+        self._position_burst_until = _time.monotonic() + POSITION_BURST_S
+        if self._position_thread is None or not self._position_thread.is_alive():
+            self._position_thread = threading.Thread(
+                target=self._position_loop, name="PositionPublisher", daemon=True
+            )
+            self._position_thread.start()
+        self._position_wake.set()
+
+    def _position_loop(self):
+        """
+        Push the playback position to the GUI, which interpolates between
+        updates. Publishes fast right after a (re)start or seek so the GUI
+        re-anchors quickly, then backs off to the slow rate. Sleeps without
+        a timeout while paused, stopped or while the GUI is backgrounded
+        (/iampaused) until kick_position() wakes it.
+        """
+        while True:
+            snd = Gui_sounds.sound
+            live = (
+                snd is not None
+                and not Gui_sounds.paused
+                and not Gui_sounds.main_paused
+                and getattr(snd, "state", "") == "play"
+            )
+            if not live:
+                self._position_wake.wait()
+                self._position_wake.clear()
+                WAKEUPS.hit("position")
+                continue
+            with contextlib.suppress(Exception):
+                Gui_sounds.send("song_pos", f"{float(snd.get_pos() or 0.0):.2f}")
+            fast, slow = Gui_sounds.position_rate
+            burst = _time.monotonic() < self._position_burst_until
+            if self._position_wake.wait(fast if burst else slow):
+                self._position_wake.clear()
+            WAKEUPS.hit("position")
+
+    @staticmethod
+    def set_position_rate(*val):
+        """/position_rate "fast,slow" in seconds."""
+        with contextlib.suppress(Exception):
+            fast, slow = ("".join(str(v) for v in val)).split(",")
+            fast = max(0.05, float(fast))
+            Gui_sounds.position_rate = (fast, max(fast, float(slow)))
+            GS.kick_position()
+
     @staticmethod
     def check_for_pause():
         if Gui_sounds.paused:
@@ -556,13 +1037,21 @@ class Gui_sounds:
             Gui_sounds.sound.seek(secs)
 
             with contextlib.suppress(Exception):
-                Gui_sounds.send("song_pos", str(int(secs)))
+                Gui_sounds.send("song_pos", f"{secs:.2f}")
+            GS.kick_position()
 
     def pause(self, *val):
         Gui_sounds.paused = True
+        GAPS.cancel()
         Gui_sounds.song_local = [Gui_sounds.sound.get_pos()]
+        with contextlib.suppress(Exception):
+            Gui_sounds.send("song_pos", f"{float(Gui_sounds.song_local[0]):.2f}")
         self.stop_next_monitor()
-        Gui_sounds.sound.stop()
+        self._halting = True
+        try:
+            Gui_sounds.sound.stop()
+        finally:
+            self._halting = False
         if utils.get_platform() == "android":
             release_wakelock()
             ctx, _ = wait_for_service_ctx()
@@ -579,8 +1068,12 @@ class Gui_sounds:
 
     def stop(self, *val):
         if Gui_sounds.sound is not None and Gui_sounds.sound.state == "play":
-            Gui_sounds.sound.stop()
-            Gui_sounds.sound.unload()
+            self._halting = True
+            try:
+                Gui_sounds.sound.stop()
+                Gui_sounds.sound.unload()
+            finally:
+                self._halting = False
             Gui_sounds.sound = None
         self.stop_next_monitor()
         if utils.get_platform() == "android":
@@ -621,7 +1114,11 @@ class Gui_sounds:
         songs = Gui_sounds.playlist
         with contextlib.suppress(TypeError):
             if Gui_sounds.song_change is True:
-                if Gui_sounds.shuffle_selected is True:
+                # After going back, "next" first retraces the history.
+                ahead = Gui_sounds.history.forward(Gui_sounds._in_playlist)
+                if ahead:
+                    Gui_sounds.getting_song(ahead)
+                elif Gui_sounds.shuffle_selected is True:
 
                     try:
                         current = (
@@ -632,33 +1129,17 @@ class Gui_sounds:
                     except Exception:
                         current = None
 
-                    need_rebuild = (
-                        (not Gui_sounds.shuffle_bag)
-                        or (Gui_sounds._bag_source_len != len(songs))
-                        or any(item not in songs for item in Gui_sounds.shuffle_bag)
+                    bag = Gui_sounds._shuffler()
+                    if bag is Gui_sounds.shuffle_bag and not bag.active:
+                        bag.start(songs, current)
+                    next_song = bag.draw(songs, current) or current or (
+                        songs[0] if songs else None
                     )
-                    if need_rebuild:
-                        Gui_sounds._rebuild_shuffle_bag(
-                            exclude_current=current if len(songs) > 1 else None
-                        )
-
-                    try:
-                        next_song = (
-                            Gui_sounds.shuffle_bag.pop()
-                            if Gui_sounds.shuffle_bag
-                            else (current or (songs[0] if songs else None))
-                        )
-                    except Exception:
-                        next_song = current or (songs[0] if songs else None)
                     if next_song:
                         Gui_sounds.getting_song(next_song)
                 elif len(songs) >= 2:
-                    with contextlib.suppress(ValueError):
-                        index_next_song = songs.index(current_song) + 1
-                        try:
-                            next_song = songs[index_next_song]
-                        except IndexError:
-                            next_song = songs[0]
+                    next_song = Gui_sounds.order.next(songs, current_song)
+                    if next_song:
                         Gui_sounds.getting_song(next_song)
             elif Gui_sounds.song_change is False:
                 if len(songs) >= 2:
@@ -666,22 +1147,14 @@ class Gui_sounds:
                         Gui_sounds.check_against_previous(current_song, songs)
                 else:
                     Gui_sounds.playlist = []
+                    Gui_sounds.playlist_version = 0
 
     @staticmethod
     def check_against_previous(current_song, songs):
-        try:
-            current_idx = Gui_sounds.previous_songs.index(current_song) - 1
-            next_song = Gui_sounds.previous_songs[current_idx]
-        except ValueError:
-            current_idx = -1
-            next_song = None
-        if current_idx <= -1 or next_song is None:
-            Gui_sounds.previous_songs = []
-            try:
-                index_next_song = songs.row_index(current_song) - 1
-                next_song = songs[index_next_song]
-            except (ValueError, IndexError):
-                next_song = songs[0] if songs else None
+        next_song = Gui_sounds.history.back(Gui_sounds._in_playlist)
+        if next_song is None:
+            # Oldest entry reached: fall back to the playlist order.
+            next_song = Gui_sounds.order.previous(songs, current_song)
         if next_song:
             Gui_sounds.getting_song(next_song)
 
@@ -693,53 +1166,109 @@ class Gui_sounds:
 
     @staticmethod
     def play_list(payload):
-        items = None
-        if isinstance(payload, (list, tuple)):
-            if len(payload) == 1:
-                p0 = payload[0]
-                if isinstance(p0, (list, tuple)):
-                    items = list(p0)
-                else:
-                    s = (
-                        p0.decode("utf-8", "ignore")
-                        if isinstance(p0, (bytes, bytearray))
-                        else str(p0)
-                    ).strip()
-                    with contextlib.suppress(Exception):
-                        val = json.loads(s)
-                        if isinstance(val, (list, tuple)):
-                            items = list(val)
-                    if items is None:
-                        with contextlib.suppress(Exception):
-                            val = ast.literal_eval(s)
-                            if isinstance(val, (list, tuple)):
-                                items = list(val)
-                    if items is None:
-                        items = [s] if s else []
-            else:
-                items = list(payload)
-
-        if items is None:
-            s = (
-                payload.decode("utf-8", "ignore")
-                if isinstance(payload, (bytes, bytearray))
-                else str(payload)
-            ).strip()
-            with contextlib.suppress(Exception):
-                val = json.loads(s)
-                if isinstance(val, (list, tuple)):
-                    items = list(val)
-        if items is None:
-            with contextlib.suppress(Exception):
-                val = ast.literal_eval(s)
-                if isinstance(val, (list, tuple)):
-                    items = list(val)
-        if items is None:
-            items = [s] if s else []
-        Gui_sounds.playlist = [os.path.basename(str(x)) for x in items]
+        """Legacy single-datagram /playlist (small lists only)."""
+        Gui_sounds.playlist = [
+            os.path.basename(x) for x in decode_playlist(payload)
+        ]
+        Gui_sounds.playlist_version = 0
+        GS.kick_prefetch()
+
+    @staticmethod
+    def playlist_chunk(tid, seq, total, crc, chunk):
+        """
+        One /playlist_chunk datagram. Runs on the OSC thread so chunks are
+        stored in arrival order; decoding the finished payload is handed
+        to the ordered lane.
+        """
+        status, result = PLAYLIST_RX.add(tid, seq, total, crc, chunk)
+        if status in ("done", "duplicate"):
+            Gui_sounds.send("playlist_ack", str(int(tid)))
+        if status == "done":
+            with Gui_sounds._playlist_lock:
+                Gui_sounds._playlist_decoding = int(tid)
+            LANES.ordered(Gui_sounds._apply_playlist_payload, name="playlist")(
+                int(tid), result
+            )
+        elif status == "missing":
+            missing = ",".join(map(str, result)) if len(result) <= 512 else ""
+            Gui_sounds.send("playlist_nack", f"{int(tid)}:{missing}")
+        elif status == "corrupt":
+            Gui_sounds.send("playlist_nack", f"{int(tid)}:")
+
+    @staticmethod
+    def _apply_playlist_payload(tid, data):
+        """
+        A full transfer's id becomes the playlist version. The transfer that
+        completed last always wins, whatever its id: ids are only unique per
+        GUI run, so comparing them with the stored version could reject
+        every transfer from a restarted GUI.
+        """
+        try:
+            names = [os.path.basename(x) for x in decode_transfer(data)]
+        except (ValueError, TypeError) as e:
+            print("[playlist] bad transfer:", e)
+            names = None
+        with Gui_sounds._playlist_lock:
+            latest = Gui_sounds._playlist_decoding == tid
+            if latest:
+                Gui_sounds._playlist_decoding = None
+                if names is not None:
+                    Gui_sounds.playlist = names
+                    Gui_sounds.playlist_version = tid
+            # A bad payload only matters if nothing newer is on its way.
+            in_sync = names is not None or not latest
+            if Gui_sounds._playlist_decoding is None:
+                queued, Gui_sounds._queued_ops = Gui_sounds._queued_ops, []
+                in_sync = in_sync and all(
+                    Gui_sounds._apply_op_locked(*q) for q in queued
+                )
+        GS.kick_prefetch()
+        if not in_sync:
+            Gui_sounds.send("playlist_resync", str(Gui_sounds.playlist_version))
+
+    @staticmethod
+    def playlist_op(base, version, op):
+        """
+        /playlist_op [base_version, new_version, op_json]: one delta from
+        playlist_transfer.diff_playlist (an empty op only checks the version).
+        Ops that arrive while a full transfer is being decoded wait for it.
+        """
+        item = (int(base), int(version), op)
+        with Gui_sounds._playlist_lock:
+            if Gui_sounds._playlist_decoding is not None:
+                Gui_sounds._queued_ops.append(item)
+                return
+            in_sync = Gui_sounds._apply_op_locked(*item)
+        if in_sync:
+            GS.kick_prefetch()
+        else:
+            Gui_sounds.send("playlist_resync", str(Gui_sounds.playlist_version))
+
+    @staticmethod
+    def _apply_op_locked(base, version, op):
+        """Apply one delta (lock held); False means the GUI must resync."""
+        if base != Gui_sounds.playlist_version or not base:
+            return False
+        if op:
+            try:
+                op = json.loads(op)
+                delta = playlist_op_delta(Gui_sounds.playlist, op, os.path.basename)
+                apply_playlist_op(Gui_sounds.playlist, op, os.path.basename)
+                Gui_sounds.shuffle_bag.apply_delta(*delta)
+                Gui_sounds.smart_shuffle.apply_delta(*delta)
+            except (ValueError, TypeError, IndexError) as e:
+                print("[playlist] bad op:", e)
+                Gui_sounds.playlist_version = 0
+                return False
+            finally:
+                # Edited in place: same list object, so say so explicitly.
+                Gui_sounds.order.changed()
+        Gui_sounds.playlist_version = version
+        return True
 
     def refresh_gui(self, *val):
         Gui_sounds.main_paused = False
+        self.kick_position()
         state = "True" if Gui_sounds.paused else "False"
         if Gui_sounds.load_from_service:
             Gui_sounds.send("update_image", Gui_sounds.set_local)
@@ -761,9 +1290,17 @@ class Gui_sounds:
 
     @staticmethod
     def shuffle(*val):
-        want = "".join(val).strip().lower() in {"1", "true", "yes", "on"}
+        """/shuffle "True" | "False" | "smart"."""
+        mode = "".join(val).strip().lower()
+        want = mode in {"1", "true", "yes", "on", "smart"}
         Gui_sounds.shuffle_selected = want
-        if want:
+        Gui_sounds.shuffle_smart = mode == "smart"
+        Gui_sounds.smart_shuffle.reset()
+        if Gui_sounds.shuffle_smart:
+            # The weight tree is built on first use, by the prefetch thread.
+            Gui_sounds.shuffle_bag.stop()
+            GS.kick_prefetch()
+        elif want:
             try:
                 current = (
                     os.path.basename(Gui_sounds.file_to_load)
@@ -772,41 +1309,17 @@ class Gui_sounds:
                 )
             except Exception:
                 current = None
-            Gui_sounds._rebuild_shuffle_bag(exclude_current=current)
-        else:
-            Gui_sounds.shuffle_bag = []
-            Gui_sounds._bag_source_len = 0
-
-    @staticmethod
-    def _rebuild_shuffle_bag(exclude_current=None):
-        """Build a new randomized bag of songs for true shuffle.
-        exclude_current: optionally avoid picking the currently playing song first.
-        """
-        try:
             songs = Gui_sounds.playlist if isinstance(Gui_sounds.playlist, list) else []
-        except Exception:
-            songs = []
-        if not songs:
-            Gui_sounds.shuffle_bag = []
-            Gui_sounds._bag_source_len = 0
-            return
-        bag = (
-            [s for s in songs if s != exclude_current]
-            if exclude_current
-            else list(songs)
-        )
-        random.shuffle(bag)
-        Gui_sounds.shuffle_bag = bag
-        Gui_sounds._bag_source_len = len(songs)
+            # Resumes the stored order if shuffle was on before a restart.
+            Gui_sounds.shuffle_bag.start(songs, current)
+            GS.kick_prefetch()
+        else:
+            Gui_sounds.shuffle_bag.stop()
 
     @staticmethod
     def _downloads_basename_list():
-        base = Gui_sounds.set_local_download
         try:
-            names = []
-            for ext in (".m4a", ".mp3", ".aac", ".flac", ".ogg", ".wav"):
-                names.extend(fn for fn in os.listdir(base) if fn.lower().endswith(ext))
-            return sorted(set(names))
+            return LIBRARY.names(AUDIO_EXTS, order="name")
         except Exception:
             return []
 
@@ -814,6 +1327,7 @@ class Gui_sounds:
     def _ensure_playlist_from_downloads_if_empty():
         if not isinstance(Gui_sounds.playlist, list) or not Gui_sounds.playlist:
             Gui_sounds.playlist = Gui_sounds._downloads_basename_list()
+            Gui_sounds.playlist_version = 0
 
     @staticmethod
     def send(message_type, message):
@@ -839,9 +1353,35 @@ class Gui_sounds:
             CLIENT.send_message("/are_we", "None")
         elif message_type == "error_reset":
             CLIENT.send_message("/error_reset", message)
+        elif message_type == "controls":
+            CLIENT.send_message("/controls", message)
+        elif message_type == "download_status":
+            CLIENT.send_message("/download_status", message)
+        elif message_type == "download_queue":
+            CLIENT.send_message("/download_queue", message)
+        elif message_type == "lane_stats":
+            CLIENT.send_message("/lane_stats", message)
+        elif message_type == "gap_report":
+            CLIENT.send_message("/gap_report", message)
+        elif message_type == "wakeup_stats":
+            CLIENT.send_message("/wakeup_stats", message)
+        elif message_type == "playlist_ack":
+            CLIENT.send_message("/playlist_ack", message)
+        elif message_type == "playlist_nack":
+            CLIENT.send_message("/playlist_nack", message)
+        elif message_type == "playlist_resync":
+            CLIENT.send_message("/playlist_resync", message)
 
 
 GS = Gui_sounds()
+DOWNLOADS = DownloadQueue(
+    runner=Gui_sounds._run_download,
+    workers=DEFAULT_WORKERS,
+    on_change=Gui_sounds.on_download_change,
+)
+LANES = CommandDispatcher(slow_workers=2)
+PLAYLIST_RX = PlaylistReassembler()
+LIBRARY = LibraryIndex(Gui_sounds.set_local_download)
 
 if __name__ == "__main__":
     if utils.get_platform() == "android":
@@ -853,20 +1393,34 @@ if __name__ == "__main__":
             print("[service] no service ctx; cannot start foreground")
     SERVER = OSCThreadServer(encoding="utf8")
     SERVER.listen("localhost", port=3000, default=True)
-    SERVER.bind("/load", GS.load)
-    SERVER.bind("/play", GS.play)
-    SERVER.bind("/pause", GS.pause)
-    SERVER.bind("/stop", GS.stop)
-    SERVER.bind("/next", GS.next)
-    SERVER.bind("/previous", GS.previous_bttn)
-    SERVER.bind("/playlist", GS.play_list)
-    SERVER.bind("/update_load_fs", GS.update_load_fs)
-    SERVER.bind("/iamawake", GS.refresh_gui)
-    SERVER.bind("/loop", GS.on_loop_msg)
-    SERVER.bind("/shuffle", GS.shuffle)
-    SERVER.bind("/get_update_slider", GS.update_slider)
-    SERVER.bind("/downloadyt", GS.download_yt)
-    SERVER.bind("/iampaused", GS.pause_val)
-    SERVER.bind("/seek_seconds", GS.seek_seconds)
+    fast, slow = LANES.fast, LANES.slow
+    SERVER.bind("/load", fast(GS.load))
+    SERVER.bind("/play", fast(GS.play))
+    SERVER.bind("/pause", fast(GS.pause))
+    SERVER.bind("/stop", fast(GS.stop))
+    SERVER.bind("/next", fast(GS.next))
+    SERVER.bind("/previous", fast(GS.previous_bttn))
+    # Playlist installs share one worker so they land in arrival order.
+    SERVER.bind("/playlist", LANES.ordered(GS.play_list))
+    SERVER.bind("/playlist_chunk", GS.playlist_chunk)
+    SERVER.bind("/playlist_op", GS.playlist_op)
+    SERVER.bind("/update_load_fs", fast(GS.update_load_fs))
+    SERVER.bind("/iamawake", fast(GS.refresh_gui))
+    SERVER.bind("/loop", fast(GS.on_loop_msg))
+    SERVER.bind("/shuffle", fast(GS.shuffle))
+    SERVER.bind("/get_update_slider", fast(GS.update_slider))
+    SERVER.bind("/downloadyt", slow(GS.download_yt))
+    SERVER.bind("/download_cancel", slow(GS.download_cancel))
+    SERVER.bind("/download_workers", slow(GS.download_workers))
+    SERVER.bind("/download_status", slow(GS.download_queue_status))
+    SERVER.bind("/iampaused", fast(GS.pause_val))
+    SERVER.bind("/seek_seconds", fast(GS.seek_seconds))
+    SERVER.bind("/lane_stats", slow(GS.lane_stats))
+    SERVER.bind("/prefetch", slow(GS.prefetch_downloads))
+    SERVER.bind("/prefetch_depth", slow(GS.set_prefetch_depth))
+    SERVER.bind("/gapless", fast(GS.on_gapless_msg))
+    SERVER.bind("/gap_report", slow(GS.gap_report))
+    SERVER.bind("/wakeup_stats", slow(GS.wakeup_stats))
+    SERVER.bind("/position_rate", fast(GS.set_position_rate))
     while True:
         _time.sleep(1)
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import random
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+
+class ShuffleBag:
+    """
+    "True shuffle" over the service playlist: every distinct track plays
+    once per cycle, in an order fixed by a stored seed.
+    Usage:
+        BAG = ShuffleBag(path=os.path.join(cache_dir, "shuffle.json"))
+        BAG.start(playlist, current)       # resumes a stored order if any
+        BAG.draw(playlist, current)        # next track (new cycle when empty)
+        BAG.peek(playlist, 2)              # what draw() will return next
+        BAG.apply_delta(removed, added)    # after editing playlist in place
+        BAG.stop()                         # forget the order
+    The bag is drawn from lazily (one Fisher-Yates step per track), and a
+    name -> slot dict makes adding or removing a track O(1), so a playlist
+    edit never reshuffles the rest. A different playlist object is synced
+    by diffing names once. Seed, cycle and draw count are saved on each
+    draw; after a restart the cycle is rebuilt and the same number of draws
+    replayed, which gives the same order if the playlist is unchanged.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self.seed: Optional[int] = None  # None: shuffle not started
+        self.cycle = 0
+        self.drawn = 0
+        self.boundary: Optional[str] = None  # left out of this cycle
+        self._items = None
+        self._members: Dict[str, int] = {}
+        self._rng: Optional[random.Random] = None  # None: cycle not built
+        self._bag: List[str] = []
+        self._pos: Dict[str, int] = {}
+        # The last `_decided` slots of `_bag` are already drawn, in pop
+        # order (last slot first); the slots before them are unordered.
+        self._decided = 0
+        if path:
+            self._load()
+
+    @property
+    def active(self) -> bool:
+        return self.seed is not None
+
+    def remaining(self) -> int:
+        return len(self._bag)
+
+    # ---------- control ----------
+    def start(self, items: List[str], current: Optional[str] = None) -> None:
+        with self._lock:
+            if self.seed is None:
+                self.seed = random.getrandbits(63)
+                self.cycle, self.drawn, self.boundary = 0, 0, current
+                self._rng = None
+                self._save()
+            self._sync(items)
+
+    def stop(self) -> None:
+        with self._lock:
+            self.seed = None
+            self._items, self._members, self._rng = None, {}, None
+            self._bag, self._pos, self._decided = [], {}, 0
+            if self.path:
+                with contextlib.suppress(OSError):
+                    os.remove(self.path)
+
+    # ---------- drawing ----------
+    def draw(self, items: List[str], current: Optional[str] = None) -> Optional[str]:
+        """Next track; starts a new cycle (without `current`) when empty."""
+        with self._lock:
+            if self.seed is None:
+                return None
+            self._sync(items)
+            if not self._members:
+                return None
+            if not self._bag:
+                self.cycle, self.drawn, self.boundary = self.cycle + 1, 0, current
+                self._refill()
+            return self._take()
+
+    def consume(self, items: List[str], name: str) -> bool:
+        """Draw `name` if it is next (it was started from a peek())."""
+        with self._lock:
+            if self.seed is None:
+                return False
+            self._sync(items)
+            self._decide(1)
+            if not self._bag or self._bag[-1] != name:
+                return False
+            self._take()
+            return True
+
+    def peek(self, items: List[str], count: int) -> List[str]:
+        """Up to `count` upcoming draws from this cycle."""
+        with self._lock:
+            if self.seed is None or count <= 0:
+                return []
+            self._sync(items)
+            self._decide(count)
+            k = min(count, self._decided)
+            return self._bag[: -k - 1 : -1] if k else []
+
+    # ---------- playlist changes ----------
+    def apply_delta(self, removed: Iterable[str], added: Iterable[str]) -> None:
+        """The synced playlist was edited in place."""
+        with self._lock:
+            if self._rng is None:
+                return
+            members = self._members
+            for name in removed:
+                c = members.get(name, 0) - 1
+                if c > 0:
+                    members[name] = c
+                elif name in members:
+                    del members[name]
+                    self._discard(name)
+            for name in added:
+                c = members.get(name, 0)
+                members[name] = c + 1
+                if not c:
+                    self._insert(name)
+
+    def _sync(self, items: List[str]) -> None:
+        """Follow a different playlist object (lock held)."""
+        if items is self._items and self._rng is not None:
+            return
+        counts = Counter(items)
+        if self._rng is None:
+            self._items, self._members = items, dict(counts)
+            self._refill(replay=self.drawn)
+            return
+        old = self._members
+        for name in old.keys() - counts.keys():
+            self._discard(name)
+        for name in counts:
+            if name not in old:
+                self._insert(name)
+        self._items, self._members = items, dict(counts)
+
+    # ---------- bag internals (lock held) ----------
+    def _refill(self, replay: int = 0) -> None:
+        """Build the bag for this cycle and re-draw `replay` tracks."""
+        self._rng = random.Random(f"{self.seed}:{self.cycle}")
+        names = list(self._members)
+        if len(names) > 1 and self.boundary in self._members:
+            names.remove(self.boundary)
+        self._bag = names
+        self._pos = {n: i for i, n in enumerate(names)}
+        self._decided = 0
+        for _ in range(min(replay, len(names))):
+            self._pop()
+
+    def _decide(self, count: int) -> None:
+        bag, pos, rng = self._bag, self._pos, self._rng
+        while self._decided < min(count, len(bag)):
+            hi = len(bag) - self._decided - 1
+            j = rng.randrange(hi + 1)
+            bag[j], bag[hi] = bag[hi], bag[j]
+            pos[bag[j]], pos[bag[hi]] = j, hi
+            self._decided += 1
+
+    def _pop(self) -> str:
+        self._decide(1)
+        name = self._bag.pop()
+        del self._pos[name]
+        self._decided -= 1
+        return name
+
+    def _take(self) -> str:
+        name = self._pop()
+        self.drawn += 1
+        self._save()
+        return name
+
+    def _insert(self, name: str) -> None:
+        """Add to the undrawn part (shifts only the decided slots)."""
+        bag = self._bag
+        i = len(bag) - self._decided
+        bag.insert(i, name)
+        for k in range(i, len(bag)):
+            self._pos[bag[k]] = k
+
+    def _discard(self, name: str) -> None:
+        i = self._pos.pop(name, None)
+        if i is None:
+            return
+        bag = self._bag
+        hi = len(bag) - self._decided  # first decided slot
+        if i >= hi:
+            self._decided -= 1
+            start = i
+        else:
+            # Fill the hole from the last undecided slot, then close that.
+            last = hi - 1
+            if last != i:
+                bag[i] = bag[last]
+                self._pos[bag[i]] = i
+            i = start = last
+        del bag[i]
+        for k in range(start, len(bag)):
+            self._pos[bag[k]] = k
+
+    # ---------- persistence ----------
+    def _save(self) -> None:
+        if not self.path or self.seed is None:
+            return
+        state = {
+            "seed": self.seed,
+            "cycle": self.cycle,
+            "drawn": self.drawn,
+            "boundary": self.boundary,
+        }
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print("[shuffle] save failed:", e)
+
+    def _load(self) -> None:
+        with contextlib.suppress(OSError, ValueError, TypeError, AttributeError):
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+            seed = int(state["seed"])
+            self.cycle = max(0, int(state.get("cycle", 0)))
+            self.drawn = max(0, int(state.get("drawn", 0)))
+            self.boundary = state.get("boundary")
+            self.seed = seed
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import math
+import random
+import threading
+import time
+from collections import Counter, deque
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# A track played this long ago is weighted at half its play-count weight.
+RECENCY_HALF_S = 3600.0
+# Recently picked tracks whose weights are kept up to date as they recover
+# (at most every REWEIGHT_S); older ones keep their last weight.
+RECENT_TRACKS = 128
+REWEIGHT_S = 10.0
+MIN_WEIGHT = 1e-6
+
+Stats = Dict[str, Tuple[int, Optional[float]]]
+
+
+def track_weight(
+    plays: int,
+    last_played: Optional[float],
+    now: float,
+    half_life_s: float = RECENCY_HALF_S,
+) -> float:
+    """1/sqrt(1 + plays), scaled down towards 0 for a track just played."""
+    w = 1.0 / math.sqrt(1 + max(0, plays))
+    if last_played:
+        w *= 1.0 - 0.5 ** (max(0.0, now - last_played) / half_life_s)
+    return max(w, MIN_WEIGHT)
+
+
+class FenwickSampler:
+    """
+    Non-negative weights w[0..n) in a Fenwick (binary indexed) tree:
+    set() and append() are O(log n), and sample() picks index i with
+    probability w[i] / total in O(log n).
+    Usage:
+        fw = FenwickSampler([1.0, 3.0, 0.5])
+        fw.set(1, 0.0); i = fw.sample(random.random)
+    """
+
+    def __init__(self, weights: Iterable[float] = ()):
+        self._w = [float(x) for x in weights]
+        n = len(self._w)
+        tree = [0.0] * (n + 1)
+        for i, x in enumerate(self._w, 1):  # O(n) build
+            tree[i] += x
+            j = i + (i & -i)
+            if j <= n:
+                tree[j] += tree[i]
+        self._tree = tree
+
+    def __len__(self) -> int:
+        return len(self._w)
+
+    def weight(self, i: int) -> float:
+        return self._w[i]
+
+    def _prefix(self, i: int) -> float:
+        tree, s = self._tree, 0.0
+        while i > 0:
+            s += tree[i]
+            i -= i & -i
+        return s
+
+    def total(self) -> float:
+        return self._prefix(len(self._w))
+
+    def set(self, i: int, w: float) -> None:
+        d = float(w) - self._w[i]
+        if not d:
+            return
+        self._w[i] = float(w)
+        tree, n = self._tree, len(self._w)
+        i += 1
+        while i <= n:
+            tree[i] += d
+            i += i & -i
+
+    def append(self, w: float) -> int:
+        self._w.append(float(w))
+        i = len(self._w)
+        self._tree.append(float(w) + self._prefix(i - 1) - self._prefix(i - (i & -i)))
+        return i - 1
+
+    def find(self, u: float) -> int:
+        """Smallest i with w[0] + ... + w[i] > u."""
+        tree, n = self._tree, len(self._w)
+        pos, step = 0, 1 << (n.bit_length() - 1) if n else 0
+        while step:
+            nxt = pos + step
+            if nxt <= n and tree[nxt] <= u:
+                u -= tree[nxt]
+                pos = nxt
+            step >>= 1
+        return min(pos, n - 1)
+
+    def sample(self, rand: Callable[[], float]) -> Optional[int]:
+        total = self.total()
+        if total <= 0 or not self._w:
+            return None
+        for _ in range(4):
+            i = self.find(rand() * total)
+            if self._w[i] > 0:
+                return i
+        # Rounding kept landing on an empty slot; take the heaviest.
+        return max(range(len(self._w)), key=self._w.__getitem__)
+
+
+class SmartShuffle:
+    """
+    Weighted shuffle over the service playlist: rarely played tracks come
+    up more often and just-played ones are held back (see track_weight).
+    Usage:
+        SMART = SmartShuffle(LIBRARY.play_stats)  # {name: (plays, last_played)}
+        SMART.draw(playlist)         # next track, O(log n)
+        SMART.peek(playlist, 2)      # what draw() will return next
+        SMART.played(name)           # on every play; reweights in O(log n)
+        SMART.apply_delta(removed, added)  # after editing playlist in place
+    Stats are read once per playlist object; after that, plays are counted
+    locally. Each distinct name has one slot in a FenwickSampler. Removed
+    tracks get weight 0 and their slot is reused.
+    """
+
+    def __init__(
+        self,
+        stats: Optional[Callable[[], Stats]] = None,
+        half_life_s: float = RECENCY_HALF_S,
+        rng: Optional[random.Random] = None,
+    ):
+        self._stats = stats
+        self.half_life_s = half_life_s
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._items = None
+        self._members: Dict[str, int] = {}
+        self._plays: Stats = {}
+        self._tree: Optional[FenwickSampler] = None
+        self._slot: Dict[str, int] = {}
+        self._names: List[Optional[str]] = []
+        self._free: List[int] = []
+        self._queue: deque = deque()
+        self._recent: Dict[str, None] = {}  # insertion-ordered set
+        self._reweighted = 0.0
+
+    # ---------- drawing ----------
+    def draw(self, items: List[str], current: Optional[str] = None) -> Optional[str]:
+        with self._lock:
+            self._sync(items)
+            if self._queue:
+                return self._queue.popleft()
+            return self._pick(current)
+
+    def peek(self, items: List[str], count: int) -> List[str]:
+        """Up to `count` upcoming draws (they are picked now and held)."""
+        with self._lock:
+            self._sync(items)
+            while len(self._queue) < count:
+                name = self._pick()
+                if name is None:
+                    break
+                self._queue.append(name)
+            return list(self._queue)[: max(0, count)]
+
+    def consume(self, items: List[str], name: str) -> bool:
+        """Drop `name` from the front of the queue (it was started from a peek())."""
+        with self._lock:
+            if self._queue and self._queue[0] == name:
+                self._queue.popleft()
+                return True
+            return False
+
+    def reset(self) -> None:
+        """Forget picks made ahead (shuffle turned off or changed mode)."""
+        with self._lock:
+            self._queue.clear()
+
+    def played(self, name: str, when: Optional[float] = None) -> None:
+        with self._lock:
+            plays, _ = self._plays.get(name, (0, None))
+            self._plays[name] = (plays + 1, time.time() if when is None else when)
+            self._hold(name)
+
+    def _pick(self, current: Optional[str] = None) -> Optional[str]:
+        """One weighted draw (lock held); the pick is held back right away."""
+        tree = self._tree
+        if tree is None:
+            return None
+        now = time.time()
+        if now - self._reweighted >= REWEIGHT_S:
+            self._reweighted = now
+            for name in self._recent:
+                self._reweight(name, now)
+        if current in self._slot and len(self._slot) > 1:
+            tree.set(self._slot[current], 0.0)
+        i = tree.sample(self._rng.random)
+        if current in self._slot:
+            self._reweight(current, now)
+        if i is None:
+            return None
+        name = self._names[i]
+        # Counted as played only by played(); until then it is just recent.
+        plays, _ = self._plays.get(name, (0, None))
+        self._plays[name] = (plays, now)
+        self._hold(name)
+        return name
+
+    def _hold(self, name: str) -> None:
+        now = time.time()
+        if name not in self._recent:
+            self._recent[name] = None
+            if len(self._recent) > RECENT_TRACKS:
+                evicted = next(iter(self._recent))
+                del self._recent[evicted]
+                self._reweight(evicted, now)
+        self._reweight(name, now)
+
+    def _reweight(self, name: str, now: float) -> None:
+        i = self._slot.get(name)
+        if i is not None:
+            plays, last = self._plays.get(name, (0, None))
+            self._tree.set(i, track_weight(plays, last, now, self.half_life_s))
+
+    # ---------- playlist changes ----------
+    def apply_delta(self, removed: Iterable[str], added: Iterable[str]) -> None:
+        """The synced playlist was edited in place."""
+        with self._lock:
+            if self._tree is None:
+                return
+            members = self._members
+            for name in removed:
+                c = members.get(name, 0) - 1
+                if c > 0:
+                    members[name] = c
+                elif name in members:
+                    del members[name]
+                    self._drop(name)
+            for name in added:
+                c = members.get(name, 0)
+                members[name] = c + 1
+                if not c:
+                    self._add(name)
+
+    def _sync(self, items: List[str]) -> None:
+        """Follow a different playlist object (lock held)."""
+        if items is self._items and self._tree is not None:
+            return
+        counts = Counter(items)
+        if self._tree is None:
+            self._plays = dict(self._stats()) if self._stats else {}
+            now = time.time()
+            self._names = list(counts)
+            self._slot = {n: i for i, n in enumerate(self._names)}
+            self._free = []
+            self._tree = FenwickSampler(
+                track_weight(*self._plays.get(n, (0, None)), now, self.half_life_s)
+                for n in self._names
+            )
+        else:
+            old = self._members
+            for name in old.keys() - counts.keys():
+                self._drop(name)
+            for name in counts:
+                if name not in old:
+                    self._add(name)
+        self._items, self._members = items, dict(counts)
+
+    def _add(self, name: str) -> None:
+        plays, last = self._plays.get(name, (0, None))
+        w = track_weight(plays, last, time.time(), self.half_life_s)
+        if self._free:
+            i = self._free.pop()
+            self._names[i] = name
+            self._tree.set(i, w)
+        else:
+            i = self._tree.append(w)
+            self._names.append(name)
+        self._slot[name] = i
+
+    def _drop(self, name: str) -> None:
+        i = self._slot.pop(name, None)
+        if i is None:
+            return
+        self._tree.set(i, 0.0)
+        self._names[i] = None
+        self._free.append(i)
+        if name in self._queue:
+            self._queue.remove(name)
@@ -0,0 +1,26 @@
+import threading
+import time
+
+from command_lanes import CommandDispatcher
+
+
+def test_ordered_lane_keeps_arrival_order():
+    lanes = CommandDispatcher(slow_workers=2)
+    done = threading.Event()
+    applied = []
+
+    def install(i):
+        # Older payloads take longer, as a bigger playlist would.
+        time.sleep(0.02 if i % 2 == 0 else 0.0)
+        applied.append(i)
+        if i == 9:
+            done.set()
+
+    handler = lanes.ordered(install)
+    try:
+        for i in range(10):
+            handler(i)
+        assert done.wait(5.0)
+        assert applied == list(range(10))
+    finally:
+        lanes.shutdown()
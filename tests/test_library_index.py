@@ -0,0 +1,43 @@
+import os
+
+from library_index import LibraryIndex
+
+
+def _touch(path, data=b"x"):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def test_rescan_picks_up_cover_changes(tmp_path):
+    folder = tmp_path / "Played"
+    folder.mkdir()
+    song = str(folder / "Song.m4a")
+    cover = str(folder / "Song.jpg")
+    _touch(song)
+    lib = LibraryIndex(str(folder), str(tmp_path / "library.db"))
+    assert lib.refresh(force=True)
+    assert lib.get("Song.m4a")["cover_path"] is None
+
+    # The thumbnail lands after the track was indexed; the track is unchanged.
+    _touch(cover)
+    lib.refresh(force=True)
+    assert lib.get("Song.m4a")["cover_path"] == cover
+
+    os.remove(cover)
+    lib.refresh(force=True)
+    assert lib.get("Song.m4a")["cover_path"] is None
+
+
+def test_rescan_updates_changed_and_drops_missing(tmp_path):
+    folder = tmp_path / "Played"
+    folder.mkdir()
+    a, b = str(folder / "A.m4a"), str(folder / "B.mp3")
+    _touch(a)
+    _touch(b)
+    lib = LibraryIndex(str(folder), str(tmp_path / "library.db"))
+    assert sorted(lib.names((".m4a", ".mp3"), order="name")) == ["A.m4a", "B.mp3"]
+    _touch(a, b"longer")
+    os.remove(b)
+    lib.refresh(force=True)
+    assert lib.names((".m4a", ".mp3")) == ["A.m4a"]
+    assert lib.get("A.m4a")["size"] == 6
@@ -0,0 +1,64 @@
+from play_history import PlayHistory
+
+
+def test_back_forward_and_truncate():
+    hist = PlayHistory(capacity=10)
+    for name in "ABCD":
+        hist.record(name)
+    assert hist.back() == "C"
+    assert hist.back() == "B"
+    assert hist.ahead(5) == ["C", "D"]
+    # Retracing: the entry forward() lands on is the cursor's, so the
+    # record() that follows its playback keeps the rest of the history.
+    assert hist.forward() == "C"
+    hist.record("C")
+    assert hist.entries() == ["A", "B", "C", "D"]
+    assert hist.ahead(5) == ["D"]
+    # Something new after going back drops what was ahead.
+    hist.record("E")
+    assert hist.entries() == ["A", "B", "C", "E"]
+    assert hist.forward() is None
+    assert hist.current() == "E"
+
+
+def test_ring_drops_the_oldest():
+    hist = PlayHistory(capacity=3)
+    for name in "ABCDE":
+        hist.record(name)
+    assert len(hist) == 3
+    assert hist.entries() == ["C", "D", "E"]
+    assert hist.back() == "D"
+    assert hist.back() == "C"
+    assert hist.back() is None
+    assert hist.current() == "C"
+
+
+def test_steps_skip_rejected_entries():
+    hist = PlayHistory()
+    for name in "ABCD":
+        hist.record(name)
+
+    def valid(name):
+        return name != "C"  # removed from the playlist
+
+    assert hist.back(valid) == "B"
+    assert hist.ahead(2, valid) == ["D"]
+    assert hist.forward(valid) == "D"
+
+
+def test_reload_keeps_entries_and_cursor(tmp_path):
+    path = str(tmp_path / "history.json")
+    hist = PlayHistory(capacity=5, path=path)
+    for name in "ABCDEFG":
+        hist.record(name)
+    hist.back()
+    hist.back()
+
+    again = PlayHistory(capacity=5, path=path)
+    assert again.entries() == ["C", "D", "E", "F", "G"]
+    assert again.current() == "E"
+    assert again.forward() == "F"
+    # A smaller ring keeps the newest entries.
+    small = PlayHistory(capacity=2, path=path)
+    assert small.entries() == ["F", "G"]
+    assert small.current() == "F"
@@ -0,0 +1,49 @@
+from play_order import PlayOrder
+
+
+def test_next_and_previous_wrap():
+    items = ["A", "B", "C"]
+    order = PlayOrder()
+    assert order.next(items, "C") == "A"
+    assert order.previous(items, "A") == "C"
+    assert order.next(items, "missing") is None
+    assert order.previous(items, "missing") == "A"
+    assert order.next([], "A") is None
+
+
+def test_duplicates_are_walked_in_order():
+    items = ["A", "X", "B", "X", "C"]
+    order = PlayOrder()
+    name, seen = "A", []
+    for _ in range(5):
+        name = order.next(items, name)
+        seen.append(name)
+    # The second X continues from its own slot, not from the first X.
+    assert seen == ["X", "B", "X", "C", "A"]
+    assert order.previous(items, "C") == "X"
+    assert order.previous(items, "X") == "B"
+
+
+def test_lookups_do_not_move_the_cursor():
+    items = ["A", "X", "B", "X", "C"]
+    order = PlayOrder()
+    assert order.next(items, "B") == "X"  # cursor on the second X
+    # The service checks membership and peeks ahead between steps...
+    assert order.locate(items, "A") == 0
+    assert order.upcoming(items, "A", 2) == ["X", "B"]
+    # ...and stepping still continues from the second X.
+    assert order.next(items, "X") == "C"
+
+
+def test_in_place_edits():
+    items = ["A", "B", "C", "D"]
+    order = PlayOrder()
+    assert order.next(items, "A") == "B"
+    items.insert(0, "Z")
+    order.changed()
+    assert order.locate(items, "C") == 3
+    assert order.next(items, "D") == "Z"
+    # Edited without changed(): a stale map entry is detected and rebuilt.
+    items.remove("A")
+    assert order.locate(items, "C") == 2
+    assert order.upcoming(items, "C", 10) == ["D", "Z", "B"]
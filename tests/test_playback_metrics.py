@@ -0,0 +1,20 @@
+import time
+
+from playback_metrics import GapMeter
+
+
+def test_gap_counts_from_the_stamped_end():
+    gaps = GapMeter()
+    gaps.track_ended(time.perf_counter() - 0.5)  # noticed half a second late
+    gap_ms = gaps.track_started("gapless")
+    assert 500 <= gap_ms < 1000
+    assert gaps.report()["gapless"]["count"] == 1
+
+
+def test_start_without_an_end_is_not_a_transition():
+    gaps = GapMeter()
+    assert gaps.track_started("reload") is None
+    gaps.track_ended()
+    gaps.cancel()
+    assert gaps.track_started("reload") is None
+    assert gaps.report() == {}
@@ -0,0 +1,91 @@
+import os
+
+from playlist_manager import PlaylistManager
+from utils import get_app_writable_dir
+
+
+def _titles(pm):
+    return [t.title for t in pm.active_playlist().tracks]
+
+
+def test_journal_writes_in_one_window_replay_once(tmp_path):
+    store = str(tmp_path / "playlists.json")
+    root = get_app_writable_dir("Downloaded/Played")
+    paths = [os.path.join(root, f"T{i}.m4a") for i in range(5)]
+
+    pm = PlaylistManager(store, async_writes=True, debounce_s=0.25)
+    pid = pm.create_playlist("Mix")
+    pm.set_active(pid)
+    pm.add_tracks(pid, paths)
+    pm.flush()
+    # Several journal appends inside one debounce window, no snapshot.
+    pm.remove_track(pid, 0)
+    pm.remove_track(pid, 0)
+    pm.move_track(pid, 0, 2)
+    expected = _titles(pm)
+    assert pm.flush(5.0)
+
+    reloaded = PlaylistManager(store)
+    assert _titles(reloaded) == expected == ["T3", "T4", "T2"]
+
+
+def test_replay_skips_duplicated_journal_records(tmp_path):
+    store = str(tmp_path / "playlists.json")
+    root = get_app_writable_dir("Downloaded/Played")
+    pm = PlaylistManager(store)
+    pid = pm.create_playlist("Mix")
+    pm.set_active(pid)
+    pm.add_tracks(pid, [os.path.join(root, f"T{i}.m4a") for i in range(4)])
+    pm.save()
+    pm.remove_track(pid, 0)
+
+    journal = store + ".journal"
+    with open(journal, encoding="utf-8") as f:
+        lines = f.readlines()
+    with open(journal, "a", encoding="utf-8") as f:
+        f.writelines(lines)  # the same records appended a second time
+
+    assert _titles(PlaylistManager(store)) == ["T1", "T2", "T3"]
+
+
+def test_export_falls_back_to_the_sandbox_copy(tmp_path):
+    store = str(tmp_path / "playlists.json")
+    root = get_app_writable_dir("Downloaded/Played")
+    os.makedirs(root, exist_ok=True)
+    for name in ("Moved.m4a", "Moved.jpg", "Here.m4a"):
+        open(os.path.join(root, name), "w").close()
+    gone = str(tmp_path / "old sandbox" / "Moved.m4a")
+
+    pm = PlaylistManager(store)
+    pid = pm.create_playlist("Mix")
+    pm.add_tracks(pid, [gone, os.path.join(root, "Here.m4a")])
+    pm.save()
+
+    moved, here = PlaylistManager(store).export_dict()["playlists"][0]["tracks"]
+    assert moved["path"] == os.path.join(root, "Moved.m4a")
+    assert moved["thumb"] == os.path.join(root, "Moved.jpg")
+    assert here["path"] == os.path.join(root, "Here.m4a")
+    assert here["thumb"] is None
+
+
+def test_torn_journal_tail_is_cut_before_new_edits(tmp_path):
+    store = str(tmp_path / "playlists.json")
+    root = get_app_writable_dir("Downloaded/Played")
+    pm = PlaylistManager(store)
+    pid = pm.create_playlist("Mix")
+    pm.set_active(pid)
+    pm.add_tracks(pid, [os.path.join(root, f"T{i}.m4a") for i in range(4)])
+    pm.save()
+    pm.remove_track(pid, 0)
+    with open(store + ".journal", "a", encoding="utf-8") as f:
+        f.write('{"s": 99, "op": "remo')  # cut off mid-record
+
+    first = PlaylistManager(store)
+    assert _titles(first) == ["T1", "T2", "T3"]
+    first.move_track(pid, 0, 2)
+    first.remove_track(pid, 0)
+
+    second = PlaylistManager(store)
+    assert _titles(second) == ["T3", "T1"]
+    second.add_tracks(pid, [os.path.join(root, "T9.m4a")])
+    assert _titles(PlaylistManager(store)) == ["T3", "T1", "T9"]
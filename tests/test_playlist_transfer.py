@@ -0,0 +1,116 @@
+import random
+import threading
+
+from playlist_transfer import (
+    PlaylistReassembler,
+    PlaylistSender,
+    decode_transfer,
+    encode_playlist,
+    split_chunks,
+)
+
+
+class _Wire:
+    """Collects what the sender puts on /playlist_chunk."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._sent = []
+
+    def __call__(self, addr, args):
+        assert addr == "/playlist_chunk"
+        with self._cond:
+            self._sent.append(list(args))
+            self._cond.notify_all()
+
+    def take(self, count, timeout=10.0):
+        with self._cond:
+            assert self._cond.wait_for(lambda: len(self._sent) >= count, timeout)
+            out, self._sent = self._sent[:count], self._sent[count:]
+        return out
+
+
+def _big_playlist(n=50_000):
+    return [f"Artist {i % 977} - Track {i} (ünïcode).m4a" for i in range(n)]
+
+
+def _deliver(rx, chunks):
+    return [rx.add(*c) for c in chunks]
+
+
+def test_large_playlist_survives_drops_and_reordering():
+    names = _big_playlist()
+    data = encode_playlist(names)
+    total = len(split_chunks(data))
+    assert total > 100
+
+    wire, rx = _Wire(), PlaylistReassembler()
+    sender = PlaylistSender(wire)
+    tid = sender.send(data)
+    try:
+        sent = wire.take(total)
+        assert [c[1] for c in sent] == list(range(total))
+
+        # Lose every 7th chunk and shuffle the rest; the last one still
+        # arrives last, as the sender guarantees.
+        rng = random.Random(7)
+        dropped = [c[1] for c in sent[:-1] if c[1] % 7 == 3]
+        body = [c for c in sent[:-1] if c[1] % 7 != 3]
+        rng.shuffle(body)
+        results = _deliver(rx, body + [sent[-1]])
+        assert all(status == "partial" for status, _ in results[:-1])
+        assert results[-1] == ("missing", dropped)
+
+        sender.on_nack(tid, ",".join(map(str, dropped)))
+        resent = wire.take(len(dropped) + 1)  # + the last chunk again
+        assert [c[1] for c in resent] == dropped + [total - 1]
+        results = _deliver(rx, resent)
+        status, payload = results[-2]
+        assert status == "done"
+        assert results[-1] == ("duplicate", None)
+        assert decode_transfer(payload) == names
+    finally:
+        sender.on_ack(tid)
+
+
+def test_corrupt_transfer_is_resent_and_decoded():
+    names = _big_playlist(20_000)
+    data = encode_playlist(names)
+    total = len(split_chunks(data))
+
+    wire, rx = _Wire(), PlaylistReassembler()
+    sender = PlaylistSender(wire)
+    tid = sender.send(data)
+    try:
+        sent = wire.take(total)
+        bad = [list(c) for c in sent]
+        chunk = bytearray(bad[5][4])
+        chunk[10] ^= 0xFF
+        bad[5][4] = bytes(chunk)
+        assert _deliver(rx, bad)[-1] == ("corrupt", None)
+
+        # The service answers a corrupt transfer with a bare nack.
+        sender.on_nack(tid, "")
+        results = _deliver(rx, wire.take(total))
+        status, payload = results[-1]
+        assert status == "done"
+        assert decode_transfer(payload) == names
+    finally:
+        sender.on_ack(tid)
+
+
+def test_restarted_sender_is_not_taken_for_a_duplicate():
+    data = encode_playlist(["A.m4a", "B.m4a"])
+    rx = PlaylistReassembler()
+    for _ in range(3):
+        # A fresh sender per GUI run, each talking to the same service.
+        wire = _Wire()
+        sender = PlaylistSender(wire)
+        tid = sender.send(data)
+        try:
+            assert 0 < tid < 2**31 - 1000
+            status, payload = _deliver(rx, wire.take(1))[-1]
+            assert status == "done"
+            assert decode_transfer(payload) == ["A.m4a", "B.m4a"]
+        finally:
+            sender.on_ack(tid)
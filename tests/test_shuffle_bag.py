@@ -0,0 +1,83 @@
+from shuffle_bag import ShuffleBag
+
+
+def _names(n):
+    return [f"T{i}" for i in range(n)]
+
+
+def test_each_track_once_per_cycle():
+    songs = _names(20)
+    bag = ShuffleBag()
+    bag.start(songs, current="T0")
+    first = [bag.draw(songs) for _ in range(19)]
+    # The track playing at start() waits for the next cycle.
+    assert sorted(first) == sorted(songs[1:])
+    assert bag.remaining() == 0
+    second = [bag.draw(songs, current=first[-1]) for _ in range(19)]
+    assert first[-1] not in second
+    assert len(set(second)) == 19
+
+
+def test_restart_replays_the_same_order(tmp_path):
+    path = str(tmp_path / "shuffle.json")
+    songs = _names(50)
+    bag = ShuffleBag(path)
+    bag.start(songs)
+    played = [bag.draw(songs) for _ in range(10)]
+    expected = bag.peek(songs, 5)
+
+    again = ShuffleBag(path)
+    assert again.active
+    assert again.peek(list(songs), 5) == expected
+    rest = [again.draw(songs) for _ in range(40)]
+    assert rest[:5] == expected
+    assert sorted(played + rest) == sorted(songs)
+
+    again.stop()
+    assert not ShuffleBag(path).active
+
+
+def test_peek_then_consume():
+    songs = _names(10)
+    bag = ShuffleBag()
+    bag.start(songs)
+    nxt = bag.peek(songs, 3)
+    assert bag.consume(songs, "not next") is False
+    assert bag.consume(songs, nxt[0]) is True
+    assert bag.draw(songs) == nxt[1]
+
+
+def test_apply_delta_keeps_the_order():
+    songs = _names(30)
+    bag = ShuffleBag()
+    bag.start(songs)
+    drawn = [bag.draw(songs) for _ in range(5)]
+    ahead = bag.peek(songs, 5)
+
+    # Edit in place: drop one peeked and one undrawn track, add two new.
+    gone = [ahead[2], next(s for s in songs if s not in drawn + ahead)]
+    for name in gone:
+        songs.remove(name)
+    songs += ["New1", "New2"]
+    bag.apply_delta(gone, ["New1", "New2"])
+
+    assert bag.peek(songs, 4) == [n for n in ahead if n not in gone]
+    rest = []
+    while bag.remaining():
+        rest.append(bag.draw(songs))
+    assert sorted(drawn + rest) == sorted(songs)
+
+
+def test_duplicates_count_once():
+    songs = ["A", "B", "A", "C"]
+    bag = ShuffleBag()
+    bag.start(songs)
+    assert bag.remaining() == 3
+    # Removing one of two copies keeps the track in the bag...
+    songs.remove("A")
+    bag.apply_delta(["A"], [])
+    assert bag.remaining() == 3
+    # ...removing the last one takes it out.
+    songs.remove("A")
+    bag.apply_delta(["A"], [])
+    assert sorted(bag.draw(songs) for _ in range(2)) == ["B", "C"]
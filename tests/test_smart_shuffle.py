@@ -0,0 +1,88 @@
+import random
+import time
+
+from smart_shuffle import MIN_WEIGHT, FenwickSampler, SmartShuffle, track_weight
+
+
+def test_fenwick_prefix_sums_and_sampling():
+    rng = random.Random(3)
+    weights = [rng.random() for _ in range(37)]
+    fw = FenwickSampler(weights)
+    for _ in range(200):
+        i = rng.randrange(len(weights) + 1)
+        if i == len(weights):
+            weights.append(rng.random())
+            fw.append(weights[-1])
+        else:
+            weights[i] = rng.choice([0.0, rng.random()])
+            fw.set(i, weights[i])
+    assert abs(fw.total() - sum(weights)) < 1e-9
+    acc = 0.0
+    for i, w in enumerate(weights):
+        if w > 0:
+            assert fw.find(acc + w / 2) == i
+        acc += w
+    assert all(weights[fw.sample(rng.random)] > 0 for _ in range(100))
+    assert FenwickSampler([0.0, 0.0]).sample(rng.random) is None
+
+
+def test_track_weight():
+    now = time.time()
+    assert track_weight(0, None, now) == 1.0
+    assert track_weight(3, None, now) == 0.5
+    assert track_weight(0, now, now) == MIN_WEIGHT
+    assert abs(track_weight(0, now - 3600, now, half_life_s=3600) - 0.5) < 1e-9
+
+
+def test_rarely_played_tracks_come_up_more():
+    names = [f"T{i}" for i in range(100)]
+    month_ago = time.time() - 30 * 86400
+    stats = {n: (99, month_ago) for n in names[:50]}  # weight 0.1 vs 1
+    smart = SmartShuffle(lambda: stats, rng=random.Random(7))
+    # Few enough draws that the unplayed half is not used up (each pick is
+    # held back for about an hour).
+    picks = []
+    for _ in range(30):
+        name = smart.draw(names)
+        smart.played(name)
+        picks.append(name)
+    assert len(set(picks)) == 30
+    # A uniform shuffle would take about 15 from the often-played half.
+    assert sum(p in stats for p in picks) <= 10
+
+
+def test_just_played_is_held_back():
+    names = ["A", "B", "C"]
+    smart = SmartShuffle(rng=random.Random(1))
+    last = None
+    for _ in range(50):
+        name = smart.draw(names, current=last)
+        assert name != last
+        smart.played(name)
+        last = name
+
+
+def test_peek_consume_and_reset():
+    names = [f"T{i}" for i in range(10)]
+    smart = SmartShuffle(rng=random.Random(2))
+    ahead = smart.peek(names, 3)
+    assert len(set(ahead)) == 3
+    assert smart.consume(names, ahead[1]) is False
+    assert smart.consume(names, ahead[0]) is True
+    assert smart.draw(names) == ahead[1]
+    smart.reset()
+    assert ahead[2] not in smart.peek(names, 7)
+
+
+def test_apply_delta_and_new_lists():
+    names = ["A", "B", "C"]
+    smart = SmartShuffle(rng=random.Random(4))
+    smart.peek(names, 2)
+    names.remove("A")
+    names.append("D")
+    smart.apply_delta(["A"], ["D"])
+    seen = {smart.draw(names) for _ in range(200)}
+    assert seen == {"B", "C", "D"}
+    # A different list object is diffed by name.
+    other = ["D", "E"]
+    assert {smart.draw(other) for _ in range(100)} == {"D", "E"}